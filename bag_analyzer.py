@@ -0,0 +1,364 @@
+import argparse
+import glob
+import io
+import os
+import random
+import sqlite3
+import struct
+
+from telemetry import ResultsWriter, format_seconds, percentile
+
+JOINT_STATE_TYPE = "sensor_msgs/msg/JointState"
+
+# A joint moved if its position changed by more than this (radians or meters)
+DEFAULT_MOTION_TOLERANCE = 1e-4
+
+# Command latencies are kept for a uniform random sample of at most this many commands
+# (reservoir sampling): percentiles are exact up to this many commands, estimated beyond
+LATENCY_SAMPLE_SIZE = 10000
+
+MCAP_MAGIC = b"\x89MCAP0\r\n"
+MCAP_SCHEMA = 0x03
+MCAP_CHANNEL = 0x04
+MCAP_MESSAGE = 0x05
+MCAP_CHUNK = 0x06
+MCAP_DATA_END = 0x0F
+
+# Columns of the metrics table written by the command line tool
+METRIC_COLUMNS = (
+    "bag", "duration", "bag_messages", "joint_state_rate", "command_count", "command_latency_p50",
+    "command_latency_p95", "command_latency_max", "completion_time", "topic_rates",
+)
+
+class BagError(Exception):
+    pass
+
+def read_string(buffer, offset):
+    """Read a uint32 length-prefixed string of an MCAP record. Returns it and the next offset."""
+    length, = struct.unpack_from("<I", buffer, offset)
+    offset += 4
+    return buffer[offset:offset + length].decode("utf-8"), offset + length
+
+def decompress_chunk(compression, data, uncompressed_size):
+    """Decompress the records of an MCAP chunk. zstd and lz4 need the zstandard and lz4 packages."""
+    if compression == "":
+        return data
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise BagError("The bag has zstd-compressed chunks; install the 'zstandard' package to read it")
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=uncompressed_size)
+    if compression == "lz4":
+        try:
+            import lz4.frame
+        except ImportError:
+            raise BagError("The bag has lz4-compressed chunks; install the 'lz4' package to read it")
+        return lz4.frame.decompress(data)
+    raise BagError(f"Unsupported MCAP chunk compression '{compression}'")
+
+def iter_mcap_records(stream):
+    """Yield (opcode, content) of the records in an MCAP stream, up to the end of the data section."""
+    while True:
+        header = stream.read(9)
+        if len(header) < 9:
+            return
+        opcode, length = struct.unpack("<BQ", header)
+        content = stream.read(length)
+        if len(content) < length:
+            raise BagError("Truncated MCAP record (the recording was probably not stopped cleanly)")
+        if opcode == MCAP_DATA_END:
+            return
+        yield opcode, content
+
+def iter_mcap_messages(path):
+    """
+    Stream the messages of an MCAP file as (topic, type, log time in ns, CDR data).
+
+    Records are read one at a time and chunks are decompressed one at a time, so memory use
+    does not grow with the size of the bag.
+    """
+    schemas = {}
+    channels = {}
+
+    def handle(opcode, content):
+        if opcode == MCAP_SCHEMA:
+            schema_id, = struct.unpack_from("<H", content, 0)
+            schemas[schema_id], _ = read_string(content, 2)
+        elif opcode == MCAP_CHANNEL:
+            channel_id, schema_id = struct.unpack_from("<HH", content, 0)
+            topic, _ = read_string(content, 4)
+            channels[channel_id] = (topic, schemas.get(schema_id, ""))
+        elif opcode == MCAP_MESSAGE:
+            channel_id, _, log_time, _ = struct.unpack_from("<HIQQ", content, 0)
+            topic, message_type = channels[channel_id]
+            return topic, message_type, log_time, content[22:]
+        return None
+
+    with open(path, "rb") as f:
+        if f.read(8) != MCAP_MAGIC:
+            raise BagError(f"{path} is not an MCAP file")
+        for opcode, content in iter_mcap_records(f):
+            if opcode == MCAP_CHUNK:
+                _, _, uncompressed_size, _ = struct.unpack_from("<QQQI", content, 0)
+                compression, offset = read_string(content, 28)
+                records_length, = struct.unpack_from("<Q", content, offset)
+                offset += 8
+                records = decompress_chunk(compression, content[offset:offset + records_length], uncompressed_size)
+                for chunk_opcode, chunk_content in iter_mcap_records(io.BytesIO(records)):
+                    message = handle(chunk_opcode, chunk_content)
+                    if message is not None:
+                        yield message
+            else:
+                message = handle(opcode, content)
+                if message is not None:
+                    yield message
+
+def iter_sqlite_messages(path):
+    """Stream the messages of a rosbag2 sqlite3 (.db3) file as (topic, type, log time in ns, CDR data)."""
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        topics = {topic_id: (name, message_type)
+                  for topic_id, name, message_type in connection.execute("SELECT id, name, type FROM topics")}
+        for topic_id, timestamp, data in connection.execute(
+                "SELECT topic_id, timestamp, data FROM messages ORDER BY timestamp"):
+            topic, message_type = topics[topic_id]
+            yield topic, message_type, timestamp, data
+    finally:
+        connection.close()
+
+def bag_files(path):
+    """Return the storage files of a bag: the file itself, or the .mcap/.db3 files of a rosbag2 directory."""
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, "*.mcap")) + glob.glob(os.path.join(path, "*.db3")))
+        if not files:
+            raise BagError(f"No .mcap or .db3 files in {path}")
+        return files
+    return [path]
+
+def iter_bag_messages(path):
+    """Stream the messages of a bag file or rosbag2 directory as (topic, type, log time in ns, CDR data)."""
+    for bag_file in bag_files(path):
+        if bag_file.endswith(".db3"):
+            yield from iter_sqlite_messages(bag_file)
+        else:
+            yield from iter_mcap_messages(bag_file)
+
+class CdrReader:
+    """Reads the fields of a CDR-serialized ROS2 message."""
+
+    def __init__(self, data):
+        # 4 byte encapsulation header; its second byte is odd for little endian
+        self.data = data
+        self.endian = "<" if data[1] & 1 else ">"
+        self.offset = 4
+
+    def align(self, size):
+        self.offset += -(self.offset - 4) % size
+
+    def unpack(self, format_, size):
+        self.align(size)
+        value, = struct.unpack_from(self.endian + format_, self.data, self.offset)
+        self.offset += size
+        return value
+
+    def uint32(self):
+        return self.unpack("I", 4)
+
+    def string(self):
+        length = self.uint32()
+        value = bytes(self.data[self.offset:self.offset + max(0, length - 1)]).decode("utf-8")
+        self.offset += length
+        return value
+
+    def float64_sequence(self):
+        count = self.uint32()
+        if not count:
+            return ()
+        self.align(8)
+        values = struct.unpack_from(f"{self.endian}{count}d", self.data, self.offset)
+        self.offset += 8 * count
+        return values
+
+def decode_joint_state(data):
+    """Return the joint names and positions of a CDR-serialized sensor_msgs/msg/JointState."""
+    reader = CdrReader(data)
+    reader.uint32()  # header.stamp.sec
+    reader.uint32()  # header.stamp.nanosec
+    reader.string()  # header.frame_id
+    names = [reader.string() for _ in range(reader.uint32())]
+    return names, reader.float64_sequence()
+
+class BagMetrics:
+    """
+    Accumulates summary metrics over a stream of bag messages in constant memory.
+
+    - Message rate of every topic.
+    - Command latency: time from a message on a command topic until a joint state shows
+      that a joint moved. The maximum is exact; the percentiles come from a sample of at
+      most LATENCY_SAMPLE_SIZE commands.
+    - Completion time: time from the first command (or the first joint state if there are
+      no command topics) until the joints last moved.
+    """
+
+    def __init__(self, joint_state_topics=None, command_topics=None, tolerance=DEFAULT_MOTION_TOLERANCE):
+        # By default, every topic of type sensor_msgs/msg/JointState
+        self.joint_state_topics = set(joint_state_topics) if joint_state_topics else None
+        self.command_topics = set(command_topics or ())
+        self.tolerance = tolerance
+        self.topics = {}
+        self.last_positions = {}
+        # [command time, latency or None] of a uniform sample of the commands, and the indices
+        # of the samples still waiting for a motion
+        self.samples = []
+        self.pending_samples = set()
+        # Commands waiting for a motion: their number and the earliest one
+        self.pending_count = 0
+        self.first_pending = None
+        self.latency_max = None
+        # Seeded, so the same bag always gives the same metrics
+        self.random = random.Random(0)
+        self.command_count = 0
+        self.start_time = None
+        self.last_motion = None
+        self.first_time = None
+        self.last_time = None
+
+    def is_joint_state(self, topic, message_type):
+        if self.joint_state_topics is not None:
+            return topic in self.joint_state_topics
+        return message_type == JOINT_STATE_TYPE
+
+    def add(self, topic, message_type, log_time, data):
+        seconds = log_time / 1e9
+        if self.first_time is None:
+            self.first_time = seconds
+        self.last_time = seconds
+        stats = self.topics.setdefault(topic, {"type": message_type, "count": 0, "first": seconds, "last": seconds})
+        stats["count"] += 1
+        stats["last"] = seconds
+
+        if topic in self.command_topics:
+            self.add_command(seconds)
+            if self.start_time is None:
+                self.start_time = seconds
+        elif self.is_joint_state(topic, message_type):
+            self.add_joint_state(topic, seconds, data)
+
+    def add_command(self, seconds):
+        self.command_count += 1
+        self.pending_count += 1
+        if self.first_pending is None:
+            self.first_pending = seconds
+        if len(self.samples) < LATENCY_SAMPLE_SIZE:
+            index = len(self.samples)
+            self.samples.append(None)
+        else:
+            index = self.random.randrange(self.command_count)
+            if index >= LATENCY_SAMPLE_SIZE:
+                return
+        self.samples[index] = [seconds, None]
+        self.pending_samples.add(index)
+
+    def add_motion(self, seconds):
+        """Attribute a motion to every command since the last one."""
+        self.last_motion = seconds
+        if not self.pending_count:
+            return
+        latency = seconds - self.first_pending
+        self.latency_max = latency if self.latency_max is None else max(self.latency_max, latency)
+        for index in self.pending_samples:
+            self.samples[index][1] = seconds - self.samples[index][0]
+        self.pending_samples.clear()
+        self.pending_count = 0
+        self.first_pending = None
+
+    def add_joint_state(self, topic, seconds, data):
+        if self.start_time is None and not self.command_topics:
+            self.start_time = seconds
+        try:
+            names, positions = decode_joint_state(data)
+        except (struct.error, UnicodeDecodeError, IndexError):
+            return
+        last = self.last_positions.setdefault(topic, {})
+        moved = False
+        for name, position in zip(names, positions):
+            previous = last.get(name)
+            if previous is not None and abs(position - previous) > self.tolerance:
+                moved = True
+            last[name] = position
+        if moved:
+            self.add_motion(seconds)
+
+    def result(self):
+        def rate(stats):
+            duration = stats["last"] - stats["first"]
+            return (stats["count"] - 1) / duration if stats["count"] > 1 and duration > 0 else None
+
+        rates = {topic: rate(stats) for topic, stats in self.topics.items()}
+        joint_state_rates = [rates[topic] for topic, stats in self.topics.items()
+                             if self.is_joint_state(topic, stats["type"]) and rates[topic] is not None]
+        latencies = [latency for _, latency in self.samples if latency is not None]
+        completion = None
+        if self.start_time is not None and self.last_motion is not None and self.last_motion >= self.start_time:
+            completion = self.last_motion - self.start_time
+        return {
+            "duration": self.last_time - self.first_time if self.first_time is not None else None,
+            "bag_messages": sum(stats["count"] for stats in self.topics.values()),
+            # The slowest joint state topic, as it limits how smoothly its robot moves
+            "joint_state_rate": min(joint_state_rates) if joint_state_rates else None,
+            "command_count": self.command_count,
+            "command_latency_p50": percentile(latencies, 0.5),
+            "command_latency_p95": percentile(latencies, 0.95),
+            "command_latency_max": self.latency_max,
+            "completion_time": completion,
+            "topic_rates": rates,
+        }
+
+def analyze_bag(path, joint_state_topics=None, command_topics=None, tolerance=DEFAULT_MOTION_TOLERANCE):
+    """Stream a bag file or rosbag2 directory once and return its summary metrics."""
+    metrics = BagMetrics(joint_state_topics, command_topics, tolerance)
+    for topic, message_type, log_time, data in iter_bag_messages(path):
+        metrics.add(topic, message_type, log_time, data)
+    return dict(metrics.result(), bag=path)
+
+def print_metrics(metrics):
+    rates = metrics["topic_rates"]
+    print(f"{metrics['bag']}: {metrics['bag_messages']} messages over {format_seconds(metrics['duration'])}")
+    for topic, rate in sorted(rates.items()):
+        print(f"    {topic}: {f'{rate:.1f} Hz' if rate is not None else 'n/a'}")
+    print(f"    command latency p50 {format_seconds(metrics['command_latency_p50'])}, "
+          f"p95 {format_seconds(metrics['command_latency_p95'])} over {metrics['command_count']} command(s), "
+          f"completion time {format_seconds(metrics['completion_time'])}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute summary metrics of recorded MCAP / rosbag2 bags")
+    parser.add_argument("bags", type=str, nargs="+", help="Bag files (.mcap, .db3) or rosbag2 directories")
+    parser.add_argument("--joint-state-topic", type=str, action="append", dest="joint_state_topics",
+                        help="Joint state topic (repeatable, default: every sensor_msgs/msg/JointState topic)")
+    parser.add_argument("--command-topic", type=str, action="append", dest="command_topics",
+                        help="Command topic whose messages start the latency measurement (repeatable)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_MOTION_TOLERANCE,
+                        help=f"Position change that counts as motion (default: {DEFAULT_MOTION_TOLERANCE})")
+    parser.add_argument("--output", type=str, default=None, help="CSV or JSONL file the metrics are appended to")
+    args = parser.parse_args()
+
+    writer = ResultsWriter(args.output, METRIC_COLUMNS) if args.output else None
+    failed = False
+    for bag in args.bags:
+        try:
+            metrics = analyze_bag(bag, args.joint_state_topics, args.command_topics, args.tolerance)
+        except (OSError, BagError, sqlite3.Error) as e:
+            print(f"Error: could not analyze {bag}: {e}")
+            failed = True
+            continue
+        print_metrics(metrics)
+        if writer is not None:
+            writer.write(metrics)
+    if writer is not None:
+        print(f"Metrics written to {args.output}.")
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
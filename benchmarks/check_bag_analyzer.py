@@ -0,0 +1,232 @@
+"""
+Checks bag_analyzer.py against the fixture bags in bag-fixtures/, whose rates, command latencies
+and completion time are known by construction.
+
+The fixtures hold the same recording as chunked MCAP (uncompressed, zstd and lz4) and as a
+rosbag2 .db3 file. --regenerate writes them again (zstd and lz4 need the zstandard and lz4
+packages); without it, the script analyzes them and exits with code 1 if a metric is off.
+"""
+import argparse
+import os
+import sqlite3
+import struct
+import sys
+import zlib
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, "bag-fixtures")
+sys.path.insert(0, REPO_DIR)
+
+from bag_analyzer import MCAP_MAGIC, BagError, analyze_bag
+
+JOINT_STATE_TOPIC = "/joint/states"
+JOINT_STATE_TYPE = "sensor_msgs/msg/JointState"
+COMMAND_TOPIC = "/joint_trajectory_controller/joint_trajectory"
+COMMAND_TYPE = "trajectory_msgs/msg/JointTrajectory"
+JOINT_NAMES = [f"joint{index}" for index in range(1, 7)]
+
+# The recording: joint states at 20 Hz for 3 seconds and two commands. The joints first move
+# 0.2s after the first command until 1.0s, and 0.3s after the second one until 2.2s.
+START_NS = 1_700_000_000_000_000_000
+PERIOD_NS = 50_000_000
+JOINT_STATE_COUNT = 60
+COMMAND_TIMES_NS = [500_000_000, 1_500_000_000]
+MOTIONS = [(14, 20), (36, 44)]  # (first, last) joint state index at which the joints move
+MESSAGES_PER_CHUNK = 16
+
+# (.mcap chunk compression or None for a .db3 file, fixture name)
+FIXTURES = [
+    ("", "chunked.mcap"),
+    ("zstd", "chunked_zstd.mcap"),
+    ("lz4", "chunked_lz4.mcap"),
+    (None, "recording.db3"),
+]
+
+EXPECTED = {
+    "bag_messages": JOINT_STATE_COUNT + len(COMMAND_TIMES_NS),
+    "duration": 2.95,
+    "joint_state_rate": 20.0,
+    "command_count": 2,
+    "command_latency_p50": 0.2,
+    "command_latency_p95": 0.3,
+    "command_latency_max": 0.3,
+    "completion_time": 1.7,
+}
+# Log times are in nanoseconds, the metrics are floats of seconds
+TOLERANCE = 1e-6
+
+def joint_position(index):
+    """Return the common position of the joints at a joint state index: 0.1 per step of a motion."""
+    position = 0.0
+    for first, last in MOTIONS:
+        position += 0.1 * min(max(index - first + 1, 0), last - first + 1)
+    return position
+
+def cdr_joint_state(stamp_ns, positions):
+    """Serialize a sensor_msgs/msg/JointState (little endian CDR)."""
+    data = bytearray(b"\x00\x01\x00\x00")
+
+    def align(size):
+        data.extend(b"\x00" * (-(len(data) - 4) % size))
+
+    def uint32(value):
+        align(4)
+        data.extend(struct.pack("<I", value))
+
+    def string(value):
+        encoded = value.encode('utf-8') + b"\x00"
+        uint32(len(encoded))
+        data.extend(encoded)
+
+    uint32(stamp_ns // 1_000_000_000)
+    uint32(stamp_ns % 1_000_000_000)
+    string("base_link")
+    uint32(len(JOINT_NAMES))
+    for name in JOINT_NAMES:
+        string(name)
+    for values in (positions, (), ()):
+        uint32(len(values))
+        if values:
+            align(8)
+            data.extend(struct.pack(f"<{len(values)}d", *values))
+    return bytes(data)
+
+def fixture_messages():
+    """Return the recording as (topic, type, log time in ns, CDR data), ordered by time."""
+    messages = []
+    for index in range(JOINT_STATE_COUNT):
+        stamp = START_NS + index * PERIOD_NS
+        positions = [joint_position(index) * (joint + 1) for joint in range(len(JOINT_NAMES))]
+        messages.append((JOINT_STATE_TOPIC, JOINT_STATE_TYPE, stamp, cdr_joint_state(stamp, positions)))
+    for command_time in COMMAND_TIMES_NS:
+        messages.append((COMMAND_TOPIC, COMMAND_TYPE, START_NS + command_time, b"\x00\x01\x00\x00"))
+    return sorted(messages, key=lambda message: message[2])
+
+def mcap_record(opcode, content):
+    return struct.pack("<BQ", opcode, len(content)) + content
+
+def mcap_string(value):
+    encoded = value.encode('utf-8')
+    return struct.pack("<I", len(encoded)) + encoded
+
+def compress_chunk(compression, records):
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress(records)
+    if compression == "lz4":
+        import lz4.frame
+        return lz4.frame.compress(records)
+    return records
+
+def write_chunked_mcap(path, messages, compression):
+    """
+    Write messages to an MCAP file the way the rosbag2 MCAP plugin does: schema, channel and
+    message records in chunks, each chunk followed by its message indexes.
+    """
+    schemas = {}
+    channels = {}
+    with open(path, "wb") as f:
+        f.write(MCAP_MAGIC + mcap_record(0x01, mcap_string("ros2") + mcap_string("bag analyzer fixture")))
+        for chunk_start in range(0, len(messages), MESSAGES_PER_CHUNK):
+            chunk = messages[chunk_start:chunk_start + MESSAGES_PER_CHUNK]
+            records = bytearray()
+            indexes = {}
+            for topic, message_type, log_time, data in chunk:
+                if message_type not in schemas:
+                    schemas[message_type] = len(schemas) + 1
+                    records += mcap_record(0x03, struct.pack("<H", schemas[message_type]) + mcap_string(message_type)
+                                           + mcap_string("ros2msg") + struct.pack("<I", 0))
+                if topic not in channels:
+                    channels[topic] = len(channels) + 1
+                    records += mcap_record(0x04, struct.pack("<HH", channels[topic], schemas[message_type])
+                                           + mcap_string(topic) + mcap_string("cdr") + struct.pack("<I", 0))
+                indexes.setdefault(channels[topic], []).append((log_time, len(records)))
+                records += mcap_record(0x05, struct.pack("<HIQQ", channels[topic], 0, log_time, log_time)
+                                       + data)
+            compressed = compress_chunk(compression, bytes(records))
+            f.write(mcap_record(0x06, struct.pack("<QQQI", chunk[0][2], chunk[-1][2], len(records),
+                                                  zlib.crc32(records))
+                                + mcap_string(compression) + struct.pack("<Q", len(compressed)) + compressed))
+            for channel_id, entries in sorted(indexes.items()):
+                index = b"".join(struct.pack("<QQ", log_time, offset) for log_time, offset in entries)
+                f.write(mcap_record(0x07, struct.pack("<HI", channel_id, len(index)) + index))
+        f.write(mcap_record(0x0F, struct.pack("<I", 0)) + mcap_record(0x02, struct.pack("<QQI", 0, 0, 0)) + MCAP_MAGIC)
+
+def write_sqlite(path, messages):
+    """Write messages to a rosbag2 sqlite3 file."""
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE topics(id INTEGER PRIMARY KEY, name TEXT NOT NULL, type TEXT NOT NULL, "
+                       "serialization_format TEXT NOT NULL, offered_qos_profiles TEXT NOT NULL)")
+    connection.execute("CREATE TABLE messages(id INTEGER PRIMARY KEY, topic_id INTEGER NOT NULL, "
+                       "timestamp INTEGER NOT NULL, data BLOB NOT NULL)")
+    topic_ids = {}
+    for topic, message_type, log_time, data in messages:
+        if topic not in topic_ids:
+            topic_ids[topic] = len(topic_ids) + 1
+            connection.execute("INSERT INTO topics VALUES (?, ?, ?, 'cdr', '')", (topic_ids[topic], topic, message_type))
+        connection.execute("INSERT INTO messages(topic_id, timestamp, data) VALUES (?, ?, ?)",
+                           (topic_ids[topic], log_time, data))
+    connection.commit()
+    connection.close()
+
+def regenerate(fixtures_dir):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    messages = fixture_messages()
+    for compression, name in FIXTURES:
+        path = os.path.join(fixtures_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+        if compression is None:
+            write_sqlite(path, messages)
+        else:
+            write_chunked_mcap(path, messages, compression)
+        print(f"Wrote {path}")
+
+def check_metrics(metrics):
+    """Return the mismatches between the metrics of a fixture and the expected ones."""
+    errors = []
+    for key, expected in EXPECTED.items():
+        value = metrics[key]
+        if value is None or abs(value - expected) > TOLERANCE:
+            errors.append(f"{key} is {value}, expected {expected}")
+    rate = metrics["topic_rates"].get(JOINT_STATE_TOPIC)
+    if rate is None or abs(rate - EXPECTED["joint_state_rate"]) > TOLERANCE:
+        errors.append(f"the rate of {JOINT_STATE_TOPIC} is {rate}, expected {EXPECTED['joint_state_rate']}")
+    return errors
+
+def check(fixtures_dir):
+    """Analyze every fixture and print the mismatches. Returns True if all of them match."""
+    success = True
+    for compression, name in FIXTURES:
+        path = os.path.join(fixtures_dir, name)
+        try:
+            metrics = analyze_bag(path, command_topics=[COMMAND_TOPIC])
+        except BagError as e:
+            # A missing compression package is not a failure of the analyzer
+            if compression and "install" in str(e):
+                print(f"SKIP {name}: {e}")
+                continue
+            print(f"FAIL {name}: {e}")
+            success = False
+            continue
+        errors = check_metrics(metrics)
+        print(f"{'FAIL' if errors else 'OK'} {name}")
+        for error in errors:
+            print(f"    {error}")
+        success = success and not errors
+    return success
+
+def main():
+    parser = argparse.ArgumentParser(description="Check bag_analyzer.py against fixture bags with known metrics")
+    parser.add_argument("--fixtures", type=str, default=FIXTURES_DIR, help="Directory of the fixture bags")
+    parser.add_argument("--regenerate", action="store_true", help="Write the fixture bags before checking them")
+    args = parser.parse_args()
+
+    if args.regenerate:
+        regenerate(args.fixtures)
+    if not check(args.fixtures):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
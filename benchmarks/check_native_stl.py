@@ -0,0 +1,70 @@
+"""
+Round-trip check of the native STL to FBX converter (conversion-tool/native_stl.py).
+
+Every STL file is converted twice into a temporary directory. The two FBX files must be
+identical, and the node tree read back from the FBX must have the vertices and triangles
+of the STL. Exits with code 1 if a file fails.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "conversion-tool"))
+
+from native_stl import check_fbx, convert_stl
+
+DEFAULT_MESH_DIR = os.path.join(REPO_DIR, "robot-descriptions")
+
+def find_stl_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "**", "*.[sS][tT][lL]"), recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+def check_stl(filepath, output_dir):
+    """Convert an STL twice and check the FBX. Returns the number of triangles and a list of mismatches."""
+    first = os.path.join(output_dir, "first.fbx")
+    second = os.path.join(output_dir, "second.fbx")
+    triangles = convert_stl(filepath, first)
+    convert_stl(filepath, second)
+    errors = check_fbx(first, filepath)
+    with open(first, 'rb') as f1, open(second, 'rb') as f2:
+        if f1.read() != f2.read():
+            errors.append("converting the file twice gives different FBX files")
+    return triangles, errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-trip check of the native STL to FBX converter")
+    parser.add_argument("paths", type=str, nargs="*", default=[DEFAULT_MESH_DIR],
+                        help="STL files or directories searched for them (default: robot-descriptions)")
+    args = parser.parse_args()
+
+    files = find_stl_files(args.paths)
+    if not files:
+        print("No STL files found.")
+        sys.exit(1)
+    failed = 0
+    # The meshes are only read; the FBX files go to a temporary directory
+    with tempfile.TemporaryDirectory() as output_dir:
+        for filepath in files:
+            try:
+                triangles, errors = check_stl(filepath, output_dir)
+            except (OSError, ValueError) as e:
+                triangles, errors = 0, [str(e)]
+            print(f"{'FAIL' if errors else 'OK'} {os.path.relpath(filepath)} ({triangles} triangles)")
+            for error in errors:
+                print(f"    {error}")
+            failed += bool(errors)
+    print(f"{len(files) - failed}/{len(files)} STL files round-trip.")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Hermetic benchmarks of the tooling, run against the stand-in executables in stand-ins/.
+
+Every benchmark runs a few rounds and reports min/median/mean/stddev of its metrics. With
+--compare, the medians are checked against a baseline file and the run fails (exit code 1)
+if a metric got worse by more than --max-regression, so CI catches performance regressions.
+"""
+import argparse
+import asyncio
+import contextlib
+import fnmatch
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+STAND_INS_DIR = os.path.join(BENCHMARKS_DIR, "stand-ins")
+sys.path.insert(0, REPO_DIR)
+
+from sim_runner import Scheduler, iter_jobs, run_batch
+from telemetry import ResultsWriter
+
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+DEFAULT_OUTPUT = "benchmark_results.json"
+# A metric may get this much worse than its baseline before the run fails
+DEFAULT_MAX_REGRESSION = 0.3
+
+# Ports of the stand-in bridges, away from the default rosbridge port of a real setup
+BENCHMARK_BASE_PORT = 19090
+MESH_EXTENSIONS = (".dae", ".stl")
+
+# Stand-in behavior during the benchmarks: ready immediately, no extra load
+STAND_IN_ENVIRONMENT = {
+    "STANDIN_SEED": "1",
+    "STANDIN_UE_STARTUP": "0",
+    "STANDIN_UE_RESET": "0",
+    "STANDIN_BRIDGE_STARTUP": "0",
+    "STANDIN_BLENDER_STARTUP": "0",
+}
+
+BENCHMARKS = []
+
+def benchmark(name, metrics, rounds=3, warmup=0, params=None):
+    """
+    Register a benchmark. The function runs one round and returns a value per metric.
+
+    metrics maps each metric to its unit and whether "lower" or "higher" values are better.
+    With params, one benchmark is registered per value, named name[value].
+    """
+    def register(function):
+        for param in params or [None]:
+            BENCHMARKS.append({
+                "name": name if param is None else f"{name}[{param}]",
+                "function": function if param is None else (lambda param=param: function(param)),
+                "metrics": metrics,
+                "rounds": rounds,
+                "warmup": warmup,
+            })
+        return function
+    return register
+
+@contextlib.contextmanager
+def stand_ins(**environment):
+    """Put the stand-in executables first on the PATH and set their behavior for the duration."""
+    changes = dict(STAND_IN_ENVIRONMENT, PATH=STAND_INS_DIR + os.pathsep + os.environ.get("PATH", ""),
+                   **{key: str(value) for key, value in environment.items()})
+    saved = {key: os.environ.get(key) for key in changes}
+    os.environ.update(changes)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+@contextlib.contextmanager
+def work_dir():
+    """Run in a fresh temporary directory, with the tools' console output silenced."""
+    previous = os.getcwd()
+    path = tempfile.mkdtemp(prefix="ros2ue5_bench_")
+    os.chdir(path)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield path
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(path, ignore_errors=True)
+
+def simulation(iterations, max_sim_time=30):
+    with open("scenario.json", 'w') as f:
+        json.dump({"robots": []}, f)
+    open("Benchmark.uproject", 'w').close()
+    return {"name": "benchmark", "iterations": iterations, "ueScenario": "scenario.json", "ros2Pkg": "benchmark",
+            "ros2Launch": "benchmark.launch.py", "timeout": 30, "maxSimTime": max_sim_time}
+
+def run_simulations(iterations, max_parallel=1, reuse_unreal=False, **environment):
+    """Run a batch against the stand-ins and return its wall-clock time and results."""
+    with stand_ins(**environment), work_dir():
+        simulations = [simulation(iterations)]
+        start = time.perf_counter()
+        results = asyncio.run(run_batch(simulations, "Benchmark.uproject", os.path.join(STAND_INS_DIR, "UnrealEditor"),
+                                        max_parallel=max_parallel, base_port=BENCHMARK_BASE_PORT,
+                                        reuse_unreal=reuse_unreal, results_file="results.jsonl"))
+        wall_time = time.perf_counter() - start
+    failed = [result for result in results if result["status"] != "completed"]
+    if failed:
+        raise RuntimeError(f"{len(failed)} iteration(s) did not complete against the stand-ins")
+    return wall_time, results
+
+@benchmark("runner_overhead", {"seconds_per_iteration": ("s", "lower")}, params=["cold", "warm"])
+def runner_overhead(start):
+    """Time per iteration of sim_runner when Unreal Engine and the ROS2 launch take no time at all."""
+    iterations = 8
+    wall_time, _ = run_simulations(iterations, reuse_unreal=start == "warm", STANDIN_ROS2_RUNTIME=0)
+    return {"seconds_per_iteration": wall_time / iterations}
+
+@benchmark("scheduler_scaling", {"iterations_per_second": ("1/s", "higher")}, rounds=2, params=[1, 2, 4, 8])
+def scheduler_scaling(slots):
+    """Throughput of iterations that run for half a second, with 1 to 8 parallel slots."""
+    iterations = 2 * slots + 2
+    wall_time, _ = run_simulations(iterations, max_parallel=slots, STANDIN_ROS2_RUNTIME=0.5)
+    return {"iterations_per_second": iterations / wall_time}
+
+@benchmark("scheduler_dispatch", {"microseconds_per_job": ("us", "lower")}, rounds=5, warmup=1)
+def scheduler_dispatch():
+    """Bookkeeping cost of handing out, reporting and writing the result of one job."""
+    jobs = 20000
+    with work_dir():
+        writer = ResultsWriter("results.jsonl")
+        scheduler = Scheduler(iter_jobs([{"name": "dispatch", "iterations": jobs}]), 0, writer,
+                              {"batch": "benchmark", "ue_project": "Benchmark.uproject", "unreal_exec": None})
+        result = {"status": "completed", "startup_latency": 0.1, "start": "cold", "t_ros2_start": 1.0,
+                  "t_sim_end": 2.0, "t_stopped": 2.5}
+
+        async def dispatch():
+            while (job := await scheduler.next_job()) is not None:
+                scheduler.report(job, dict(result), 1.0)
+
+        start = time.perf_counter()
+        asyncio.run(dispatch())
+        return {"microseconds_per_job": (time.perf_counter() - start) / jobs * 1e6}
+
+def copy_robot_descriptions(target):
+    """Copy the shipped robot descriptions without their converted meshes and return a config using them."""
+    source = os.path.join(REPO_DIR, "robot-descriptions")
+    shutil.copytree(source, os.path.join(target, "robot-descriptions"), ignore=shutil.ignore_patterns("*.fbx"))
+    robots = [os.path.join(target, "robot-descriptions", "panda_description", "panda.urdf"),
+              os.path.join(target, "robot-descriptions", "universal-robot-ur5", "model.sdf")]
+    config_file = os.path.join(target, "config.json")
+    with open(config_file, 'w') as f:
+        json.dump({"robots": [{"robot": robot, "position": [0, 0, 0]} for robot in robots]}, f)
+    return config_file
+
+def convert(config_file, *args):
+    command = [sys.executable, os.path.join(REPO_DIR, "conversion-tool", "read_config_and_convert.py"),
+               "--config", config_file, "--no-cache", *args]
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def source_meshes(path):
+    return [mesh for mesh in glob.glob(os.path.join(path, "robot-descriptions", "**", "*"), recursive=True)
+            if mesh.lower().endswith(MESH_EXTENSIONS)]
+
+@benchmark("conversion_throughput", {"files_per_second": ("1/s", "higher"), "mib_per_second": ("MiB/s", "higher")},
+           params=["auto", "blender"])
+def conversion_throughput(backend):
+    """Full conversion of the shipped robot descriptions with two Blender stand-in servers."""
+    with stand_ins(), work_dir() as path:
+        config_file = copy_robot_descriptions(path)
+        meshes = source_meshes(path)
+        size = sum(os.path.getsize(mesh) for mesh in meshes)
+        start = time.perf_counter()
+        convert(config_file, "--jobs", "2", "--backend", backend)
+        wall_time = time.perf_counter() - start
+        converted = len(glob.glob(os.path.join(path, "robot-descriptions", "**", "*.fbx"), recursive=True))
+    if converted < len(meshes):
+        raise RuntimeError(f"Only {converted} of {len(meshes)} meshes were converted")
+    return {"files_per_second": len(meshes) / wall_time, "mib_per_second": size / 1024 ** 2 / wall_time}
+
+@benchmark("conversion_up_to_date", {"seconds": ("s", "lower")})
+def conversion_up_to_date():
+    """Run of the converter when every mesh is up to date: only the manifest is checked."""
+    with stand_ins(), work_dir() as path:
+        config_file = copy_robot_descriptions(path)
+        convert(config_file)
+        start = time.perf_counter()
+        convert(config_file)
+        return {"seconds": time.perf_counter() - start}
+
+def summarize(values):
+    return {
+        "min": min(values),
+        "max": max(values),
+        "median": statistics.median(values),
+        "mean": statistics.mean(values),
+        "stddev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "rounds": len(values),
+    }
+
+def run_benchmark(entry, rounds=None):
+    """Run the warmup and measured rounds of a benchmark and return the statistics of its metrics."""
+    for _ in range(entry["warmup"]):
+        entry["function"]()
+    measurements = {metric: [] for metric in entry["metrics"]}
+    for _ in range(rounds or entry["rounds"]):
+        for metric, value in entry["function"]().items():
+            measurements[metric].append(value)
+    stats = {}
+    for metric, values in measurements.items():
+        unit, better = entry["metrics"][metric]
+        stats[metric] = dict(summarize(values), unit=unit, better=better)
+    return stats
+
+def compare(results, baseline, max_regression):
+    """Return the regressions of results against baseline as (benchmark, metric, baseline, current, change)."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, stats in metrics.items():
+            reference = baseline.get(name, {}).get(metric)
+            if not reference or not reference["median"]:
+                continue
+            change = stats["median"] / reference["median"] - 1
+            worse = change if stats["better"] == "lower" else -change
+            if worse > max_regression:
+                regressions.append((name, metric, reference["median"], stats["median"], change))
+    return regressions
+
+def machine_info():
+    return {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()}
+
+def print_results(results, baseline):
+    print(f"\n{'benchmark':<38} {'metric':<22} {'min':>10} {'median':>10} {'mean':>10} {'stddev':>9} {'baseline':>10} {'change':>8}")
+    for name, metrics in results.items():
+        for metric, stats in metrics.items():
+            reference = baseline.get(name, {}).get(metric)
+            reference_median = f"{reference['median']:.4g}" if reference else ""
+            change = f"{stats['median'] / reference['median'] - 1:+.1%}" if reference and reference["median"] else ""
+            print(f"{name:<38} {metric:<22} {stats['min']:>10.4g} {stats['median']:>10.4g} {stats['mean']:>10.4g} "
+                  f"{stats['stddev']:>9.3g} {reference_median:>10} {change:>8}")
+
+def load_baseline(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the hermetic benchmarks of the tooling against stand-in executables")
+    parser.add_argument("-k", "--filter", type=str, default=None,
+                        help="Only run benchmarks whose name matches this pattern, e.g. 'conversion*'")
+    parser.add_argument("--rounds", type=int, default=None, help="Rounds per benchmark (default: per benchmark)")
+    parser.add_argument("--output", type=str, default=DEFAULT_OUTPUT,
+                        help=f"File the results are written to (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="BASELINE",
+                        help="Fail if a metric regressed against the baseline file "
+                             f"(default: {os.path.relpath(DEFAULT_BASELINE)})")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="BASELINE",
+                        help="Write the results as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help=f"Allowed relative regression of a median (default: {DEFAULT_MAX_REGRESSION})")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    args = parser.parse_args()
+
+    selected = [entry for entry in BENCHMARKS if not args.filter or fnmatch.fnmatch(entry["name"], args.filter)
+                or args.filter in entry["name"]]
+    if args.list:
+        for entry in selected:
+            print(entry["name"])
+        return
+
+    baseline_file = load_baseline(args.compare) if args.compare else None
+    if args.compare and baseline_file is None:
+        print(f"Baseline {args.compare} not found; run with --save-baseline first.")
+        sys.exit(1)
+    baseline = baseline_file["benchmarks"] if baseline_file else {}
+
+    results = {}
+    for entry in selected:
+        print(f"Running {entry['name']}...", flush=True)
+        start = time.perf_counter()
+        results[entry["name"]] = run_benchmark(entry, args.rounds)
+        print(f"  done in {time.perf_counter() - start:.1f}s", flush=True)
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "machine": machine_info(), "benchmarks": results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_results(results, baseline)
+    print(f"\nResults written to {args.output}.")
+
+    if args.save_baseline:
+        previous = load_baseline(args.save_baseline) or {"benchmarks": {}}
+        # Benchmarks that were filtered out keep their previous baseline
+        report["benchmarks"] = dict(previous["benchmarks"], **results)
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}.")
+
+    if baseline_file is not None:
+        if baseline_file.get("machine") != report["machine"]:
+            print(f"Note: the baseline was measured on a different machine ({baseline_file.get('machine')}).")
+        regressions = compare(results, baseline, args.max_regression)
+        for name, metric, reference, current, change in regressions:
+            print(f"REGRESSION: {name} {metric} {reference:.4g} -> {current:.4g} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.max_regression:.0%}.")
+
+if __name__ == "__main__":
+    main()
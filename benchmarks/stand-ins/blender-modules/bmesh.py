@@ -0,0 +1,42 @@
+"""Stand-in for Blender's bmesh module, covering the convex hulls of convert_to_fbx.py."""
+
+# Triangles of a convex hull, whatever the size of the source mesh
+HULL_TRIANGLES = 60
+
+class BMVert:
+    pass
+
+class BMesh:
+    def __init__(self):
+        self.triangles = 0
+        self.verts = []
+        self.faces = []
+
+    def from_mesh(self, mesh):
+        self.triangles = mesh.triangles
+
+    def to_mesh(self, mesh):
+        mesh.triangles = self.triangles
+
+    def free(self):
+        pass
+
+def new():
+    return BMesh()
+
+def convex_hull(bm, input=None):
+    bm.triangles = min(bm.triangles, HULL_TRIANGLES)
+    return {"geom": [], "geom_interior": [], "geom_unused": [], "geom_holes": []}
+
+def delete(bm, geom=None, context='VERTS'):
+    pass
+
+def triangulate(bm, faces=None):
+    return {"faces": []}
+
+class Namespace:
+    def __init__(self, **members):
+        self.__dict__.update(members)
+
+ops = Namespace(convex_hull=convex_hull, delete=delete, triangulate=triangulate)
+types = Namespace(BMVert=BMVert)
@@ -0,0 +1,188 @@
+"""
+Stand-in for Blender's Python API, covering what convert_to_fbx.py uses.
+
+Imports read the real mesh files (STL triangles, COLLADA geometries) and take time in
+proportion to their triangle count (STANDIN_BLENDER_TRIANGLE_RATE triangles per second).
+Exports write an FBX header followed by placeholder geometry of the exported size.
+Each import crashes Blender with STANDIN_BLENDER_CRASH_PROBABILITY.
+"""
+import os
+import re
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from standin import Behavior, env_float
+
+FBX_HEADER = b"Kaydara FBX Binary  \x00\x1a\x00" + struct.pack("<I", 7400)
+# Bytes of an exported triangle: three float32 vertex positions
+TRIANGLE_SIZE = 36
+
+behavior = Behavior("STANDIN_BLENDER")
+triangle_rate = env_float("STANDIN_BLENDER_TRIANGLE_RATE", 5_000_000.0)
+
+class Polygons:
+    """The triangles of a mesh, without materializing them."""
+    TRIANGLE = type("Polygon", (), {"vertices": (0, 1, 2)})()
+
+    def __init__(self, count):
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return (self.TRIANGLE for _ in range(self.count))
+
+class Mesh:
+    def __init__(self, name, triangles=0):
+        self.name = name
+        self.triangles = triangles
+
+    @property
+    def polygons(self):
+        return Polygons(self.triangles)
+
+class Modifier:
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+        self.ratio = 1.0
+
+class Modifiers(list):
+    def new(self, name, type):
+        modifier = Modifier(name, type)
+        self.append(modifier)
+        return modifier
+
+class Matrix(list):
+    def copy(self):
+        return Matrix(self)
+
+class Object:
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+        self.type = 'MESH'
+        self.modifiers = Modifiers()
+        self.matrix_world = Matrix([1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1])
+        self.selected = False
+
+    def __repr__(self):
+        return f"<bpy_struct, Object(\"{self.name}\")>"
+
+    def select_set(self, state):
+        self.selected = state
+
+    def evaluated_triangles(self):
+        triangles = self.data.triangles
+        for modifier in self.modifiers:
+            if modifier.type == 'DECIMATE':
+                triangles = int(triangles * modifier.ratio)
+        return triangles
+
+    def evaluated_get(self, depsgraph):
+        return EvaluatedObject(self)
+
+class EvaluatedObject:
+    def __init__(self, obj):
+        self.obj = obj
+
+    def to_mesh(self):
+        return Mesh(self.obj.name, self.obj.evaluated_triangles())
+
+    def to_mesh_clear(self):
+        pass
+
+class SceneObjects(list):
+    def link(self, obj):
+        self.append(obj)
+
+class Collection:
+    def __init__(self, objects):
+        self.objects = objects
+
+class Scene:
+    def __init__(self):
+        self.objects = SceneObjects()
+        self.collection = Collection(self.objects)
+
+class Namespace:
+    def __init__(self, **members):
+        self.__dict__.update(members)
+
+def stl_triangles(filepath):
+    """Return the triangle count of a binary or ASCII STL file."""
+    size = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        header = f.read(84)
+        if len(header) == 84:
+            count, = struct.unpack_from("<I", header, 80)
+            if 84 + count * 50 == size:
+                return count
+        f.seek(0)
+        return f.read().count(b"facet normal")
+
+def collada_geometries(filepath):
+    """Return (name, triangle count) of the geometries of a COLLADA file."""
+    with open(filepath, "rb") as f:
+        text = f.read().decode('utf-8', errors='replace')
+    if "<COLLADA" not in text:
+        raise RuntimeError(f"{filepath} is not a COLLADA file")
+    geometries = []
+    for match in re.finditer(r'<geometry([^>]*)>(.*?)</geometry>', text, re.S):
+        name = re.search(r'name="([^"]*)"', match.group(1))
+        triangles = sum(int(count) for count in re.findall(r'<(?:triangles|polylist)[^>]*count="(\d+)"', match.group(2)))
+        geometries.append((name.group(1) if name else f"geometry{len(geometries)}", triangles))
+    return geometries
+
+def import_objects(filepath, geometries):
+    if not os.path.isfile(filepath):
+        raise RuntimeError(f"Cannot read file '{filepath}'")
+    if behavior.should_crash(os.path.abspath(filepath)):
+        behavior.crash(f"Error: EXCEPTION_ACCESS_VIOLATION while importing {filepath}")
+    # Importing dominates Blender's conversion time
+    behavior.work(sum(triangles for _, triangles in geometries) / triangle_rate)
+    for name, triangles in geometries:
+        context.scene.objects.append(Object(name, Mesh(name, triangles)))
+
+def stl_import(filepath, **settings):
+    import_objects(filepath, [(os.path.splitext(os.path.basename(filepath))[0], stl_triangles(filepath))])
+
+def collada_import(filepath, **settings):
+    import_objects(filepath, collada_geometries(filepath))
+
+def fbx_export(filepath, use_mesh_modifiers=False, **settings):
+    objects = [obj for obj in context.scene.objects if obj.type == 'MESH']
+    triangles = sum(obj.evaluated_triangles() if use_mesh_modifiers else obj.data.triangles for obj in objects)
+    with open(filepath, "wb") as f:
+        f.write(FBX_HEADER + struct.pack("<II", len(objects), triangles))
+        f.write(bytes(triangles * TRIANGLE_SIZE))
+
+def read_factory_settings(use_empty=False):
+    context.scene.objects.clear()
+
+def select_all(action='SELECT'):
+    for obj in context.scene.objects:
+        obj.selected = action != 'DESELECT'
+
+def delete():
+    context.scene.objects[:] = [obj for obj in context.scene.objects if not obj.selected]
+
+context = Namespace(
+    scene=Scene(),
+    view_layer=Namespace(update=lambda: None),
+    evaluated_depsgraph_get=lambda: None,
+)
+data = Namespace(
+    meshes=Namespace(new=lambda name: Mesh(name)),
+    objects=Namespace(new=lambda name, mesh: Object(name, mesh)),
+)
+ops = Namespace(
+    wm=Namespace(read_factory_settings=read_factory_settings, stl_import=stl_import, collada_import=collada_import),
+    # Blender 4 imports STL files with wm.stl_import only
+    import_mesh=Namespace(),
+    export_scene=Namespace(fbx=fbx_export),
+    object=Namespace(select_all=select_all, delete=delete),
+)
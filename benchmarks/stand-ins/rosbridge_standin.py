@@ -0,0 +1,174 @@
+"""
+Stand-in for a rosbridge websocket server, speaking the rosbridge v2 protocol without ROS.
+
+Published messages are forwarded to every subscriber of their topic, so clients can measure
+the round trip through the bridge. Subscriptions with "png" or "cbor" compression receive
+their messages packed like rosbridge packs them. /rosapi/topics lists the advertised and subscribed topics,
+and the ROS2UE5 reset service is answered like the Unreal Engine plugin would: by creating
+the requested ready file once the scenario was "reset" (after STANDIN_UE_RESET seconds).
+Config changes pushed to the apply service are accepted.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from rosbridge_client import OPCODE_BINARY, OPCODE_CLOSE, OPCODE_PING, OPCODE_PONG, OPCODE_TEXT, apply_mask
+from rosbridge_codec import cbor_dumps, encode_png
+from standin import env_float
+
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+RESET_SERVICE_SUFFIX = "reset_scenario"
+APPLY_SERVICE_SUFFIX = "apply_config"
+
+def encode_frame(opcode, payload):
+    """Encode a single unmasked websocket frame (servers do not mask their frames)."""
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header += bytes([length])
+    elif length < 1 << 16:
+        header += bytes([126]) + struct.pack("!H", length)
+    else:
+        header += bytes([127]) + struct.pack("!Q", length)
+    return header + payload
+
+async def read_frame(reader):
+    """Return (fin, opcode, payload) of the next frame from a client."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = apply_mask(payload, mask)
+    return bool(first & 0x80), first & 0x0F, payload
+
+class Connection:
+    def __init__(self, writer):
+        self.writer = writer
+        # Topic -> compression ("none", "png" or "cbor")
+        self.subscriptions = {}
+
+    def send(self, message, compression="none"):
+        if compression == "cbor":
+            self.writer.write(encode_frame(OPCODE_BINARY, cbor_dumps(message)))
+            return
+        if compression == "png":
+            message = {"op": "png", "data": encode_png(json.dumps(message))}
+        self.writer.write(encode_frame(OPCODE_TEXT, json.dumps(message).encode('utf-8')))
+
+class RosbridgeStandin:
+    """Rosbridge v2 protocol server that echoes publications to subscribers."""
+
+    def __init__(self, reset_time=None):
+        self.connections = set()
+        self.topics = {}
+        self.reset_time = env_float("STANDIN_UE_RESET", 0.5) if reset_time is None else reset_time
+        self.published = 0
+
+    async def handshake(self, reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        key = None
+        for line in request.decode('latin-1').split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "sec-websocket-key":
+                key = value.strip().encode('ascii')
+        if key is None:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return False
+        accept = base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID).digest()).decode('ascii')
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode('ascii'))
+        return True
+
+    async def handle(self, reader, writer):
+        connection = Connection(writer)
+        try:
+            if not await self.handshake(reader, writer):
+                return
+            self.connections.add(connection)
+            message = b""
+            while True:
+                fin, opcode, payload = await read_frame(reader)
+                if opcode == OPCODE_PING:
+                    writer.write(encode_frame(OPCODE_PONG, payload))
+                elif opcode == OPCODE_CLOSE:
+                    writer.write(encode_frame(OPCODE_CLOSE, b""))
+                    break
+                elif opcode != OPCODE_PONG:
+                    message += payload
+                    if fin:
+                        self.dispatch(connection, json.loads(message))
+                        message = b""
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.connections.discard(connection)
+            writer.close()
+
+    def dispatch(self, connection, message):
+        op = message.get("op")
+        topic = message.get("topic")
+        if op == "advertise":
+            self.topics[topic] = message.get("type", "")
+        elif op == "subscribe":
+            connection.subscriptions[topic] = message.get("compression") or "none"
+            self.topics.setdefault(topic, message.get("type", ""))
+        elif op == "unsubscribe":
+            connection.subscriptions.pop(topic, None)
+        elif op == "publish":
+            self.published += 1
+            echo = {"op": "publish", "topic": topic, "msg": message.get("msg", {})}
+            for subscriber in self.connections:
+                if topic in subscriber.subscriptions:
+                    subscriber.send(echo, subscriber.subscriptions[topic])
+        elif op == "call_service":
+            self.call_service(connection, message)
+
+    def call_service(self, connection, message):
+        service = message.get("service", "")
+        response = {"op": "service_response", "id": message.get("id"), "service": service, "result": True}
+        if service == "/rosapi/topics":
+            response["values"] = {"topics": list(self.topics), "types": list(self.topics.values())}
+        elif service.endswith(RESET_SERVICE_SUFFIX):
+            ready_file = message.get("args", {}).get("ready_file")
+            if ready_file:
+                asyncio.get_running_loop().call_later(self.reset_time, lambda: open(ready_file, 'w').close())
+            response["values"] = {}
+        elif service.endswith(APPLY_SERVICE_SUFFIX):
+            changes = json.loads(message.get("args", {}).get("delta", "[]"))
+            print(f"Applied {len(changes)} config change(s)", flush=True)
+            response["values"] = {"success": True, "message": ""}
+        else:
+            response.update(result=False, values=f"Service {service} does not exist")
+        connection.send(response)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Rosbridge WebSocket server started on port {port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Rosbridge protocol stand-in that echoes publications")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=9090, help="Port to listen on (default: 9090)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(RosbridgeStandin().serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Shared behavior of the stand-in executables (UnrealEditor, ros2, blender).
+
+Each stand-in reads its behavior from environment variables with its own prefix, e.g.
+STANDIN_UE_STARTUP=2 or STANDIN_BLENDER_CRASH_PROBABILITY=0.1:
+
+    <PREFIX>_STARTUP            seconds until the tool is ready
+    <PREFIX>_RUNTIME            seconds the tool runs before it exits on its own
+    <PREFIX>_CRASH_PROBABILITY  probability of a crash per run (per mesh for blender)
+    <PREFIX>_CRASH_EXIT         exit code of a crash (default: 134, like an abort)
+    <PREFIX>_LOG_RATE           log lines per second while running
+    <PREFIX>_CPU                busy fraction of one core while running (0 to 1)
+    <PREFIX>_MEMORY             MiB to allocate and keep resident while running
+    STANDIN_SEED                seed for the crash decisions, for reproducible runs
+"""
+import os
+import random
+import signal
+import sys
+import threading
+import time
+
+PAGE_SIZE = 4096
+# Granularity of the CPU load: busy for cpu * LOAD_PERIOD, then idle for the rest
+LOAD_PERIOD = 0.01
+
+def env_float(name, default):
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Ignoring invalid {name}={value!r}", file=sys.stderr)
+        return default
+
+class Behavior:
+    """Timing, load, log output and crashes of one stand-in process, configured from the environment."""
+
+    def __init__(self, prefix, startup=0.0, runtime=None, crash_probability=0.0, log_rate=0.0):
+        self.prefix = prefix
+        self.startup = env_float(f"{prefix}_STARTUP", startup)
+        # None runs until the process is stopped
+        self.runtime = env_float(f"{prefix}_RUNTIME", runtime)
+        self.crash_probability = env_float(f"{prefix}_CRASH_PROBABILITY", crash_probability)
+        self.crash_exit = int(env_float(f"{prefix}_CRASH_EXIT", 134))
+        self.log_rate = env_float(f"{prefix}_LOG_RATE", log_rate)
+        self.cpu = min(1.0, max(0.0, env_float(f"{prefix}_CPU", 0.0)))
+        self.memory = int(env_float(f"{prefix}_MEMORY", 0.0) * 1024 * 1024)
+        self.seed = os.environ.get("STANDIN_SEED")
+        # Every process of a seeded run decides differently, but reproducibly
+        self.random = random.Random(f"{self.seed}:{prefix}:{sys.argv[1:]}" if self.seed else None)
+        self.stopping = threading.Event()
+        self.ballast = None
+
+    def should_crash(self, key=None):
+        """Decide whether to crash. In seeded runs, the decision for a key (e.g. a file) is always the same."""
+        if key is not None and self.seed:
+            return random.Random(f"{self.seed}:{self.prefix}:{key}").random() < self.crash_probability
+        return self.random.random() < self.crash_probability
+
+    def crash(self, message):
+        print(message() if callable(message) else message, flush=True)
+        os._exit(self.crash_exit)
+
+    def handle_signals(self):
+        """Stop gracefully on SIGINT and SIGTERM, like the real tools do."""
+        def stop(signum, frame):
+            self.stopping.set()
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+    def start_load(self):
+        """Allocate the configured memory and start burning the configured CPU fraction."""
+        if self.memory:
+            self.ballast = bytearray(self.memory)
+            # Touch every page so the memory is actually resident
+            for offset in range(0, self.memory, PAGE_SIZE):
+                self.ballast[offset] = 1
+        if self.cpu:
+            threading.Thread(target=self.burn, daemon=True).start()
+
+    def burn(self):
+        busy = self.cpu * LOAD_PERIOD
+        while not self.stopping.is_set():
+            end = time.perf_counter() + busy
+            while time.perf_counter() < end:
+                pass
+            time.sleep(LOAD_PERIOD - busy)
+
+    def work(self, seconds):
+        """Keep one core busy for seconds, like a tool doing real work."""
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+
+    def run(self, seconds, log_line=None, crash_message=None):
+        """
+        Run for seconds (None: until stopped), printing log_line(n) at the log rate.
+
+        With the crash probability, the process crashes at a random point of the run instead,
+        printing crash_message (a string, or a function returning it).
+        Returns False if the process was stopped before the time was up.
+        """
+        start = time.monotonic()
+        crash_at = None
+        if crash_message is not None and self.should_crash():
+            crash_at = self.random.uniform(0, seconds if seconds is not None else 10.0)
+        interval = 1.0 / self.log_rate if self.log_rate > 0 and log_line else None
+        line = 0
+        while True:
+            elapsed = time.monotonic() - start
+            if crash_at is not None and elapsed >= crash_at:
+                self.crash(crash_message)
+            if seconds is not None and elapsed >= seconds:
+                return True
+            wakeups = [0.1]
+            if seconds is not None:
+                wakeups.append(seconds - elapsed)
+            if crash_at is not None:
+                wakeups.append(crash_at - elapsed)
+            if interval is not None:
+                next_line = (line + 1) * interval
+                if elapsed >= next_line:
+                    line += 1
+                    print(log_line(line), flush=True)
+                    continue
+                wakeups.append(next_line - elapsed)
+            if self.stopping.wait(max(0.0, min(wakeups))):
+                return False
@@ -1,4 +1,11 @@
 import json
+import os
+import sys
+
+# The config schema lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_schema import print_errors, validate_scenario_config
 
 def ask_with_default(prompt, default=None, allowed=None):
     """Helper function to ask for input with a default value and optional allowed values."""
@@ -15,6 +22,18 @@ def ask_with_default(prompt, default=None, allowed=None):
         return ask_with_default(prompt, default, allowed)
     return response
 
+def ask_positive_int(prompt, default):
+    """Ask the user for a positive integer, asking again until the input is valid."""
+    response = ask_with_default(prompt, default=default)
+    try:
+        value = int(response)
+    except ValueError:
+        value = None
+    if value is None or value < 1:
+        print("Invalid input. Please enter a positive integer.")
+        return ask_positive_int(prompt, default)
+    return value
+
 def ask_position():
     """Ask the user for a robot position and parse it as a list."""
     response = input("Enter the robot position (format: [x, y, z], default: [0, 0, 0]): ")
@@ -31,6 +50,66 @@ def ask_position():
         print("Invalid format. Please enter in the format [x, y, z].")
         return ask_position()
 
+def ask_lod():
+    """Ask the user for optional LOD and convex collision settings of a robot."""
+    add_lod = input("Generate LODs and convex collision meshes? (y/n, default: n): ").lower()
+    if add_lod != 'y':
+        return None
+
+    response = input("Enter the LOD triangle budgets (format: [5000, 1000], default: [5000, 1000, 250]): ")
+    try:
+        triangles = json.loads(response) if response else [5000, 1000, 250]
+    except json.JSONDecodeError:
+        triangles = None
+    if not isinstance(triangles, list) or not all(isinstance(i, int) and i > 0 for i in triangles):
+        print("Invalid format. Please enter a list of positive integers.")
+        return ask_lod()
+
+    convex_collision = (input("Generate convex collision meshes? (y/n, default: y): ").lower() or 'y') == 'y'
+    lod = {"triangles": triangles, "convexCollision": convex_collision}
+    if convex_collision:
+        lod["collisionTriangles"] = ask_positive_int("Max triangles per collision hull", default="250")
+    return lod
+
+def ask_fleet():
+    """Ask the user whether the robot is a fleet and gather its layout."""
+    add_fleet = input("Spawn a fleet of this robot? (y/n, default: n): ").lower()
+    if add_fleet != 'y':
+        return None
+
+    layout = ask_with_default("Fleet layout", default="grid", allowed=["grid", "positions"])
+    if layout == "positions":
+        response = input("Enter the instance positions (format: [[x, y, z], [x, y, z]]): ")
+        try:
+            positions = json.loads(response)
+        except json.JSONDecodeError:
+            positions = None
+        if (not isinstance(positions, list) or not positions
+                or not all(isinstance(p, list) and len(p) == 3 and all(isinstance(i, (int, float)) for i in p)
+                           for p in positions)):
+            print("Invalid format. Please enter a list of [x, y, z] positions.")
+            return ask_fleet()
+        fleet = {"positions": positions}
+    else:
+        try:
+            count = int(ask_with_default("Number of robots", default="4"))
+            spacing = json.loads(ask_with_default("Grid spacing (format: [x, y])", default="[2, 2]"))
+            columns = int(ask_with_default("Grid columns (0: square grid)", default="0"))
+        except (ValueError, json.JSONDecodeError):
+            count = spacing = columns = None
+        if (not count or count < 1 or columns is None or columns < 0 or not isinstance(spacing, list)
+                or len(spacing) != 2 or not all(isinstance(i, (int, float)) for i in spacing)):
+            print("Invalid fleet settings. Please enter a positive count, two spacings and a column count.")
+            return ask_fleet()
+        fleet = {"count": count, "grid": {"spacing": spacing}}
+        if columns:
+            fleet["grid"]["columns"] = columns
+
+    namespace = ask_with_default("Topic namespace of each robot", default="/{name}_{index}")
+    if namespace != "/{name}_{index}":
+        fleet["namespace"] = namespace
+    return fleet
+
 def ask_add_robot():
     """Ask if the user wants to add a robot and gather its details."""
     robots = []
@@ -60,6 +139,12 @@ def ask_add_robot():
                 "subscribers": subscribers,
                 "controllers": controllers
             }
+            lod = ask_lod()
+            if lod:
+                robot["lod"] = lod
+            fleet = ask_fleet()
+            if fleet:
+                robot["fleet"] = fleet
             robots.append(robot)
         else:
             break
@@ -94,7 +179,7 @@ def create_config():
         }
     }
 
-    unreal_project = get_user_input("Enter the full path to your Unreal project (.uproject file)")
+    unreal_project = ask_with_default("Enter the full path to your Unreal project (.uproject file)")
 
 
     # Combine everything into the final config
@@ -112,5 +197,8 @@ def create_config():
 
     print("Configuration file 'config.json' has been created!")
 
+    # Report problems right away, e.g. robot files or meshes that do not exist
+    print_errors(validate_scenario_config(config, "config.json"))
+
 if __name__ == "__main__":
     create_config()
@@ -0,0 +1,243 @@
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import os
+import random
+
+# Parameter that replicates the robots of the base scenario
+ROBOT_COUNT_PARAMETER = "robots.count"
+
+DEFAULT_OUTPUT_DIR = "sweep_scenarios"
+DEFAULT_ROBOT_SPACING = [2, 0, 0]
+
+# Settings of the generated simulations, unless the spec's "simulation" section overrides them
+SIMULATION_DEFAULTS = {
+    "name": "Sweep",
+    "iterations": 1,
+    "ros2Launch": "pick_place_demo.launch.py",
+    "ros2Pkg": "moveit2_tutorials",
+    "timeout": 3,
+    "maxSimTime": 10,
+}
+
+def load_spec(spec_file):
+    """Read a sweep spec from a JSON file."""
+    with open(spec_file, 'r') as f:
+        return json.load(f)
+
+def expand_values(values):
+    """
+    Return the values of a cartesian parameter.
+
+    Values are either a list or a range {"min": ..., "max": ..., "step": ...}, which is
+    expanded lazily.
+    """
+    if isinstance(values, list):
+        return values
+    if isinstance(values, dict) and "step" in values:
+        start, stop, step = values["min"], values["max"], values["step"]
+        count = int(round((stop - start) / step)) + 1
+        if all(isinstance(value, int) for value in (start, stop, step)):
+            return range(start, stop + 1, step)
+        return (round(start + index * step, 10) for index in range(count))
+    raise ValueError(f"Cartesian sweeps need a list or a range with a step, got {values!r}")
+
+def sample_value(values, rng):
+    """Draw one value of a random parameter: from a list, or uniformly from a {"min", "max"} range."""
+    if isinstance(values, list):
+        return rng.choice(values)
+    if isinstance(values, dict):
+        start, stop = values["min"], values["max"]
+        if "step" in values:
+            steps = int(round((stop - start) / values["step"]))
+            return round(start + rng.randint(0, steps) * values["step"], 10)
+        if isinstance(start, int) and isinstance(stop, int):
+            return rng.randint(start, stop)
+        return rng.uniform(start, stop)
+    raise ValueError(f"Random sweeps need a list or a range, got {values!r}")
+
+def iter_combinations(sweep):
+    """Lazily yield one {parameter: value} dict per combination of the sweep's parameters."""
+    parameters = sweep.get("parameters", {})
+    names = list(parameters)
+    mode = sweep.get("mode", "cartesian")
+
+    if mode == "cartesian":
+        # itertools.product consumes its inputs up front, so nest the value generators instead
+        def expand(index):
+            if index == len(names):
+                yield {}
+                return
+            for value in expand_values(parameters[names[index]]):
+                for rest in expand(index + 1):
+                    yield {names[index]: value, **rest}
+        yield from expand(0)
+    elif mode == "random":
+        rng = random.Random(sweep.get("seed"))
+        for _ in range(sweep.get("samples", 10)):
+            yield {name: sample_value(parameters[name], rng) for name in names}
+    else:
+        raise ValueError(f"Unknown sweep mode '{mode}' (allowed: cartesian, random)")
+
+def set_path(data, path, value):
+    """Set a dotted path like "environment.weather" or "robots.0.position" in data; "*" matches every list entry."""
+    keys = path.split(".")
+    targets = [data]
+    for key in keys[:-1]:
+        next_targets = []
+        for target in targets:
+            if key == "*":
+                next_targets.extend(target)
+            elif isinstance(target, list):
+                next_targets.append(target[int(key)])
+            else:
+                next_targets.append(target.setdefault(key, {}))
+        targets = next_targets
+
+    last = keys[-1]
+    for target in targets:
+        if isinstance(target, list):
+            indices = range(len(target)) if last == "*" else [int(last)]
+            for index in indices:
+                target[index] = copy.deepcopy(value)
+        else:
+            target[last] = copy.deepcopy(value)
+
+def replicate_robots(robots, count, spacing):
+    """Return count robots cycling through the given ones, each repetition shifted by spacing."""
+    replicated = []
+    for index in range(count):
+        robot = copy.deepcopy(robots[index % len(robots)])
+        shift = index // len(robots)
+        position = robot.get("position", [0, 0, 0])
+        robot["position"] = [coordinate + shift * offset for coordinate, offset in zip(position, spacing)]
+        replicated.append(robot)
+    return replicated
+
+def apply_combination(base, combination, sweep):
+    """Return a copy of the base scenario with the combination's parameters applied."""
+    scenario = copy.deepcopy(base)
+    if ROBOT_COUNT_PARAMETER in combination:
+        if not scenario.get("robots"):
+            raise ValueError(f"'{ROBOT_COUNT_PARAMETER}' needs at least one robot in the base scenario")
+        scenario["robots"] = replicate_robots(scenario["robots"], int(combination[ROBOT_COUNT_PARAMETER]),
+                                              sweep.get("robotSpacing", DEFAULT_ROBOT_SPACING))
+    for path, value in combination.items():
+        if path != ROBOT_COUNT_PARAMETER:
+            set_path(scenario, path, value)
+    return scenario
+
+def scenario_hash(scenario):
+    """Return a hash identifying the content of a scenario config."""
+    return hashlib.sha256(json.dumps(scenario, sort_keys=True).encode('utf-8')).hexdigest()
+
+def combination_label(combination):
+    """Return a short label like "weather=rainy count=4" for a combination."""
+    parts = []
+    for path, value in combination.items():
+        name = "count" if path == ROBOT_COUNT_PARAMETER else path.split(".")[-1]
+        parts.append(f"{name}={value if isinstance(value, str) else json.dumps(value)}")
+    return " ".join(parts)
+
+def load_base_scenario(sweep, spec_dir="."):
+    """Load the sweep's base scenario, given inline or as a path relative to the spec."""
+    base = sweep.get("baseScenario", {})
+    if isinstance(base, str):
+        with open(os.path.join(spec_dir, base), 'r') as f:
+            return json.load(f)
+    return base
+
+def scenario_output_dir(sweep, spec_dir="."):
+    """Create and return the directory the sweep's scenarios are written to."""
+    output_dir = os.path.join(spec_dir, sweep.get("outputDir", DEFAULT_OUTPUT_DIR))
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+def write_scenario(output_dir, scenario, digest=None):
+    """Write a scenario named by its content hash, unless it exists already. Returns its path."""
+    digest = digest or scenario_hash(scenario)
+    scenario_file = os.path.join(output_dir, f"scenario_{digest[:16]}.json")
+    if not os.path.exists(scenario_file):
+        tmp_file = scenario_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(scenario, f, indent=4)
+        os.replace(tmp_file, scenario_file)
+    return scenario_file
+
+def template_config(spec, spec_dir="."):
+    """
+    Return a simulation config with one simulation standing for all simulations of the sweep,
+    so the spec can be validated before it is expanded.
+    """
+    sweep = spec.get("sweep", {})
+    config = {key: value for key, value in spec.items() if key not in ("sweep", "simulation")}
+    simulation = dict(SIMULATION_DEFAULTS, **spec.get("simulation", {}))
+    if isinstance(sweep.get("baseScenario"), str):
+        simulation["ueScenario"] = os.path.join(spec_dir, sweep["baseScenario"])
+    else:
+        simulation["ueScenario"] = write_scenario(scenario_output_dir(sweep, spec_dir), sweep.get("baseScenario", {}))
+    config["simulations"] = [simulation]
+    return config
+
+def iter_sweep(spec, spec_dir="."):
+    """
+    Lazily expand a sweep spec into simulation entries for the sim runner.
+
+    Every unique scenario is written once to the output directory, named by its content
+    hash, and combinations that produce an identical scenario are skipped. Only the
+    hashes of the scenarios seen so far are kept in memory.
+    """
+    sweep = spec["sweep"]
+    base = load_base_scenario(sweep, spec_dir)
+    output_dir = scenario_output_dir(sweep, spec_dir)
+    simulation = dict(SIMULATION_DEFAULTS, **spec.get("simulation", {}))
+
+    seen = set()
+    for combination in iter_combinations(sweep):
+        scenario = apply_combination(base, combination, sweep)
+        digest = scenario_hash(scenario)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        scenario_file = write_scenario(output_dir, scenario, digest)
+
+        label = combination_label(combination)
+        yield dict(simulation, name=f"{simulation['name']} {label}".strip(), ueScenario=scenario_file)
+
+def write_simulation_config(spec, simulations, output_file):
+    """Stream simulation entries into a simulation config, keeping the spec's runner settings."""
+    settings = {key: value for key, value in spec.items() if key not in ("sweep", "simulation")}
+    count = 0
+    with open(output_file, 'w') as f:
+        # Write the settings without their closing brace, then append the simulations one by one
+        header = json.dumps(settings, indent=4)[:-2] + ",\n" if settings else "{\n"
+        f.write(header + '    "simulations": [')
+        for simulation in simulations:
+            f.write(("," if count else "") + "\n        " + json.dumps(simulation))
+            count += 1
+        f.write("\n    ]\n}\n")
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Expand a sweep spec into scenario configs and a simulation config")
+    parser.add_argument("spec", type=str, help="Path to the sweep spec")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="simulation_config.json",
+        help="Simulation config to write (default: simulation_config.json)"
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many unique scenarios")
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec)
+    simulations = iter_sweep(spec, os.path.dirname(os.path.abspath(args.spec)))
+    if args.limit is not None:
+        simulations = itertools.islice(simulations, args.limit)
+    count = write_simulation_config(spec, simulations, args.output)
+    print(f"JSON configuration file '{args.output}' with {count} simulation(s) created successfully.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import xml.etree.ElementTree as ET
+
+# Mesh references are resolved with the conversion tool's resolver
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+if os.path.join(REPO_DIR, "conversion-tool") not in sys.path:
+    sys.path.insert(0, os.path.join(REPO_DIR, "conversion-tool"))
+
+from robot_bundle import BUNDLE_EXTENSION, validate_bundle
+from robot_description import referenced_mesh_files
+
+DESCRIPTION_EXTENSIONS = ('.sdf', '.urdf')
+
+POSITION = {"type": "array", "items": {"type": "number"}, "minItems": 3, "maxItems": 3}
+
+# Logging settings of config.json; sim_runner.py ships the process output to the same kind of destination
+LOGGING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "enable": {"type": "boolean"},
+        "frequency": {"type": "number", "minimum": 0},
+        "destination": {
+            "type": "object",
+            "properties": {
+                "type": {"enum": ["Seq"]},
+                "endpoint": {"type": "string"},
+                "apiKey": {"type": "string"},
+                "compress": {"type": "boolean"},
+            },
+        },
+    },
+}
+
+# Schema of config.json (the scenario loaded by Unreal Engine)
+SCENARIO_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "environment": {
+            "type": "object",
+            "properties": {
+                "map": {"type": "string"},
+                "weather": {"enum": ["sunny", "cloudy", "rainy", "snow"]},
+                "time": {"enum": ["noon", "night"]},
+            },
+        },
+        "robots": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["robot"],
+                "properties": {
+                    "robot": {"type": "string", "minLength": 1},
+                    "position": POSITION,
+                    "subscribers": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "required": ["type", "topic"],
+                            "properties": {"type": {"type": "string"}, "topic": {"type": "string"}},
+                        },
+                    },
+                    "controllers": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "required": ["type"],
+                            "properties": {"type": {"type": "string"}, "mode": {"type": "string"}},
+                        },
+                    },
+                    "lod": {
+                        "type": "object",
+                        "properties": {
+                            "triangles": {"type": "array", "items": {"type": "integer", "minimum": 1}},
+                            "convexCollision": {"type": "boolean"},
+                            "collisionTriangles": {"type": "integer", "minimum": 1},
+                        },
+                    },
+                    "fleet": {
+                        "type": "object",
+                        "properties": {
+                            "count": {"type": "integer", "minimum": 1},
+                            "positions": {"type": "array", "minItems": 1, "items": POSITION},
+                            "grid": {
+                                "type": "object",
+                                "properties": {
+                                    "origin": POSITION,
+                                    "spacing": {"type": "array", "items": {"type": "number"},
+                                                "minItems": 2, "maxItems": 2},
+                                    "columns": {"type": "integer", "minimum": 1},
+                                },
+                            },
+                            "namespace": {"type": "string"},
+                        },
+                    },
+                },
+            },
+        },
+        "ros": {
+            "type": "object",
+            "properties": {
+                "bridge": {
+                    "type": "object",
+                    "properties": {
+                        "ip": {"type": "string"},
+                        "port": {"type": ["integer", "string"], "pattern": r"^\d+$"},
+                    },
+                },
+            },
+        },
+        "logging": LOGGING_SCHEMA,
+        "unreal_project": {"type": "string"},
+    },
+}
+
+# Bag recording of every iteration: true for the defaults, or the recording settings
+RECORD_SCHEMA = {
+    "type": ["boolean", "object"],
+    "properties": {
+        "topics": {"type": "array", "items": {"type": "string", "minLength": 1}},
+        "jointStateTopics": {"type": "array", "items": {"type": "string", "minLength": 1}},
+        "commandTopics": {"type": "array", "items": {"type": "string", "minLength": 1}},
+        "storage": {"enum": ["mcap", "sqlite3"]},
+        "outputDir": {"type": "string", "minLength": 1},
+        "tolerance": {"type": "number", "minimum": 0},
+    },
+}
+
+# Settings shared by simulation_config.json and the "simulation" template of sweep specs
+SIMULATION_SCHEMA = {
+    "type": "object",
+    "required": ["iterations", "ueScenario", "ros2Launch", "ros2Pkg", "timeout", "maxSimTime"],
+    "properties": {
+        "iterations": {"type": "integer", "minimum": 1},
+        "name": {"type": "string"},
+        "ueScenario": {"type": "string", "minLength": 1},
+        "ros2Launch": {"type": "string", "minLength": 1},
+        "ros2Pkg": {"type": "string", "minLength": 1},
+        "timeout": {"type": "number", "minimum": 0},
+        "maxSimTime": {"type": "number", "minimum": 0},
+        "readyPattern": {"type": "string", "regex": True},
+        "readyTopics": {"type": "array", "items": {"type": "string"}},
+        "resetService": {"type": "string"},
+        "restartBridge": {"type": "boolean"},
+        "reuseUnreal": {"type": "boolean"},
+        "expandFleets": {"type": "boolean"},
+        "record": RECORD_SCHEMA,
+    },
+}
+
+# Schema of simulation_config.json (the batch run by sim_runner.py)
+SIMULATION_CONFIG_SCHEMA = {
+    "type": "object",
+    "required": ["ueProject", "simulations"],
+    "properties": {
+        "ueProject": {"type": "string", "minLength": 1},
+        "restartBridge": {"type": "boolean"},
+        "reuseUnreal": {"type": "boolean"},
+        "maxParallel": {"type": "integer", "minimum": 1},
+        "retries": {"type": "integer", "minimum": 0},
+        "rosbridgePort": {"type": "integer", "minimum": 1},
+        "rosDomainId": {"type": "integer", "minimum": 0},
+        "rosbridgeArgs": {"type": "object"},
+        "resultsFile": {"type": "string"},
+        "logging": LOGGING_SCHEMA,
+        "record": RECORD_SCHEMA,
+        "simulations": {"type": "array", "minItems": 1, "items": SIMULATION_SCHEMA},
+    },
+}
+
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "number": (int, float),
+    "integer": int,
+}
+
+def type_matches(value, type_name):
+    # bool is a subclass of int, but true/false are not numbers in JSON
+    if type_name in ("number", "integer") and isinstance(value, bool):
+        return False
+    return isinstance(value, JSON_TYPES[type_name])
+
+def validate_schema(value, schema, path, errors):
+    """Check value against a (JSON-Schema-like) schema and append every violation to errors."""
+    if "type" in schema:
+        type_names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        if not any(type_matches(value, type_name) for type_name in type_names):
+            errors.append(f"{path}: expected {' or '.join(type_names)}, got {json.dumps(value)}")
+            return
+
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: must be one of {', '.join(json.dumps(option) for option in schema['enum'])}, "
+                      f"got {json.dumps(value)}")
+    if "minimum" in schema and isinstance(value, (int, float)) and value < schema["minimum"]:
+        errors.append(f"{path}: must be at least {schema['minimum']}, got {value}")
+    if isinstance(value, str):
+        if len(value) < schema.get("minLength", 0):
+            errors.append(f"{path}: must not be empty")
+        if "pattern" in schema and not re.match(schema["pattern"], value):
+            errors.append(f"{path}: {json.dumps(value)} does not match {schema['pattern']}")
+        if schema.get("regex"):
+            try:
+                re.compile(value)
+            except re.error as e:
+                errors.append(f"{path}: invalid regular expression: {e}")
+
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing required key '{key}'")
+        for key, property_schema in schema.get("properties", {}).items():
+            if key in value:
+                validate_schema(value[key], property_schema, f"{path}.{key}", errors)
+
+    if isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            errors.append(f"{path}: needs at least {schema['minItems']} item(s)")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path}: allows at most {schema['maxItems']} item(s)")
+        if "items" in schema:
+            for index, item in enumerate(value):
+                validate_schema(item, schema["items"], f"{path}[{index}]", errors)
+
+def relocation_hint(missing_path):
+    """Suggest the copy of a missing file inside this repository, for configs written on another machine."""
+    parts = missing_path.replace("\\", "/").split("/")
+    for index in range(1, len(parts)):
+        candidate = os.path.join(REPO_DIR, *parts[index:])
+        if os.path.isfile(candidate):
+            return f" (did you mean '{candidate}'?)"
+    return ""
+
+def check_fleets(config, path, errors):
+    """Check the parts of fleet entries the schema cannot express."""
+    robots = config.get("robots", [])
+    for index, robot in enumerate(robots if isinstance(robots, list) else []):
+        fleet = robot.get("fleet") if isinstance(robot, dict) else None
+        if not isinstance(fleet, dict):
+            continue
+        fleet_path = f"{path}.robots[{index}].fleet"
+        positions = fleet.get("positions")
+        if "grid" in fleet and positions is not None:
+            errors.append(f"{fleet_path}: use either 'grid' or 'positions', not both")
+        if positions is None and "count" not in fleet:
+            errors.append(f"{fleet_path}: needs 'count' or 'positions'")
+        if isinstance(positions, list) and isinstance(fleet.get("count"), int) and fleet["count"] > len(positions):
+            errors.append(f"{fleet_path}: 'count' is {fleet['count']}, but only {len(positions)} positions are given")
+        try:
+            fleet.get("namespace", "").format(name="robot", index=0)
+        except (KeyError, IndexError, ValueError, AttributeError):
+            errors.append(f"{fleet_path}.namespace: only {{name}} and {{index}} can be used")
+
+def check_robot_files(config, path, errors):
+    """Check that the robots' description files and the meshes they reference exist."""
+    robots = config.get("robots", [])
+    checked = set()
+    for index, robot in enumerate(robots if isinstance(robots, list) else []):
+        robot_name = robot.get("robot", "") if isinstance(robot, dict) else ""
+        robot_path = f"{path}.robots[{index}].robot"
+        if isinstance(robot_name, str) and robot_name.lower().endswith(BUNDLE_EXTENSION):
+            if not os.path.isfile(robot_name):
+                errors.append(f"{robot_path}: file '{robot_name}' does not exist{relocation_hint(robot_name)}")
+            elif robot_name not in checked:
+                checked.add(robot_name)
+                errors.extend(f"{robot_path}: {error}" for error in validate_bundle(robot_name))
+            continue
+        if not isinstance(robot_name, str) or not robot_name.lower().endswith(DESCRIPTION_EXTENSIONS):
+            continue
+        if not os.path.isfile(robot_name):
+            errors.append(f"{robot_path}: file '{robot_name}' does not exist{relocation_hint(robot_name)}")
+            continue
+        if robot_name in checked:
+            continue
+        checked.add(robot_name)
+        try:
+            _, unresolved = referenced_mesh_files(robot_name)
+        except (ET.ParseError, OSError) as e:
+            errors.append(f"{robot_path}: could not parse '{robot_name}': {e}")
+            continue
+        for uri in unresolved:
+            errors.append(f"{robot_path}: referenced mesh '{uri}' not found")
+
+def validate_scenario_config(config, path="config", check_files=True, need_project=False):
+    """
+    Validate a config.json. Returns a list of all errors found.
+
+    With check_files, robot description files, their meshes and the Unreal project are
+    checked on disk as well.
+    """
+    errors = []
+    validate_schema(config, SCENARIO_SCHEMA, path, errors)
+    if not isinstance(config, dict):
+        return errors
+    check_fleets(config, path, errors)
+    if not check_files:
+        return errors
+
+    check_robot_files(config, path, errors)
+    project_path = config.get("unreal_project")
+    if need_project and not project_path:
+        errors.append(f"{path}: missing required key 'unreal_project'")
+    elif isinstance(project_path, str) and project_path and not os.path.exists(project_path):
+        errors.append(f"{path}.unreal_project: file '{project_path}' does not exist{relocation_hint(project_path)}")
+    return errors
+
+def unreal_executable_error(unreal_exec_path):
+    """Return an error message if the Unreal Engine executable cannot be found, else None."""
+    if os.path.isfile(unreal_exec_path) or shutil.which(unreal_exec_path):
+        return None
+    return f"Unreal Engine executable '{unreal_exec_path}' not found (use --unreal-path)"
+
+def validate_simulation_config(config, path="simulation_config", unreal_exec_path=None, check_files=True):
+    """
+    Validate a simulation_config.json. Returns a list of all errors found.
+
+    With check_files, the Unreal project, the Unreal Engine executable and every
+    scenario are checked as well. Scenarios that are config files are validated too.
+    """
+    errors = []
+    validate_schema(config, SIMULATION_CONFIG_SCHEMA, path, errors)
+    if not isinstance(config, dict) or not check_files:
+        return errors
+
+    ue_project = config.get("ueProject")
+    if isinstance(ue_project, str) and ue_project and not os.path.exists(ue_project):
+        errors.append(f"{path}.ueProject: file '{ue_project}' does not exist")
+    if unreal_exec_path is not None:
+        error = unreal_executable_error(unreal_exec_path)
+        if error:
+            errors.append(error)
+
+    simulations = config.get("simulations")
+    checked = set()
+    for index, simulation in enumerate(simulations if isinstance(simulations, list) else []):
+        ue_scenario = simulation.get("ueScenario") if isinstance(simulation, dict) else None
+        if not isinstance(ue_scenario, str) or not ue_scenario or ue_scenario in checked:
+            continue
+        checked.add(ue_scenario)
+        scenario_path = f"{path}.simulations[{index}].ueScenario"
+        if not os.path.isfile(ue_scenario):
+            errors.append(f"{scenario_path}: file '{ue_scenario}' does not exist")
+            continue
+        # Scenarios in other formats are passed to Unreal Engine as they are
+        if not ue_scenario.lower().endswith(".json"):
+            continue
+        scenario, scenario_errors = load_config(ue_scenario)
+        if scenario is not None:
+            scenario_errors = validate_scenario_config(scenario, ue_scenario)
+        errors.extend(scenario_errors)
+    return errors
+
+def load_config(config_file):
+    """Read a JSON config file. Returns the config (or None) and a list with the error, if any."""
+    try:
+        with open(config_file, 'r') as f:
+            return json.load(f), []
+    except OSError as e:
+        return None, [f"{config_file}: cannot be read: {e.strerror}"]
+    except json.JSONDecodeError as e:
+        return None, [f"{config_file}: invalid JSON at line {e.lineno}, column {e.colno}: {e.msg}"]
+
+def validate_file(config_file, unreal_exec_path=None, need_project=False):
+    """Load and validate a config file of either kind, detected by its "simulations" list."""
+    config, errors = load_config(config_file)
+    if config is None:
+        return errors
+    if isinstance(config, dict) and "simulations" in config:
+        return validate_simulation_config(config, config_file, unreal_exec_path)
+    return validate_scenario_config(config, config_file, need_project=need_project)
+
+def print_errors(errors):
+    """Print validation errors. Returns True if there were none."""
+    for error in errors:
+        print(f"Error: {error}")
+    if errors:
+        print(f"{len(errors)} configuration error(s) found.")
+    return not errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate config.json and simulation_config.json files")
+    parser.add_argument("config_files", nargs="+", help="Config files to validate")
+    parser.add_argument("--unreal-path", type=str, default=None, help="Also check this Unreal Engine executable")
+    args = parser.parse_args()
+
+    all_errors = []
+    for config_file in args.config_files:
+        all_errors.extend(validate_file(config_file, args.unreal_path))
+    if print_errors(all_errors):
+        print("All configs are valid.")
+    sys.exit(0 if not all_errors else 1)
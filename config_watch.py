@@ -0,0 +1,136 @@
+import json
+import os
+import time
+
+from fleet import iter_robots
+
+# Changes the ROS2UE5 plugin applies to a running scenario, see apply_delta
+LIVE_ENVIRONMENT_KEYS = ("weather", "time")
+LIVE_ROBOT_KEYS = ("robot", "position", "subscribers", "controllers")
+# Robot keys whose change needs meshes to be converted
+CONVERSION_ROBOT_KEYS = ("robot", "lod")
+DEFAULT_APPLY_SERVICE = "/ros2ue5/apply_config"
+
+def robot_key(robot, index):
+    """Return the key a robot is matched by between two configs: its namespace (fleet instances) or position in the list."""
+    return robot.get("namespace") or f"robots[{index}]"
+
+def diff_values(old, new, path):
+    """Return the changes between two JSON values. Dicts are compared key by key, anything else as a whole."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in list(old) + [key for key in new if key not in old]:
+            child = f"{path}.{key}" if path else key
+            if key not in new:
+                changes.append({"path": child, "op": "removed", "old": old[key]})
+            elif key not in old:
+                changes.append({"path": child, "op": "added", "new": new[key]})
+            else:
+                changes.extend(diff_values(old[key], new[key], child))
+        return changes
+    if old != new:
+        return [{"path": path, "op": "changed", "old": old, "new": new}]
+    return []
+
+def diff_configs(old, new):
+    """
+    Return the structured diff of two scenario configs, as a list of changes
+    {"path", "op" ("added", "removed" or "changed"), "old", "new"}.
+
+    Robots are compared after their fleets are expanded, so a fleet change shows up as the
+    instances it adds, removes or moves. Changes of a robot carry its key in "robot".
+    """
+    changes = diff_values({key: value for key, value in old.items() if key != "robots"},
+                          {key: value for key, value in new.items() if key != "robots"}, "")
+    old_robots = {robot_key(robot, index): robot for index, robot in enumerate(iter_robots(old.get("robots", [])))}
+    new_robots = {robot_key(robot, index): robot for index, robot in enumerate(iter_robots(new.get("robots", [])))}
+    for key, robot in old_robots.items():
+        if key not in new_robots:
+            changes.append({"path": key, "op": "removed", "robot": key, "old": robot})
+        else:
+            for change in diff_values(robot, new_robots[key], key):
+                # Nested robot settings (like the lod) count as a change of their top-level key
+                field = change["path"][len(key) + 1:].split(".")[0]
+                changes.append(dict(change, robot=key, field=field))
+    for key, robot in new_robots.items():
+        if key not in old_robots:
+            changes.append({"path": key, "op": "added", "robot": key, "new": robot})
+    return changes
+
+def is_live(change):
+    """Check whether a change can be applied to a running Unreal Engine instead of relaunching it."""
+    if "robot" in change:
+        return change["op"] != "changed" or change["field"] in LIVE_ROBOT_KEYS
+    section, _, key = change["path"].partition(".")
+    return section == "environment" and key in LIVE_ENVIRONMENT_KEYS
+
+def needs_conversion(change):
+    return "robot" in change and (change["op"] == "added" or
+                                  (change["op"] == "changed" and change["field"] in CONVERSION_ROBOT_KEYS))
+
+def plan_update(old, new):
+    """
+    Diff two configs and split the changes into those applied live and those that need a
+    relaunch. Also returns the robot entries of new whose meshes must be converted first.
+    """
+    changes = diff_configs(old, new)
+    live = [change for change in changes if is_live(change)]
+    relaunch = [change for change in changes if not is_live(change)]
+    convert_keys = {change["robot"] for change in changes if needs_conversion(change)}
+    convert = [robot for index, robot in enumerate(iter_robots(new.get("robots", [])))
+               if robot_key(robot, index) in convert_keys]
+    return live, relaunch, convert
+
+def format_change(change):
+    if change["op"] == "added":
+        # Whole robots are listed by their key only
+        if "robot" in change and "field" not in change:
+            return f"+ {change['path']}"
+        return f"+ {change['path']} = {json.dumps(change['new'])}"
+    if change["op"] == "removed":
+        return f"- {change['path']}"
+    return f"~ {change['path']}: {json.dumps(change['old'])} -> {json.dumps(change['new'])}"
+
+def apply_delta(client, changes, service=DEFAULT_APPLY_SERVICE):
+    """
+    Push changes to the running scenario through a connected RosbridgeClient.
+
+    The plugin's service gets the changes as a JSON string in "delta" and answers with
+    "success" and a "message". Returns (success, message); a failed call raises RosbridgeError.
+    An answer without "success" counts as failed, so the caller relaunches instead.
+    """
+    values = client.call_service(service, {"delta": json.dumps(changes)})
+    if "success" not in values:
+        return False, f"{service} did not report whether the changes were applied"
+    return bool(values["success"]), values.get("message", "")
+
+class ConfigWatcher:
+    """Polls a config file and returns its new contents once a change has settled and parses."""
+
+    def __init__(self, config_file, interval=1.0):
+        self.config_file = config_file
+        self.interval = interval
+        self.mtime = self.current_mtime()
+
+    def current_mtime(self):
+        try:
+            return os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self):
+        """Return the changed config, or None if the file did not change (or cannot be read yet)."""
+        mtime = self.current_mtime()
+        if mtime is None or mtime == self.mtime:
+            return None
+        # Editors write files in several steps; wait until the file stays the same
+        time.sleep(self.interval / 2)
+        if self.current_mtime() != mtime:
+            return None
+        self.mtime = mtime
+        try:
+            with open(self.config_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring the change of {self.config_file}, it cannot be read: {e}")
+            return None
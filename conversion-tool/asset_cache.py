@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+# The cache directory can be shared between checkouts and build hosts (e.g. over NFS)
+CACHE_DIR_ENV = "ROS2UE5_ASSET_CACHE"
+CACHE_SIZE_ENV = "ROS2UE5_ASSET_CACHE_SIZE"
+CACHE_LINK_ENV = "ROS2UE5_ASSET_CACHE_LINK"
+
+DEFAULT_MAX_SIZE = "10G"
+# How cached files are placed into the source tree; each mode falls back to the next one
+LINK_MODES = ("hardlink", "symlink", "copy")
+
+ENTRY_METADATA = "entry.json"
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+def default_cache_dir():
+    """Return the cache directory from the environment, or the per-user default."""
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "ros2ue5", "fbx")
+
+def parse_size(size):
+    """Parse a size like "500M" or "10G" (or a number of bytes) into bytes."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", str(size), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size '{size}' (expected e.g. 500M or 10G)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+def output_suffix(filepath_src, output):
+    """Return the name of an output relative to its source's stem, e.g. ".fbx" or "_LOD1.fbx"."""
+    stem = os.path.splitext(os.path.basename(filepath_src))[0]
+    name = os.path.basename(output)
+    return name[len(stem):] if name.startswith(stem) else "_" + name
+
+class AssetCache:
+    """
+    Content-addressed store of converted meshes.
+
+    Every conversion is stored once under its conversion key (source hash, converter and
+    Blender versions, settings) and linked into the source trees that need it. The least
+    recently used entries are evicted once the cache grows beyond max_size bytes.
+    """
+
+    def __init__(self, root, max_size=DEFAULT_MAX_SIZE, link_mode="hardlink"):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode '{link_mode}' (allowed: {', '.join(LINK_MODES)})")
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.max_size = parse_size(max_size)
+        self.link_mode = link_mode
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    @classmethod
+    def open(cls, root=None, max_size=None, link_mode=None):
+        """Open the cache, taking settings that are not given from the environment or the defaults."""
+        return cls(root or default_cache_dir(),
+                   max_size or os.environ.get(CACHE_SIZE_ENV) or DEFAULT_MAX_SIZE,
+                   link_mode or os.environ.get(CACHE_LINK_ENV) or "hardlink")
+
+    def entry_dir(self, key):
+        return os.path.join(self.objects_dir, key[:2], key)
+
+    def load_entry(self, key):
+        try:
+            with open(os.path.join(self.entry_dir(key), ENTRY_METADATA), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def place(self, cached_file, target):
+        """Link or copy a cached file to target, replacing it atomically."""
+        tmp_target = f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+        modes = LINK_MODES[LINK_MODES.index(self.link_mode):]
+        for mode in modes:
+            try:
+                if mode == "hardlink":
+                    os.link(cached_file, tmp_target)
+                elif mode == "symlink":
+                    os.symlink(cached_file, tmp_target)
+                else:
+                    shutil.copy2(cached_file, tmp_target)
+                break
+            except OSError:
+                # Different file systems, or no link support: try the next mode
+                if mode == modes[-1]:
+                    raise
+        os.replace(tmp_target, target)
+
+    def restore(self, key, filepath_src):
+        """
+        Place the cached outputs of key next to filepath_src.
+
+        Returns the paths of the placed extra outputs (LODs, collision meshes), or None if
+        the cache has no complete entry for key.
+        """
+        entry = self.load_entry(key)
+        if entry is None:
+            return None
+        entry_dir = self.entry_dir(key)
+        stem = os.path.splitext(filepath_src)[0]
+        try:
+            for suffix in entry["outputs"]:
+                self.place(os.path.join(entry_dir, suffix), stem + suffix)
+            # Mark the entry as recently used
+            os.utime(os.path.join(entry_dir, ENTRY_METADATA))
+        except OSError:
+            return None
+        return [stem + suffix for suffix in entry["outputs"] if suffix != ".fbx"]
+
+    @staticmethod
+    def detach(paths):
+        """
+        Remove linked outputs before they are converted again, so the converter writes new
+        files instead of overwriting the cached ones through the link.
+        """
+        for path in paths:
+            try:
+                if os.path.islink(path) or os.stat(path).st_nlink > 1:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def store(self, key, filepath_src, outputs):
+        """
+        Add the outputs of one conversion to the cache, unless another process stored them first.
+        Returns whether the entry was added.
+
+        The entry is assembled in a temporary directory and renamed into place, so readers
+        never see a partial entry.
+        """
+        entry_dir = self.entry_dir(key)
+        if os.path.exists(entry_dir):
+            return False
+        tmp_entry = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        os.makedirs(tmp_entry)
+        try:
+            suffixes = []
+            size = 0
+            for output in outputs:
+                suffix = output_suffix(filepath_src, output)
+                shutil.copy2(output, os.path.join(tmp_entry, suffix))
+                suffixes.append(suffix)
+                size += os.path.getsize(output)
+            with open(os.path.join(tmp_entry, ENTRY_METADATA), 'w') as f:
+                json.dump({"source": os.path.basename(filepath_src), "outputs": suffixes, "size": size,
+                           "created": time.time()}, f)
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            os.rename(tmp_entry, entry_dir)
+            return True
+        except OSError:
+            # Most likely stored concurrently by another host
+            return False
+        finally:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+    def entries(self):
+        """Return (last use, size, key) of every cache entry."""
+        entries = []
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for key in os.listdir(prefix_dir) if os.path.isdir(prefix_dir) else []:
+                try:
+                    last_use = os.stat(os.path.join(prefix_dir, key, ENTRY_METADATA)).st_mtime
+                except OSError:
+                    continue
+                entry = self.load_entry(key)
+                entries.append((last_use, entry.get("size", 0) if entry else 0, key))
+        return entries
+
+    def prune(self, max_size=None):
+        """Evict the least recently used entries until the cache fits in max_size bytes. Returns the freed bytes."""
+        max_size = self.max_size if max_size is None else max_size
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, key in entries:
+            if total - freed <= max_size:
+                break
+            # Rename first, so concurrent readers either see the whole entry or none of it
+            doomed = os.path.join(self.tmp_dir, f"evict-{key}-{uuid.uuid4().hex[:8]}")
+            try:
+                os.rename(self.entry_dir(key), doomed)
+            except OSError:
+                continue
+            shutil.rmtree(doomed, ignore_errors=True)
+            freed += size
+        return freed
+
+    def stats(self):
+        entries = self.entries()
+        return {"entries": len(entries), "size": sum(size for _, size, _ in entries), "max_size": self.max_size}
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the shared cache of converted meshes")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help=f"Cache directory (default: ${CACHE_DIR_ENV} or ~/.cache/ros2ue5/fbx)")
+    parser.add_argument("--prune", type=str, metavar="SIZE", default=None,
+                        help="Evict least recently used entries until the cache fits in SIZE (e.g. 5G)")
+    args = parser.parse_args()
+
+    cache = AssetCache.open(args.cache_dir)
+    if args.prune is not None:
+        freed = cache.prune(parse_size(args.prune))
+        print(f"Freed {freed / 1024 ** 2:.1f} MiB.")
+    stats = cache.stats()
+    print(f"{cache.root}: {stats['entries']} entries, {stats['size'] / 1024 ** 2:.1f} MiB "
+          f"of {stats['max_size'] / 1024 ** 2:.0f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+
+# Bump whenever convert_to_fbx.py changes in a way that affects its output
+CONVERTER_VERSION = 1
+
+# Default manifest location, relative to the working directory (next to config.json)
+MANIFEST_FILE = ".fbx_manifest.json"
+
+# Per-file result records of every conversion run, appended as they arrive
+RESULTS_LOG = ".fbx_results.jsonl"
+
+# Prefix of the result lines written by convert_to_fbx.py
+RESULT_PREFIX = "@@RESULT "
+
+# Mesh formats handled by the converter
+MESH_EXTENSIONS = (".stl", ".dae")
+
+# Settings passed to the Blender importers/exporter. They are part of the cache key,
+# so changing them invalidates every previously converted mesh.
+EXPORT_SETTINGS = {
+    "collada_import": {"import_units": True},
+    "fbx_export": {},
+}
+
+def output_path_for(filepath_src):
+    """Return the FBX path a source mesh is converted to."""
+    return os.path.splitext(filepath_src)[0] + ".fbx"
+
+def lod_output_path(filepath_src, level):
+    """Return the FBX path of a decimated level of detail of a source mesh."""
+    return f"{os.path.splitext(filepath_src)[0]}_LOD{level}.fbx"
+
+def result_record(filepath_src, ok, messages, duration=None, triangle_count=None, **extra):
+    """
+    Build the result record of one converted file, as reported by every conversion backend:
+    its status ("converted" or "failed"), duration in seconds, triangle count and first error.
+    """
+    errors = [message for message in messages if message.startswith("Error")]
+    record = {
+        "src": filepath_src,
+        "dst": output_path_for(filepath_src),
+        "ok": ok,
+        "status": "converted" if ok else "failed",
+        "duration": duration,
+        "triangle_count": triangle_count,
+        "error": None if ok else (errors[0] if errors else "Error: conversion did not finish"),
+        "messages": messages,
+    }
+    record.update(extra)
+    return record
+
+def append_result(result, results_log=RESULTS_LOG):
+    """Append one result record to the results log."""
+    with open(results_log, 'a') as f:
+        f.write(json.dumps(dict(result, time=time.time())) + "\n")
+
+def load_failed_files(results_log=RESULTS_LOG):
+    """Return the files whose most recent conversion in the results log failed."""
+    latest = {}
+    try:
+        with open(results_log, 'r') as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run that was killed may have left a partial last line
+                    continue
+                latest[result["src"]] = result.get("ok", False)
+    except FileNotFoundError:
+        pass
+    return {filepath_src for filepath_src, ok in latest.items() if not ok}
+
+def find_mesh_files(base_path):
+    """Yield all mesh files below base_path that the converter understands."""
+    for dirpath, dirnames, filenames in os.walk(base_path):
+        for filename in sorted(filenames):
+            if filename.lower().endswith(MESH_EXTENSIONS):
+                yield os.path.abspath(os.path.join(dirpath, filename))
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    """Load the conversion manifest, returning an empty one if it is missing or unreadable."""
+    try:
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {}
+    manifest.setdefault("blender", {})
+    manifest.setdefault("files", {})
+    return manifest
+
+def save_manifest(manifest, manifest_file=MANIFEST_FILE):
+    """Atomically write the conversion manifest."""
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(tmp_file, manifest_file)
+
+def get_blender_version(manifest):
+    """
+    Return the installed Blender version string, or None if Blender is not installed.
+
+    The version is cached in the manifest together with the size and mtime of the
+    Blender executable, so `blender --version` is only spawned when Blender changed.
+    """
+    blender_path = shutil.which('blender')
+    if blender_path is None:
+        return None
+
+    stat = os.stat(blender_path)
+    cached = manifest["blender"]
+    if (cached.get("path") == blender_path and cached.get("size") == stat.st_size
+            and cached.get("mtime_ns") == stat.st_mtime_ns):
+        return cached.get("version")
+
+    try:
+        result = subprocess.run(['blender', '--version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+    lines = result.stdout.decode('utf-8', errors='replace').strip().splitlines()
+    version = lines[0].strip() if lines else "unknown"
+    manifest["blender"] = {
+        "path": blender_path,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "version": version,
+    }
+    return version
+
+def conversion_key(source_hash, blender_version, settings=EXPORT_SETTINGS):
+    """Build the cache key identifying one conversion of a source mesh."""
+    key_data = json.dumps({
+        "source": source_hash,
+        "converter": CONVERTER_VERSION,
+        "blender": blender_version,
+        "settings": settings,
+    }, sort_keys=True)
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+def source_hash(manifest, filepath_src):
+    """Return the content hash of a source mesh, reusing the manifest entry if the file is unchanged."""
+    stat = os.stat(filepath_src)
+    entry = manifest["files"].get(filepath_src)
+    if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return entry["hash"]
+    return file_sha256(filepath_src)
+
+def is_up_to_date(manifest, filepath_src, key):
+    """Check whether the FBX recorded for filepath_src matches key and still exists unchanged."""
+    entry = manifest["files"].get(filepath_src)
+    if not entry or entry.get("key") != key:
+        return False
+
+    filepath_dst = entry.get("output", output_path_for(filepath_src))
+    try:
+        stat = os.stat(filepath_dst)
+    except FileNotFoundError:
+        return False
+    if not all(os.path.exists(extra_output) for extra_output in entry.get("extra_outputs", [])):
+        return False
+    return stat.st_size == entry.get("output_size") and stat.st_mtime_ns == entry.get("output_mtime_ns")
+
+def record_conversion(manifest, filepath_src, src_hash, key, extra_outputs=()):
+    """Store a successful conversion of filepath_src (and any extra outputs such as LODs) in the manifest."""
+    filepath_dst = output_path_for(filepath_src)
+    src_stat = os.stat(filepath_src)
+    dst_stat = os.stat(filepath_dst)
+    manifest["files"][filepath_src] = {
+        "hash": src_hash,
+        "size": src_stat.st_size,
+        "mtime_ns": src_stat.st_mtime_ns,
+        "key": key,
+        "output": filepath_dst,
+        "output_size": dst_stat.st_size,
+        "output_mtime_ns": dst_stat.st_mtime_ns,
+        "extra_outputs": list(extra_outputs),
+    }
+
+def plan_conversions(manifest, mesh_files, blender_version, job_settings=None):
+    """
+    Split mesh_files into stale and up-to-date files.
+
+    job_settings optionally maps a mesh file to extra per-file settings (e.g. LODs) that
+    become part of its key. Returns a list of (filepath_src, source_hash, key) tuples
+    that need converting and the number of files that can be skipped.
+    """
+    job_settings = job_settings or {}
+    stale = []
+    skipped = 0
+    for filepath_src in mesh_files:
+        src_hash = source_hash(manifest, filepath_src)
+        settings = dict(EXPORT_SETTINGS, **job_settings.get(filepath_src, {}))
+        # Natively converted meshes do not depend on Blender
+        if settings.get("backend") == "native":
+            key = conversion_key(src_hash, None, settings)
+        else:
+            key = conversion_key(src_hash, blender_version, settings)
+        if is_up_to_date(manifest, filepath_src, key):
+            skipped += 1
+        else:
+            stale.append((filepath_src, src_hash, key))
+    return stale, skipped
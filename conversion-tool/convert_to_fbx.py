@@ -1,9 +1,16 @@
 #!/usr/bin/env python
 import os
 import bpy
+import bmesh
 import sys
 import platform
 import inspect
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from conversion_manifest import EXPORT_SETTINGS, RESULT_PREFIX, lod_output_path, output_path_for, result_record
+from native_stl import convert_stl
 
 def clear_console():
     if platform.system() == "Windows":
@@ -24,9 +31,182 @@ def file_iter(path, ext):
 def reset_blend():
     bpy.ops.wm.read_factory_settings(use_empty=True)
 
+def convert_stl_natively(filepath_src):
+    """Convert an STL file without Blender and return its result record."""
+    start_time = time.monotonic()
+    filepath_dst = output_path_for(filepath_src)
+    messages = [f"Converting {filepath_src} -> {filepath_dst} natively"]
+    try:
+        triangles = convert_stl(filepath_src, filepath_dst)
+        messages.append("DONE!")
+        return result_record(filepath_src, True, messages, time.monotonic() - start_time, triangles)
+    except (OSError, ValueError) as e:
+        messages.append(f"Error during STL conversion for {filepath_src}: {e}")
+        return result_record(filepath_src, False, messages, time.monotonic() - start_time)
+
 def convert_recursive(base_path):
+    """
+    Convert every mesh below base_path, each file in isolation, and stream one result line
+    per file as soon as it is done. Returns the number of files that failed.
+    """
+    failed = 0
+    # Plain STL triangle soups don't need Blender
     for filepath_src in file_iter(base_path, ".stl"):
-        filepath_dst = os.path.splitext(filepath_src)[0] + ".fbx"
+        result = convert_stl_natively(filepath_src)
+        failed += not result["ok"]
+        report_result(result)
+
+    for filepath_src in file_iter(base_path, ".dae"):
+        reset_blend()
+        result = convert_file(filepath_src)
+        failed += not result["ok"]
+        report_result(result)
+    return failed
+
+def mesh_objects():
+    return [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+
+def count_triangles(objects):
+    """Count the triangles of the objects with all modifiers applied."""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    triangles = 0
+    for obj in objects:
+        evaluated = obj.evaluated_get(depsgraph)
+        mesh = evaluated.to_mesh()
+        triangles += sum(len(polygon.vertices) - 2 for polygon in mesh.polygons)
+        evaluated.to_mesh_clear()
+    return triangles
+
+def export_lods(filepath_src, triangle_budgets, triangles):
+    """
+    Export one decimated FBX per triangle budget (<name>_LOD1.fbx, <name>_LOD2.fbx, ...)
+    from the meshes in the scene. Returns the written files.
+    """
+    objects = mesh_objects()
+    full_triangles = count_triangles(objects)
+    triangles["LOD0"] = full_triangles
+
+    modifiers = [obj.modifiers.new(name="LOD", type='DECIMATE') for obj in objects]
+    outputs = []
+    for level, budget in enumerate(triangle_budgets, start=1):
+        ratio = min(1.0, budget / full_triangles) if full_triangles else 1.0
+        for modifier in modifiers:
+            modifier.ratio = ratio
+
+        filepath_dst = lod_output_path(filepath_src, level)
+        bpy.ops.export_scene.fbx(filepath=filepath_dst, **dict(EXPORT_SETTINGS["fbx_export"], use_mesh_modifiers=True))
+        triangles[f"LOD{level}"] = count_triangles(objects)
+        outputs.append(filepath_dst)
+        output.append(f"Exported LOD{level} ({triangles[f'LOD{level}']} triangles) -> {filepath_dst}")
+
+    for obj, modifier in zip(objects, modifiers):
+        obj.modifiers.remove(modifier)
+    return outputs
+
+def add_convex_collision(filepath_src, triangle_budget, triangles):
+    """
+    Add a convex hull (UCX_<name>_NN) for every mesh in the scene and re-export the FBX,
+    so Unreal imports the hulls as the mesh's simple collision.
+    """
+    name = os.path.splitext(os.path.basename(filepath_src))[0]
+    objects = mesh_objects()
+    triangles["collision"] = count_triangles(objects)
+
+    # Unreal matches UCX_ hulls to the render mesh by name
+    if len(objects) == 1:
+        objects[0].name = name
+
+    hulls = []
+    for index, obj in enumerate(objects):
+        bm = bmesh.new()
+        bm.from_mesh(obj.data)
+        hull = bmesh.ops.convex_hull(bm, input=bm.verts)
+        unused = [ele for ele in hull["geom_interior"] + hull["geom_unused"] if isinstance(ele, bmesh.types.BMVert)]
+        bmesh.ops.delete(bm, geom=unused, context='VERTS')
+        bmesh.ops.triangulate(bm, faces=bm.faces)
+
+        mesh = bpy.data.meshes.new(f"UCX_{name}_{index:02d}")
+        bm.to_mesh(mesh)
+        bm.free()
+
+        hull_object = bpy.data.objects.new(mesh.name, mesh)
+        hull_object.matrix_world = obj.matrix_world.copy()
+        bpy.context.scene.collection.objects.link(hull_object)
+        if triangle_budget and len(mesh.polygons) > triangle_budget:
+            modifier = hull_object.modifiers.new(name="Simplify", type='DECIMATE')
+            modifier.ratio = triangle_budget / len(mesh.polygons)
+        hulls.append(hull_object)
+
+    triangles["UCX"] = count_triangles(hulls)
+    bpy.ops.export_scene.fbx(filepath=output_path_for(filepath_src),
+                             **dict(EXPORT_SETTINGS["fbx_export"], use_mesh_modifiers=True))
+    output.append(f"Added {len(hulls)} convex collision hull(s) ({triangles['UCX']} triangles)")
+
+def convert_file(filepath_src, lod=None, collision=None):
+    """
+    Convert a single mesh file and return a result record for it.
+
+    lod ({"triangles": [budget, ...]}) additionally exports decimated LOD levels,
+    collision ({"triangles": budget}) embeds simplified convex collision hulls.
+    """
+    start_time = time.monotonic()
+    first_message = len(output)
+    extra_outputs = []
+    triangles = {}
+    triangle_count = None
+    try:
+        if filepath_src.lower().endswith(".stl"):
+            convert_stl_files([filepath_src])
+        else:
+            convert_dae_files([filepath_src])
+
+        if "DONE!" in output[first_message:]:
+            triangle_count = count_triangles(mesh_objects())
+            if lod and lod.get("triangles"):
+                extra_outputs = export_lods(filepath_src, lod["triangles"], triangles)
+            if collision:
+                add_convex_collision(filepath_src, collision.get("triangles"), triangles)
+    except Exception as e:
+        output.append(f"Error during conversion of {filepath_src}: {e}")
+
+    messages = output[first_message:]
+    del output[first_message:]
+    ok = "DONE!" in messages and not any(message.startswith("Error") for message in messages)
+    return result_record(filepath_src, ok, messages, time.monotonic() - start_time, triangle_count,
+                         extra_outputs=extra_outputs, triangles=triangles)
+
+def send_result(result):
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+def report_result(result):
+    """Print the messages of a file followed by its machine-readable result line."""
+    for message in result["messages"]:
+        print(message)
+    send_result(result)
+
+def serve():
+    """
+    Run as a conversion server: read one JSON job ({"src": path, "lod": ..., "collision": ...})
+    per line from stdin and answer each with one result line on stdout, until stdin is closed.
+    """
+    send_result({"ready": True})
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+
+        # Start every job from an empty scene. A file that breaks Blender's scene reset
+        # still gets a result, so the parent can go on with the next file.
+        try:
+            reset_blend()
+            result = convert_file(job["src"], job.get("lod"), job.get("collision"))
+        except Exception as e:
+            result = result_record(job["src"], False, [f"Error during conversion of {job['src']}: {e}"])
+        send_result(result)
+
+def convert_stl_files(files):
+    for filepath_src in files:
+        filepath_dst = output_path_for(filepath_src)
         output.append(f"Converting {filepath_src} -> {filepath_dst}")
 
         # Deselect all objects
@@ -42,7 +222,7 @@ def convert_recursive(base_path):
             # Update the scene to ensure all objects are removed
             bpy.context.view_layer.update()
         except Exception as e:
-            output.append("Error during object deletion: " + e)
+            output.append(f"Error during object deletion: {e}")
 
         try:
             # Import the STL file
@@ -53,15 +233,15 @@ def convert_recursive(base_path):
 
 
             # Export the scene as FBX
-            bpy.ops.export_scene.fbx(filepath=filepath_dst)
+            bpy.ops.export_scene.fbx(filepath=filepath_dst, **EXPORT_SETTINGS["fbx_export"])
             output.append("DONE!")
 
         except Exception as e:
-            output.append(f"Error during STL conversion for {filepath_src}: " + e)
+            output.append(f"Error during STL conversion for {filepath_src}: {e}")
 
-
-    for filepath_src in file_iter(base_path, ".dae"):
-        filepath_dst = os.path.splitext(filepath_src)[0] + ".fbx"
+def convert_dae_files(files):
+    for filepath_src in files:
+        filepath_dst = output_path_for(filepath_src)
 
         output.append("Converting %r -> %r" % (filepath_src, filepath_dst))
 
@@ -72,34 +252,37 @@ def convert_recursive(base_path):
                 #else:
                #     obj.select_set(False)
             except Exception as e:
-                output.append("Error during deleting object " + e)
+                output.append(f"Error during deleting object: {e}")
                 break
         try:
             bpy.ops.object.delete()
-            bpy.ops.wm.collada_import(filepath=filepath_src, import_units=True)
+            bpy.ops.wm.collada_import(filepath=filepath_src, **EXPORT_SETTINGS["collada_import"])
         except Exception as e:
-            output.append("Could not import " + filepath_src + "Error: " + e)
+            output.append(f"Error: could not import {filepath_src}: {e}")
             continue
 
 
         try:
-            bpy.ops.export_scene.fbx(filepath=filepath_dst)
+            bpy.ops.export_scene.fbx(filepath=filepath_dst, **EXPORT_SETTINGS["fbx_export"])
             output.append("DONE!")
         except Exception as e:
-            output.append("Could not export " + filepath_dst + "Error: " + e)
+            output.append(f"Error: could not export {filepath_dst}: {e}")
             continue
 
 if __name__ == "__main__":
     print("start")
-    if len(sys.argv) > 5:
+    if len(sys.argv) > 5 and sys.argv[5] == "--serve":
+        serve()
+    elif len(sys.argv) > 5:
         CONVERT_DIR = sys.argv[5]
         print(f"Path: {CONVERT_DIR}")
-        convert_recursive(CONVERT_DIR)
-        
+        failed = convert_recursive(CONVERT_DIR)
+
         # clear_console()
 
-        for str in output:
-            print(str)
+        if failed:
+            print(f"Warning: {failed} file(s) could not be converted")
+            sys.exit(1)
     else:
         print(f"Warning: no path provided!")
         sys.exit(1)
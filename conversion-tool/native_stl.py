@@ -0,0 +1,399 @@
+import mmap
+import os
+import re
+import struct
+import zlib
+
+# NumPy is optional: without it the pure-Python code paths are used
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bump whenever the generated FBX changes
+NATIVE_CONVERTER_VERSION = 2
+
+FBX_VERSION = 7400
+FBX_HEAD_MAGIC = b"Kaydara FBX Binary  \x00\x1a\x00"
+FBX_FOOT_ID = b"\xfa\xbc\xab\x09\xd0\xc8\xd4\x66\xb1\x76\xfb\x83\x1c\xf7\x26\x7e"
+FBX_FOOT_MAGIC = b"\xf8\x5a\x8c\x6a\xde\xf5\xd9\x7e\xec\xe9\x0c\xe3\x75\x8f\x29\x0b"
+FBX_FILE_ID = b"\x28\xb3\x2a\xeb\xb6\x24\xcc\xc2\xbf\xc8\xb0\x2a\xa9\x2b\xfc\xf1"
+FBX_TIME_ID = "1970-01-01 10:00:00:000"
+# Written instead of the current time, so converting the same STL always gives the same FBX
+FBX_CREATION_TIMESTAMP = (1970, 1, 1, 10, 0, 0)
+FBX_NULL_RECORD = b"\x00" * 13
+
+# Arrays larger than this are zlib-compressed
+FBX_COMPRESS_THRESHOLD = 128
+
+STL_HEADER_SIZE = 84
+STL_TRIANGLE_SIZE = 50
+STL_VERTEX_PATTERN = re.compile(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+def is_binary_stl(data):
+    """Detect binary STLs by their size, since binary headers may also start with 'solid'."""
+    if len(data) < STL_HEADER_SIZE:
+        return False
+    expected_size = STL_HEADER_SIZE + struct.unpack_from("<I", data, 80)[0] * STL_TRIANGLE_SIZE
+    if len(data) == expected_size:
+        return True
+    # Some exporters append trailing bytes to binary files
+    return not data[:5].lower() == b"solid" and len(data) > expected_size
+
+def weld_numpy(corners):
+    """Weld an (n, 3) corner array into unique vertices and an (n / 3, 3) index array."""
+    vertices, indices = np.unique(corners, axis=0, return_inverse=True)
+    triangles = indices.reshape(-1, 3)
+
+    # Drop triangles that collapsed to a line or point
+    valid = ((triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2])
+             & (triangles[:, 0] != triangles[:, 2]))
+    return vertices.astype("<f8"), triangles[valid].astype("<i4")
+
+def weld_python(corners):
+    """Pure-Python counterpart of weld_numpy for a flat sequence of (x, y, z) corners."""
+    lookup = {}
+    vertices = []
+    triangles = []
+    triangle = []
+    for corner in corners:
+        index = lookup.get(corner)
+        if index is None:
+            index = lookup[corner] = len(vertices)
+            vertices.append(corner)
+        triangle.append(index)
+        if len(triangle) == 3:
+            if triangle[0] != triangle[1] and triangle[1] != triangle[2] and triangle[0] != triangle[2]:
+                triangles.append(tuple(triangle))
+            triangle = []
+    return vertices, triangles
+
+def read_binary_stl(data):
+    triangle_count = struct.unpack_from("<I", data, 80)[0]
+    if np is not None:
+        records = np.frombuffer(data, dtype=np.dtype([
+            ("normal", "<f4", (3,)),
+            ("corners", "<f4", (3, 3)),
+            ("attribute", "<u2"),
+        ]), count=triangle_count, offset=STL_HEADER_SIZE)
+        return weld_numpy(records["corners"].reshape(-1, 3))
+
+    view = memoryview(data)[STL_HEADER_SIZE:STL_HEADER_SIZE + triangle_count * STL_TRIANGLE_SIZE]
+    corners = []
+    for record in struct.iter_unpack("<12fH", view):
+        corners.extend((record[3:6], record[6:9], record[9:12]))
+    return weld_python(corners)
+
+def read_ascii_stl(data):
+    matches = STL_VERTEX_PATTERN.findall(data)
+    if np is not None:
+        corners = np.array(matches, dtype="<f8").reshape(-1, 3) if matches else np.zeros((0, 3))
+        return weld_numpy(corners[:len(corners) // 3 * 3])
+    corners = [tuple(float(value) for value in match) for match in matches]
+    return weld_python(corners[:len(corners) // 3 * 3])
+
+def read_stl(filepath):
+    """
+    Read a binary or ASCII STL file.
+
+    Returns (vertices, triangles): the welded vertex positions and the vertex indices
+    of every non-degenerate triangle. Both are NumPy arrays if NumPy is available,
+    otherwise lists of tuples.
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"{filepath} is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if is_binary_stl(data):
+                vertices, triangles = read_binary_stl(data)
+            else:
+                vertices, triangles = read_ascii_stl(data)
+
+    if len(triangles) == 0:
+        raise ValueError(f"{filepath} contains no triangles")
+    return vertices, triangles
+
+class FbxId(int):
+    """Object ids, which FBX stores as 64-bit integers."""
+
+def fbx_property(value):
+    """Encode one FBX node property. Tuples of (type code, values) encode typed arrays."""
+    if isinstance(value, FbxId):
+        return b"L" + struct.pack("<q", value)
+    if isinstance(value, bool):
+        return b"C" + struct.pack("<?", value)
+    if isinstance(value, int):
+        return b"I" + struct.pack("<i", value)
+    if isinstance(value, float):
+        return b"D" + struct.pack("<d", value)
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+        return b"S" + struct.pack("<I", len(value)) + value
+    if isinstance(value, bytes):
+        return b"R" + struct.pack("<I", len(value)) + value
+
+    type_code, array = value
+    if np is not None and isinstance(array, np.ndarray):
+        count = array.size
+        payload = array.astype({"d": "<f8", "i": "<i4", "l": "<i8"}[type_code]).tobytes()
+    else:
+        count = len(array)
+        payload = struct.pack(f"<{count}{'q' if type_code == 'l' else type_code}", *array)
+    encoding = 0
+    if len(payload) > FBX_COMPRESS_THRESHOLD:
+        payload = zlib.compress(payload, 1)
+        encoding = 1
+    return type_code.encode() + struct.pack("<3I", count, encoding, len(payload)) + payload
+
+def fbx_node(name, properties=(), children=None):
+    return (name, properties, children or [])
+
+def fbx_property70(name, type_name, label, flags, *values):
+    return fbx_node("P", (name, type_name, label, flags) + values)
+
+def encode_fbx_node(node, offset, is_last):
+    """Encode a node (and its children) that starts at the given absolute file offset."""
+    name, properties, children = node
+    encoded_properties = b"".join(fbx_property(value) for value in properties)
+    name_bytes = name.encode('ascii')
+    body_offset = offset + 13 + len(name_bytes) + len(encoded_properties)
+
+    body = bytearray()
+    for index, child in enumerate(children):
+        body += encode_fbx_node(child, body_offset + len(body), index == len(children) - 1)
+    if children or (not properties and not is_last):
+        body += FBX_NULL_RECORD
+
+    end_offset = body_offset + len(body)
+    header = struct.pack("<3IB", end_offset, len(properties), len(encoded_properties), len(name_bytes))
+    return header + name_bytes + encoded_properties + bytes(body)
+
+def fbx_mesh_nodes(name, vertices, triangles):
+    """Build the FBX document nodes for a single mesh model."""
+    if np is not None and isinstance(triangles, np.ndarray):
+        polygon_indices = triangles.copy()
+        polygon_indices[:, 2] ^= -1
+        corners = vertices[triangles]
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.repeat(normals / np.where(lengths > 0, lengths, 1), 3, axis=0)
+        vertex_array = vertices.reshape(-1)
+        polygon_array = polygon_indices.reshape(-1)
+        normal_array = normals.reshape(-1)
+    else:
+        vertex_array = [value for vertex in vertices for value in vertex]
+        polygon_array = []
+        normal_array = []
+        for a, b, c in triangles:
+            polygon_array.extend((a, b, c ^ -1))
+            (ax, ay, az), (bx, by, bz), (cx, cy, cz) = vertices[a], vertices[b], vertices[c]
+            ux, uy, uz = bx - ax, by - ay, bz - az
+            vx, vy, vz = cx - ax, cy - ay, cz - az
+            nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+            length = (nx * nx + ny * ny + nz * nz) ** 0.5 or 1.0
+            normal_array.extend((nx / length, ny / length, nz / length) * 3)
+
+    geometry_id = FbxId(1000000)
+    model_id = FbxId(1000001)
+
+    year, month, day, hour, minute, second = FBX_CREATION_TIMESTAMP
+    return [
+        fbx_node("FBXHeaderExtension", children=[
+            fbx_node("FBXHeaderVersion", (1003,)),
+            fbx_node("FBXVersion", (FBX_VERSION,)),
+            fbx_node("EncryptionType", (0,)),
+            fbx_node("CreationTimeStamp", children=[
+                fbx_node("Version", (1000,)),
+                fbx_node("Year", (year,)),
+                fbx_node("Month", (month,)),
+                fbx_node("Day", (day,)),
+                fbx_node("Hour", (hour,)),
+                fbx_node("Minute", (minute,)),
+                fbx_node("Second", (second,)),
+                fbx_node("Millisecond", (0,)),
+            ]),
+            fbx_node("Creator", ("ROS2UE5-tools native STL converter",)),
+        ]),
+        fbx_node("FileId", (FBX_FILE_ID,)),
+        fbx_node("CreationTime", (FBX_TIME_ID,)),
+        fbx_node("Creator", ("ROS2UE5-tools native STL converter",)),
+        fbx_node("GlobalSettings", children=[
+            fbx_node("Version", (1000,)),
+            fbx_node("Properties70", children=[
+                # Right-handed, Z-up like ROS and Blender; units are meters (100 cm)
+                fbx_property70("UpAxis", "int", "Integer", "", 2),
+                fbx_property70("UpAxisSign", "int", "Integer", "", 1),
+                fbx_property70("FrontAxis", "int", "Integer", "", 1),
+                fbx_property70("FrontAxisSign", "int", "Integer", "", -1),
+                fbx_property70("CoordAxis", "int", "Integer", "", 0),
+                fbx_property70("CoordAxisSign", "int", "Integer", "", 1),
+                fbx_property70("OriginalUpAxis", "int", "Integer", "", 2),
+                fbx_property70("OriginalUpAxisSign", "int", "Integer", "", 1),
+                fbx_property70("UnitScaleFactor", "double", "Number", "", 100.0),
+                fbx_property70("OriginalUnitScaleFactor", "double", "Number", "", 100.0),
+            ]),
+        ]),
+        fbx_node("Documents", children=[fbx_node("Count", (0,))]),
+        fbx_node("References"),
+        fbx_node("Definitions", children=[
+            fbx_node("Version", (100,)),
+            fbx_node("Count", (3,)),
+            fbx_node("ObjectType", ("GlobalSettings",), [fbx_node("Count", (1,))]),
+            fbx_node("ObjectType", ("Model",), [fbx_node("Count", (1,))]),
+            fbx_node("ObjectType", ("Geometry",), [fbx_node("Count", (1,))]),
+        ]),
+        fbx_node("Objects", children=[
+            fbx_node("Geometry", (geometry_id, f"{name}\x00\x01Geometry", "Mesh"), [
+                fbx_node("Properties70"),
+                fbx_node("GeometryVersion", (124,)),
+                fbx_node("Vertices", (("d", vertex_array),)),
+                fbx_node("PolygonVertexIndex", (("i", polygon_array),)),
+                fbx_node("LayerElementNormal", (0,), [
+                    fbx_node("Version", (101,)),
+                    fbx_node("Name", ("",)),
+                    fbx_node("MappingInformationType", ("ByPolygonVertex",)),
+                    fbx_node("ReferenceInformationType", ("Direct",)),
+                    fbx_node("Normals", (("d", normal_array),)),
+                ]),
+                fbx_node("Layer", (0,), [
+                    fbx_node("Version", (100,)),
+                    fbx_node("LayerElement", children=[
+                        fbx_node("Type", ("LayerElementNormal",)),
+                        fbx_node("TypedIndex", (0,)),
+                    ]),
+                ]),
+            ]),
+            fbx_node("Model", (model_id, f"{name}\x00\x01Model", "Mesh"), [
+                fbx_node("Version", (232,)),
+                fbx_node("Properties70", children=[
+                    fbx_property70("DefaultAttributeIndex", "int", "Integer", "", 0),
+                ]),
+                fbx_node("Shading", (True,)),
+                fbx_node("Culling", ("CullingOff",)),
+            ]),
+        ]),
+        fbx_node("Connections", children=[
+            fbx_node("C", ("OO", geometry_id, model_id)),
+            fbx_node("C", ("OO", model_id, FbxId(0))),
+        ]),
+    ]
+
+FBX_SCALAR_FORMATS = {b"Y": "<h", b"C": "<?", b"I": "<i", b"F": "<f", b"D": "<d", b"L": "<q"}
+FBX_ARRAY_FORMATS = {b"b": "?", b"i": "i", b"l": "q", b"f": "f", b"d": "d"}
+
+def decode_fbx_property(data, offset):
+    """Decode one FBX node property at offset. Returns the value (arrays as lists) and the next offset."""
+    type_code = data[offset:offset + 1]
+    offset += 1
+    if type_code in FBX_SCALAR_FORMATS:
+        value, = struct.unpack_from(FBX_SCALAR_FORMATS[type_code], data, offset)
+        return value, offset + struct.calcsize(FBX_SCALAR_FORMATS[type_code])
+    if type_code in (b"S", b"R"):
+        length, = struct.unpack_from("<I", data, offset)
+        value = bytes(data[offset + 4:offset + 4 + length])
+        return value.decode('utf-8') if type_code == b"S" else value, offset + 4 + length
+    if type_code in FBX_ARRAY_FORMATS:
+        count, encoding, length = struct.unpack_from("<3I", data, offset)
+        payload = bytes(data[offset + 12:offset + 12 + length])
+        if encoding == 1:
+            payload = zlib.decompress(payload)
+        return list(struct.unpack(f"<{count}{FBX_ARRAY_FORMATS[type_code]}", payload)), offset + 12 + length
+    raise ValueError(f"Unknown FBX property type {type_code!r} at offset {offset - 1}")
+
+def decode_fbx_nodes(data, offset, end):
+    """Decode the nodes from offset up to a null record or end. Returns them and the offset after them."""
+    nodes = []
+    while offset < end:
+        end_offset, property_count, _, name_length = struct.unpack_from("<3IB", data, offset)
+        if end_offset == 0:
+            return nodes, offset + len(FBX_NULL_RECORD)
+        if end_offset > end:
+            raise ValueError(f"FBX node at offset {offset} ends after its parent")
+        offset += 13
+        name = bytes(data[offset:offset + name_length]).decode('ascii')
+        offset += name_length
+        properties = []
+        for _ in range(property_count):
+            value, offset = decode_fbx_property(data, offset)
+            properties.append(value)
+        children, offset = decode_fbx_nodes(data, offset, end_offset)
+        if offset != end_offset:
+            raise ValueError(f"FBX node {name} ends at offset {offset}, its header says {end_offset}")
+        nodes.append(fbx_node(name, tuple(properties), children))
+    return nodes, offset
+
+def read_fbx(filepath):
+    """Read the node tree of a binary FBX file as (name, properties, children) tuples, like fbx_node."""
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    if not data.startswith(FBX_HEAD_MAGIC):
+        raise ValueError(f"{filepath} is not a binary FBX file")
+    try:
+        nodes, _ = decode_fbx_nodes(data, len(FBX_HEAD_MAGIC) + 4, len(data))
+    except (struct.error, zlib.error) as e:
+        raise ValueError(f"{filepath} is not a valid FBX file: {e}")
+    return nodes
+
+def find_fbx_node(nodes, *path):
+    """Return the first node at a path of node names, or None."""
+    for node in nodes:
+        if node[0] == path[0]:
+            return node if len(path) == 1 else find_fbx_node(node[2], *path[1:])
+    return None
+
+def check_fbx(filepath_fbx, filepath_stl):
+    """
+    Read back an FBX written from an STL and compare its mesh with the STL's.
+    Returns a list of mismatches (empty if the FBX matches).
+    """
+    vertices, triangles = read_stl(filepath_stl)
+    nodes = read_fbx(filepath_fbx)
+    geometry = find_fbx_node(nodes, "Objects", "Geometry")
+    if geometry is None:
+        return [f"{filepath_fbx} has no geometry"]
+    vertex_array = find_fbx_node(geometry[2], "Vertices")[1][0]
+    polygon_array = find_fbx_node(geometry[2], "PolygonVertexIndex")[1][0]
+    normal_array = find_fbx_node(geometry[2], "LayerElementNormal", "Normals")[1][0]
+
+    errors = []
+    if len(vertex_array) != 3 * len(vertices):
+        errors.append(f"{len(vertex_array) // 3} vertices, the STL has {len(vertices)} (welded)")
+    elif vertex_array != [float(value) for vertex in vertices for value in vertex]:
+        errors.append("vertex positions differ from the STL's")
+    if len(polygon_array) != 3 * len(triangles):
+        errors.append(f"{len(polygon_array)} polygon vertex indices, the STL has {len(triangles)} triangles")
+    if len(normal_array) != 3 * len(polygon_array):
+        errors.append(f"{len(normal_array) // 3} normals for {len(polygon_array)} polygon vertices")
+    # Every triangle ends with a negative (bitwise inverted) index
+    if any((index < 0) != (position % 3 == 2) for position, index in enumerate(polygon_array)):
+        errors.append("polygons are not all triangles")
+    if any(not 0 <= (index if index >= 0 else ~index) < len(vertex_array) // 3 for index in polygon_array):
+        errors.append("polygon vertex indices out of range")
+    return errors
+
+def write_fbx(filepath, name, vertices, triangles):
+    """Write a binary FBX 7.4 file containing one mesh."""
+    data = bytearray(FBX_HEAD_MAGIC + struct.pack("<I", FBX_VERSION))
+    nodes = fbx_mesh_nodes(name, vertices, triangles)
+    for index, node in enumerate(nodes):
+        data += encode_fbx_node(node, len(data), index == len(nodes) - 1)
+    data += FBX_NULL_RECORD
+
+    # Footer, laid out like the FBX SDK writes it
+    data += FBX_FOOT_ID + b"\x00" * 4
+    padding = ((len(data) + 15) & ~15) - len(data)
+    data += b"\x00" * (padding or 16)
+    data += struct.pack("<I", FBX_VERSION) + b"\x00" * 120 + FBX_FOOT_MAGIC
+
+    # Write to a temporary file first, so readers never see a partial FBX
+    tmp_filepath = filepath + ".tmp"
+    with open(tmp_filepath, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_filepath, filepath)
+
+def convert_stl(filepath_src, filepath_dst):
+    """Convert an STL file to FBX without Blender. Returns the number of triangles written."""
+    vertices, triangles = read_stl(filepath_src)
+    name = os.path.splitext(os.path.basename(filepath_src))[0]
+    write_fbx(filepath_dst, name, vertices, triangles)
+    return len(triangles)
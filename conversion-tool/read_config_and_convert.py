@@ -1,9 +1,41 @@
+import argparse
 import json
 import os
+import queue
 import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# The config schema lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asset_cache import LINK_MODES, AssetCache
+from config_schema import print_errors, validate_scenario_config
+from log_collector import collector_from_config
+from conversion_manifest import (
+    RESULTS_LOG,
+    RESULT_PREFIX,
+    append_result,
+    get_blender_version,
+    load_failed_files,
+    load_manifest,
+    plan_conversions,
+    record_conversion,
+    output_path_for,
+    result_record,
+    save_manifest,
+)
+from native_stl import NATIVE_CONVERTER_VERSION, convert_stl
+from robot_bundle import BUNDLE_EXTENSION, BundleError, build_bundle, bundle_path_for
+from robot_description import referenced_mesh_files
 
 # The path to the Python script that needs to be run via Blender
-CONVERT_SCRIPT_PATH = "conversion-tool/convert_to_fbx.py"
+CONVERT_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "convert_to_fbx.py")
+
+# The manifest is saved at most this often while results come in, so an interrupted run keeps its progress
+MANIFEST_SAVE_INTERVAL = 5.0
 
 def is_robot_a_file(robot_name):
     """Check if the robot name is a file path to an .sdf or .urdf file."""
@@ -17,65 +49,534 @@ def get_file_directory(file_path):
     """Extract the directory from the file path."""
     return os.path.dirname(file_path)
 
-def check_blender_installed():
-    """Check if Blender is installed on the system by calling it."""
-    try:
-        subprocess.run(['blender', '--version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return False
-
 def prompt_blender_install():
     """Prompt the user to install Blender if it's not found."""
     print("Blender is not installed. Please install Blender from: https://www.blender.org/download/")
 
-def run_blender_command(directory_path):
-    """Run the Blender command to convert the file using the specified script."""
+def start_blender_server(on_output=None):
+    """Start a long-lived Blender process that converts the mesh files sent to it."""
+    process = subprocess.Popen([
+        'blender', '--background', '--python', CONVERT_SCRIPT_PATH, '--', '--serve'
+    ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+
+    # The server announces itself once Blender has finished starting up
+    if read_server_result(process, on_output) is None:
+        process.wait()
+        raise RuntimeError(f"Blender conversion server exited during startup (code {process.returncode})")
+    return process
+
+def read_server_result(process, on_output=None):
+    """
+    Read Blender's output until the next result line. Returns None if Blender exited.
+
+    Blender's own output lines are passed to on_output, if given, and skipped otherwise.
+    """
+    for line in process.stdout:
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+        if on_output is not None:
+            on_output(line.rstrip())
+    return None
+
+def stop_blender_server(process):
+    """Close the job pipe so the server exits, and wait for it."""
+    process.stdin.close()
+    process.wait()
+
+def convert_with_server(process, job, on_output=None):
+    """Send one conversion job to a Blender server and wait for its result. Returns None if Blender crashed."""
     try:
-        # Run Blender in background mode with the given Python script
-        result = subprocess.run([
-            'blender', '--background', '--python', CONVERT_SCRIPT_PATH, '--', directory_path
-        ], check=True, capture_output=True)
-        print(f"Processed {directory_path} with Blender (output hidden).")
-    except subprocess.CalledProcessError as e:
-        print(f"Error occurred while running Blender command: {e.stderr.decode('utf-8')}")
-
-def process_config():
-    """Main function to process the config.json file."""
-    config_file = "config.json"
+        process.stdin.write(json.dumps(job) + "\n")
+        process.stdin.flush()
+    except BrokenPipeError:
+        return None
+    return read_server_result(process, on_output)
 
-    # Read the config.json file
-    if not os.path.exists(config_file):
-        print(f"Error: {config_file} not found.")
-        return
+def run_server_worker(jobs, on_result, logs=None):
+    """
+    Feed jobs from the queue to one Blender server, restarting it if it crashes.
 
-    with open(config_file, 'r') as f:
-        config = json.load(f)
+    If logs is given, Blender's output is shipped to it, tagged with the mesh being converted.
+    """
+    process = None
+    current = {}
+    on_output = None
+    if logs is not None:
+        worker = threading.current_thread().name
+        on_output = lambda text: logs.emit_line(text, Source="blender", Worker=worker, Mesh=current.get("src"))
+    while True:
+        try:
+            job = jobs.get_nowait()
+        except queue.Empty:
+            break
 
-    # Check if Blender is installed
-    if not check_blender_installed():
-        prompt_blender_install()
-        return
+        filepath_src = job["src"]
+        current["src"] = filepath_src
+        start_time = time.monotonic()
+        result = None
+        try:
+            if process is None:
+                process = start_blender_server(on_output)
+            result = convert_with_server(process, job, on_output)
+            if result is None:
+                process.wait()
+                process = None
+                result = result_record(filepath_src, False, [f"Error: Blender exited while converting {filepath_src}"],
+                                       time.monotonic() - start_time)
+        except (OSError, RuntimeError, ValueError) as e:
+            result = result_record(filepath_src, False, [f"Error: {e}"], time.monotonic() - start_time)
+        on_result(result)
 
-    # Check each robot's name in the robots array
-    robots = config.get("robots", [])
+    if process is not None:
+        stop_blender_server(process)
+
+class ConversionProgress:
+    """
+    Reports conversion results as they arrive from any worker: a progress line with the
+    throughput so far, a record in the results log and the on_result callback.
+    """
+
+    def __init__(self, total, on_result=None):
+        self.total = total
+        self.on_result = on_result
+        self.results = []
+        self.source_bytes = 0
+        self.start_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add(self, result):
+        with self.lock:
+            self.results.append(result)
+            try:
+                self.source_bytes += os.path.getsize(result["src"])
+            except OSError:
+                pass
+            append_result(result)
+            if self.on_result is not None:
+                self.on_result(result)
+
+            done = len(self.results)
+            rate = done / max(time.monotonic() - self.start_time, 1e-6)
+            details = f"{result['duration']:.1f}s" if result.get("duration") is not None else ""
+            if result.get("triangle_count") is not None:
+                details += f", {result['triangle_count']} triangles"
+            status = "OK" if result["ok"] else "FAILED"
+            print(f"[{done}/{self.total}] {status} {result['src']}" + (f" ({details})" if details else "")
+                  + f" - {rate:.2f} files/s, ETA {(self.total - done) / rate:.0f}s", flush=True)
+            if not result["ok"]:
+                print(f"    {result.get('error')}", flush=True)
+
+    def throughput(self):
+        """Return a summary of the files and source megabytes converted per second."""
+        elapsed = max(time.monotonic() - self.start_time, 1e-6)
+        return (f"{len(self.results) / elapsed:.2f} files/s, "
+                f"{self.source_bytes / 1024 ** 2 / elapsed:.2f} MiB/s of source meshes")
+
+def run_blender_workers(mesh_files, worker_count, job_settings=None, logs=None, progress=None):
+    """
+    Convert mesh_files with up to worker_count Blender servers running in parallel.
+
+    Jobs are handed out largest file first to whichever server is idle, so the load stays
+    balanced. job_settings optionally maps a mesh file to extra job options (LODs, convex
+    collision). Blender's output is shipped to the log collector logs, if given.
+    Every result is reported to progress as soon as it arrives. Returns the per-file
+    result records of all servers.
+    """
+    job_settings = job_settings or {}
+    jobs = queue.Queue()
+    for filepath_src in sorted(mesh_files, key=os.path.getsize, reverse=True):
+        jobs.put(dict(job_settings.get(filepath_src, {}), src=filepath_src))
+
+    worker_count = max(1, min(worker_count, len(mesh_files)))
+    print(f"Converting {len(mesh_files)} mesh file(s) with {worker_count} Blender worker(s)...")
+
+    results = []
+    lock = threading.Lock()
+    progress = progress or ConversionProgress(len(mesh_files))
+
+    def on_result(result):
+        with lock:
+            results.append(result)
+        progress.add(result)
+
+    workers = [threading.Thread(target=run_server_worker, args=(jobs, on_result, logs), name=f"blender{index}")
+               for index in range(worker_count)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+def collect_robot_files(robots):
+    """Return the distinct .sdf/.urdf files of all robots that reference an existing description file."""
+    description_files = []
     for robot in robots:
         robot_name = robot.get("robot", "")
 
-        if is_robot_a_file(robot_name):
+        if robot_name.lower().endswith(BUNDLE_EXTENSION):
+            print(f"Robot '{robot_name}' is a robot bundle, its meshes are already converted.")
+        elif is_robot_a_file(robot_name):
             print(f"Robot '{robot_name}' appears to be a file path.")
 
             # Check if the file exists
             if check_file_exists(robot_name):
                 print(f"File '{robot_name}' exists.")
-                directory_path = get_file_directory(robot_name)
-                print(f"Passing directory '{directory_path}' to Blender.")
-
-                run_blender_command(directory_path)
+                if robot.get("fleet"):
+                    print(f"'{robot_name}' is a fleet, its meshes are converted once for all instances.")
+                if robot_name not in description_files:
+                    description_files.append(robot_name)
             else:
                 print(f"Error: File '{robot_name}' does not exist.")
         else:
             print(f"Robot '{robot_name}' is not a file path, skipping.")
+    return description_files
+
+def convert_natively(filepath_src):
+    """Convert an STL file without Blender and return a result record like the Blender servers do."""
+    start_time = time.monotonic()
+    filepath_dst = output_path_for(filepath_src)
+    try:
+        triangles = convert_stl(filepath_src, filepath_dst)
+        return result_record(filepath_src, True,
+                             [f"Converted {filepath_src} -> {filepath_dst} ({triangles} triangles) natively"],
+                             time.monotonic() - start_time, triangles)
+    except (OSError, ValueError) as e:
+        return result_record(filepath_src, False, [f"Error during native STL conversion for {filepath_src}: {e}"],
+                             time.monotonic() - start_time)
+
+def run_native_workers(mesh_files, worker_count, progress=None):
+    """Convert STL files without Blender using up to worker_count processes, reporting each result to progress."""
+    print(f"Converting {len(mesh_files)} STL file(s) natively...")
+    progress = progress or ConversionProgress(len(mesh_files))
+    results = []
+    if worker_count <= 1 or len(mesh_files) <= 1:
+        for filepath_src in mesh_files:
+            results.append(convert_natively(filepath_src))
+            progress.add(results[-1])
+        return results
+    with ProcessPoolExecutor(max_workers=min(worker_count, len(mesh_files))) as executor:
+        futures = {executor.submit(convert_natively, filepath_src): filepath_src for filepath_src in mesh_files}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # A worker process died; the other files are not affected
+                result = result_record(futures[future], False, [f"Error: native conversion worker failed: {e}"])
+            results.append(result)
+            progress.add(result)
+    return results
+
+def lod_job_settings(lod_config, roles):
+    """Translate a robot's "lod" config entry into the job options for a mesh used in the given roles."""
+    settings = {}
+    if not lod_config:
+        return settings
+    if "visual" in roles and lod_config.get("triangles"):
+        settings["lod"] = {"triangles": sorted(lod_config["triangles"], reverse=True)}
+    if "collision" in roles and lod_config.get("convexCollision"):
+        settings["collision"] = {"triangles": lod_config.get("collisionTriangles")}
+    return settings
+
+def choose_backends(mesh_files, job_settings, backend):
+    """
+    Mark the meshes that can be converted without Blender.
+
+    With the "auto" backend, STL files are converted natively unless they need the
+    Blender-only LOD or convex collision stages.
+    """
+    if backend != "auto":
+        return
+    for filepath_src in mesh_files:
+        settings = job_settings[filepath_src]
+        if filepath_src.lower().endswith(".stl") and not settings:
+            settings.update(backend="native", native_version=NATIVE_CONVERTER_VERSION)
+
+def collect_referenced_meshes(description_files, lod_configs=None):
+    """
+    Build the deduplicated list of meshes referenced by the description files, so shared meshes are converted once.
+
+    lod_configs optionally maps a description file to its robot's "lod" config. Returns the
+    mesh files and a dict with the per-file job settings derived from it.
+    """
+    lod_configs = lod_configs or {}
+    mesh_files = []
+    job_settings = {}
+    for description_file in description_files:
+        referenced, unresolved = referenced_mesh_files(description_file)
+        print(f"'{description_file}' references {len(referenced)} mesh file(s).")
+        for uri in unresolved:
+            print(f"Warning: Could not resolve mesh '{uri}' referenced by '{description_file}'.")
+        for filepath_src, roles in referenced.items():
+            settings = lod_job_settings(lod_configs.get(description_file), roles)
+            if filepath_src not in job_settings:
+                mesh_files.append(filepath_src)
+                job_settings[filepath_src] = settings
+            elif job_settings[filepath_src] != settings:
+                print(f"Warning: '{filepath_src}' is shared by robots with different LOD settings, using the first.")
+    return mesh_files, job_settings
+
+def print_triangle_report(results):
+    """Print the triangle counts before and after decimation of every mesh that has LODs or convex collision."""
+    rows = [result for result in results if result["ok"] and result.get("triangles")]
+    if not rows:
+        return
+    print("Triangle counts:")
+    for result in rows:
+        counts = ", ".join(f"{level}: {count}" for level, count in result["triangles"].items())
+        print(f"    {os.path.basename(result['src'])}: {counts}")
+
+def restore_from_cache(cache, manifest, stale):
+    """Place the cached conversions of stale meshes into the source tree. Returns the meshes still to convert."""
+    remaining = []
+    for filepath_src, src_hash, key in stale:
+        extra_outputs = cache.restore(key, filepath_src)
+        if extra_outputs is None:
+            remaining.append((filepath_src, src_hash, key))
+        else:
+            record_conversion(manifest, filepath_src, src_hash, key, extra_outputs)
+    if len(remaining) < len(stale):
+        print(f"{len(stale) - len(remaining)} mesh file(s) restored from the asset cache {cache.root}.")
+    return remaining
+
+def seed_cache(cache, manifest, mesh_files, stale):
+    """
+    Store the outputs of up-to-date meshes whose key is not in the cache yet, so an already
+    converted tree fills a new or shared cache without converting anything.
+    """
+    stale_files = {filepath_src for filepath_src, _, _ in stale}
+    stored = 0
+    for filepath_src in mesh_files:
+        if filepath_src in stale_files:
+            continue
+        entry = manifest["files"][filepath_src]
+        outputs = [entry.get("output", output_path_for(filepath_src))] + entry.get("extra_outputs", [])
+        if cache.store(entry["key"], filepath_src, outputs):
+            stored += 1
+    if stored:
+        print(f"{stored} up-to-date mesh file(s) added to the asset cache {cache.root}.")
+
+def write_bundles(description_files, bundle_dir, manifest):
+    """Pack every description file and its converted meshes into a bundle in bundle_dir. Returns True on success."""
+    ok = True
+    for description_file in description_files:
+        bundle_file = bundle_path_for(description_file, bundle_dir)
+        try:
+            if build_bundle(description_file, bundle_file, manifest):
+                print(f"Wrote robot bundle {bundle_file}.")
+            else:
+                print(f"Robot bundle {bundle_file} is up to date.")
+        except (OSError, BundleError) as e:
+            print(f"Error: could not bundle '{description_file}': {e}")
+            ok = False
+    return ok
+
+def process_config(config_file="config.json", jobs=None, backend="auto", use_cache=True, cache_dir=None,
+                   cache_size=None, cache_link=None, resume=False, robots=None, bundle_dir=None):
+    """
+    Main function to process the config.json file.
+
+    With robots (a list of robot entries), only their meshes are converted instead of the
+    meshes of every robot of the config. With bundle_dir, every converted robot is packed
+    into a robot bundle there (see robot_bundle.py).
+
+    Every file is converted in isolation: its result is recorded as soon as it arrives, so
+    one bad mesh or an interrupted run does not lose the other conversions. With resume,
+    only the files whose last conversion failed (according to the results log) are retried;
+    the other stale files are left alone, so the run fails (and no bundles are written) while
+    there are any.
+
+    Converted meshes are shared through the asset cache (see asset_cache.py), unless
+    use_cache is off: meshes converted before, by any checkout using the same cache, are
+    linked into the tree instead of being converted again.
+
+    Returns True if every referenced mesh is converted and up to date.
+    """
+    # Read the config.json file
+    if not os.path.exists(config_file):
+        print(f"Error: {config_file} not found.")
+        return False
+
+    with open(config_file, 'r') as f:
+        config = json.load(f)
+
+    # Check the robots and their meshes before any Blender process is started
+    if not print_errors(validate_scenario_config(config, config_file)):
+        return False
+
+    # Collect the meshes referenced by the robots' description files
+    if robots is None:
+        robots = config.get("robots", [])
+    description_files = collect_robot_files(robots)
+    lod_configs = {}
+    for robot in robots:
+        if robot.get("lod"):
+            lod_configs.setdefault(robot.get("robot", ""), robot["lod"])
+    mesh_files, job_settings = collect_referenced_meshes(description_files, lod_configs)
+    choose_backends(mesh_files, job_settings, backend)
+
+    # Compare the meshes against the conversion manifest. Blender is only queried
+    # if its executable changed; if it is missing, the last known version is used.
+    manifest = load_manifest()
+    installed_version = get_blender_version(manifest)
+    blender_version = installed_version or manifest["blender"].get("version")
+    stale, skipped = plan_conversions(manifest, mesh_files, blender_version, job_settings)
+    cache = None
+    if use_cache:
+        try:
+            cache = AssetCache.open(cache_dir, cache_size, cache_link)
+        except OSError as e:
+            # The cache only saves time, the meshes can still be converted without it
+            print(f"Warning: The asset cache is not available, converting without it: {e}")
+    if cache is not None:
+        seed_cache(cache, manifest, mesh_files, stale)
+        if stale:
+            stale = restore_from_cache(cache, manifest, stale)
+    # Stale files that --resume leaves alone; the tree is not up to date while there are any
+    left_alone = 0
+    if resume:
+        failed_before = load_failed_files()
+        retried = [entry for entry in stale if entry[0] in failed_before]
+        left_alone = len(stale) - len(retried)
+        print(f"Resuming: retrying {len(retried)} mesh file(s) that failed before, "
+              f"leaving {left_alone} other stale file(s) alone.")
+        stale = retried
+    print(f"{skipped} mesh file(s) up to date, {len(stale)} to convert.")
+    if not stale:
+        save_manifest(manifest)
+        if left_alone:
+            print(f"Error: {left_alone} mesh file(s) are still not converted; run without --resume to convert them.")
+            return False
+        return write_bundles(description_files, bundle_dir, manifest) if bundle_dir else True
+    if cache is not None:
+        for filepath_src, _, _ in stale:
+            entry = manifest["files"].get(filepath_src, {})
+            cache.detach([output_path_for(filepath_src)] + entry.get("extra_outputs", []))
+
+    native_files = [filepath_src for filepath_src, _, _ in stale
+                    if job_settings[filepath_src].get("backend") == "native"]
+    blender_files = [filepath_src for filepath_src, _, _ in stale
+                     if job_settings[filepath_src].get("backend") != "native"]
+
+    # Check if Blender is installed. Meshes that don't need it are still converted.
+    if blender_files and installed_version is None:
+        prompt_blender_install()
+        print(f"Skipping {len(blender_files)} mesh file(s) that need Blender.")
+        skipped_blender_files = blender_files
+        blender_files = []
+        if not native_files:
+            return False
+    else:
+        skipped_blender_files = []
+
+    start_time = time.time()
+    worker_count = jobs or os.cpu_count() or 1
+    results = []
+    keys = {filepath_src: (src_hash, key) for filepath_src, src_hash, key in stale}
+    logs = collector_from_config(config.get("logging"), {"Application": "read_config_and_convert"})
+    last_save = [time.monotonic()]
+
+    def on_result(result):
+        # Record every mesh as soon as it is converted successfully
+        if result["ok"]:
+            src_hash, key = keys[result["src"]]
+            record_conversion(manifest, result["src"], src_hash, key, result.get("extra_outputs", []))
+            if cache is not None:
+                cache.store(key, result["src"], [output_path_for(result["src"])] + result.get("extra_outputs", []))
+            if time.monotonic() - last_save[0] >= MANIFEST_SAVE_INTERVAL:
+                save_manifest(manifest)
+                last_save[0] = time.monotonic()
+        if logs is not None:
+            logs.emit(f"{'Converted' if result['ok'] else 'Failed to convert'} {result['src']}",
+                      "Information" if result["ok"] else "Error", Mesh=result["src"], Status=result["status"],
+                      Duration=result.get("duration"), Triangles=result.get("triangle_count"),
+                      Error=result.get("error"))
+
+    progress = ConversionProgress(len(native_files) + len(blender_files), on_result)
+    try:
+        if native_files:
+            results.extend(run_native_workers(native_files, worker_count, progress))
+        if blender_files:
+            results.extend(run_blender_workers(blender_files, worker_count, job_settings, logs, progress))
+    finally:
+        save_manifest(manifest)
+        if logs is not None:
+            logs.close()
+
+    failed = [result for result in results if not result["ok"]]
+    if cache is not None:
+        freed = cache.prune()
+        if freed:
+            print(f"Evicted {freed / 1024 ** 2:.1f} MiB of least recently used meshes from the asset cache.")
+    print_triangle_report(results)
+
+    # Report the merged results of all workers
+    print(f"Converted {len(results) - len(failed)} of {len(results)} mesh file(s) in {time.time() - start_time:.1f}s "
+          f"({progress.throughput()}).")
+    for result in failed:
+        print(f"Error: '{result['src']}' was not converted.")
+        for message in result["messages"]:
+            print(f"    {message}")
+    if failed:
+        print(f"Per-file results are in {RESULTS_LOG}; retry the failed files with --resume.")
+    if left_alone:
+        print(f"Error: {left_alone} mesh file(s) were left alone by --resume; run without --resume to convert them.")
+    if failed or skipped_blender_files or left_alone:
+        return False
+    return write_bundles(description_files, bundle_dir, manifest) if bundle_dir else True
 
 if __name__ == "__main__":
-    process_config()
+    parser = argparse.ArgumentParser(description="Convert the robot meshes referenced in config.json to FBX")
+    parser.add_argument(
+        "--config",
+        type=str,
+        default="config.json",
+        help="Path to the config file (default: config.json)"
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=None,
+        help="Number of parallel Blender conversion servers (default: number of CPU cores)"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["auto", "blender"],
+        default="auto",
+        help="auto: convert plain STL files without Blender, blender: convert every mesh with Blender (default: auto)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Shared cache of converted meshes (default: $ROS2UE5_ASSET_CACHE or ~/.cache/ros2ue5/fbx)"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=str,
+        default=None,
+        help="Size the cache is pruned to after converting, e.g. 20G (default: $ROS2UE5_ASSET_CACHE_SIZE or 10G)"
+    )
+    parser.add_argument(
+        "--cache-link",
+        choices=LINK_MODES,
+        default=None,
+        help="How cached meshes are placed into the source tree (default: $ROS2UE5_ASSET_CACHE_LINK or hardlink)"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the asset cache")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Only retry the meshes whose last conversion failed"
+    )
+    parser.add_argument(
+        "--bundle-dir",
+        type=str,
+        default=None,
+        help=f"Also pack every robot into a {BUNDLE_EXTENSION} file in this directory"
+    )
+    args = parser.parse_args()
+
+    if not process_config(config_file=args.config, jobs=args.jobs, backend=args.backend, use_cache=not args.no_cache,
+                          cache_dir=args.cache_dir, cache_size=args.cache_size, cache_link=args.cache_link,
+                          resume=args.resume, bundle_dir=args.bundle_dir):
+        sys.exit(1)
@@ -0,0 +1,384 @@
+"""
+Packed robot bundles: one file per robot description with its kinematic tree and converted meshes.
+
+Layout (little-endian), with every section starting at a multiple of ALIGNMENT bytes:
+
+    header   magic "R2UEBNDL", format version (u16), flags (u16), entry count (u32),
+             index offset (u64), index size (u64)
+    index    per entry: kind (u16), name length (u16), CRC-32 (u32), offset (u64), size (u64),
+             followed by the UTF-8 name, padded to 8 bytes
+    data     the entries: the JSON metadata first, then the FBX files
+
+A loader reads the header and the index, and can then memory-map the file and read any
+single mesh without touching the others.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from conversion_manifest import MESH_EXTENSIONS, file_sha256, load_manifest, output_path_for
+from robot_description import resolve_mesh_uri, robot_joints, robot_links, robot_name
+
+BUNDLE_EXTENSION = ".robotbundle"
+MAGIC = b"R2UEBNDL"
+# Bump whenever the layout or the metadata changes incompatibly
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHIQQ")
+ENTRY = struct.Struct("<HHIQQ")
+ALIGNMENT = 64
+
+# Entry kinds: the JSON metadata, converted meshes and their extra outputs (LODs, convex collision)
+KIND_METADATA = 0
+KIND_MESH = 1
+KIND_EXTRA = 2
+KIND_NAMES = {KIND_METADATA: "metadata", KIND_MESH: "mesh", KIND_EXTRA: "extra"}
+METADATA_ENTRY = "metadata.json"
+
+class BundleError(Exception):
+    """Raised when a bundle cannot be built or read."""
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def align_name(length):
+    return (length + 7) // 8 * 8
+
+def bundle_path_for(description_file, bundle_dir):
+    """Return the path of the bundle a description file is packed into."""
+    name = os.path.splitext(os.path.basename(description_file))[0]
+    if name == "model":
+        # SDF models are usually called model.sdf; use their directory's name instead
+        name = os.path.basename(os.path.dirname(os.path.abspath(description_file)))
+    return os.path.join(bundle_dir, name + BUNDLE_EXTENSION)
+
+def entry_name(path, base_dir):
+    return os.path.relpath(path, base_dir).replace(os.sep, "/")
+
+def collect_bundle(description_file, manifest=None):
+    """
+    Collect the metadata and mesh files of a description file's bundle.
+
+    Every mesh must have been converted to FBX. Returns the metadata and a list of
+    (kind, name, path) of the files to pack.
+    """
+    base_dir = os.path.dirname(os.path.abspath(description_file))
+    files = {}
+    meshes = {}
+    links = robot_links(description_file)
+    for link in links:
+        for role in ("visual", "collision"):
+            for geometry in link[role]:
+                filepath_src = resolve_mesh_uri(geometry["uri"], description_file)
+                if filepath_src is None:
+                    raise BundleError(f"Mesh '{geometry['uri']}' of link '{link['name']}' not found")
+                filepath_src = os.path.realpath(filepath_src)
+                if not filepath_src.lower().endswith(MESH_EXTENSIONS):
+                    raise BundleError(f"Mesh '{geometry['uri']}' of link '{link['name']}' cannot be converted to FBX")
+                fbx = output_path_for(filepath_src)
+                if not os.path.isfile(fbx):
+                    raise BundleError(f"Mesh '{geometry['uri']}' has not been converted to FBX yet")
+                name = entry_name(fbx, base_dir)
+                geometry["mesh"] = name
+                if name not in meshes:
+                    extras = []
+                    entry = (manifest or {}).get("files", {}).get(filepath_src, {})
+                    for extra_output in entry.get("extra_outputs", []):
+                        if os.path.isfile(extra_output):
+                            extras.append(entry_name(extra_output, base_dir))
+                            files[extras[-1]] = (KIND_EXTRA, extra_output)
+                    meshes[name] = {"source": entry_name(filepath_src, base_dir), "roles": [], "extras": extras}
+                    files[name] = (KIND_MESH, fbx)
+                if role not in meshes[name]["roles"]:
+                    meshes[name]["roles"].append(role)
+
+    joints = robot_joints(description_file)
+    children = {joint["child"] for joint in joints}
+    roots = [link["name"] for link in links if link["name"] not in children]
+    metadata = {
+        "format": FORMAT_VERSION,
+        "robot": robot_name(description_file),
+        "source": os.path.basename(description_file),
+        "root": roots[0] if roots else None,
+        "links": links,
+        "joints": joints,
+        "meshes": meshes,
+        # Hashes of every input, so an unchanged bundle is not written again
+        "inputs": dict({"description": file_sha256(description_file)},
+                       **{name: file_sha256(path) for name, (_, path) in sorted(files.items())}),
+    }
+    return metadata, [(kind, name, path) for name, (kind, path) in files.items()]
+
+def write_bundle(output_file, metadata, files):
+    """Pack the metadata and files ((kind, name, path) tuples) into a bundle."""
+    payloads = [(KIND_METADATA, METADATA_ENTRY, json.dumps(metadata, indent=1).encode('utf-8'), None)]
+    payloads += [(kind, name, None, path) for kind, name, path in files]
+
+    index_size = 0
+    for _, name, _, _ in payloads:
+        index_size += ENTRY.size + align_name(len(name.encode('utf-8')))
+    offset = align(HEADER.size + index_size)
+    entries = []
+    for kind, name, data, path in payloads:
+        size = len(data) if data is not None else os.path.getsize(path)
+        entries.append((kind, name, data, path, offset, size))
+        offset = align(offset + size)
+
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(b"\0" * align(HEADER.size + index_size))
+        index = b""
+        for kind, name, data, path, offset, size in entries:
+            f.seek(offset)
+            if data is None:
+                with open(path, 'rb') as source:
+                    data = source.read()
+                if len(data) != size:
+                    raise BundleError(f"{path} changed while it was packed")
+            f.write(data)
+            encoded = name.encode('utf-8')
+            index += ENTRY.pack(kind, len(encoded), zlib.crc32(data), offset, size)
+            index += encoded.ljust(align_name(len(encoded)), b"\0")
+        f.truncate(align(f.tell()))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(entries), HEADER.size, index_size) + index)
+    os.replace(tmp_file, output_file)
+
+def build_bundle(description_file, output_file, manifest=None):
+    """
+    Pack a description file and its converted meshes into output_file, unless the bundle
+    there was built from the same inputs. Returns True if the bundle was written.
+    """
+    metadata, files = collect_bundle(description_file, manifest)
+    if os.path.exists(output_file):
+        try:
+            with RobotBundle(output_file) as existing:
+                if existing.metadata().get("inputs") == metadata["inputs"]:
+                    return False
+        except BundleError:
+            pass
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    write_bundle(output_file, metadata, files)
+    return True
+
+class RobotBundle:
+    """A memory-mapped bundle. Entries are read on demand and returned as zero-copy memoryviews."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise BundleError(f"{path}: empty file")
+        try:
+            self.version, self.entries = self.read_index()
+        except BundleError:
+            self.close()
+            raise
+        self.cached_metadata = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def read_index(self):
+        if len(self.map) < HEADER.size:
+            raise BundleError(f"{self.path}: too short for a bundle header")
+        magic, version, _, count, index_offset, index_size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise BundleError(f"{self.path}: not a robot bundle")
+        if version > FORMAT_VERSION:
+            raise BundleError(f"{self.path}: bundle format {version} is newer than the supported {FORMAT_VERSION}")
+        if index_offset + index_size > len(self.map):
+            raise BundleError(f"{self.path}: index extends past the end of the file")
+        entries = {}
+        position = index_offset
+        for _ in range(count):
+            if position + ENTRY.size > index_offset + index_size:
+                raise BundleError(f"{self.path}: truncated index")
+            kind, name_length, crc, offset, size = ENTRY.unpack_from(self.map, position)
+            position += ENTRY.size
+            name = bytes(self.map[position:position + name_length]).decode('utf-8')
+            position += align_name(name_length)
+            entries[name] = {"kind": kind, "crc32": crc, "offset": offset, "size": size}
+        return version, entries
+
+    def data(self, name):
+        entry = self.entries.get(name)
+        if entry is None:
+            raise BundleError(f"{self.path}: no entry '{name}'")
+        if entry["offset"] + entry["size"] > len(self.map):
+            raise BundleError(f"{self.path}: entry '{name}' extends past the end of the file")
+        return memoryview(self.map)[entry["offset"]:entry["offset"] + entry["size"]]
+
+    def metadata(self):
+        if self.cached_metadata is None:
+            data = self.data(METADATA_ENTRY)
+            try:
+                self.cached_metadata = json.loads(bytes(data).decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise BundleError(f"{self.path}: invalid metadata: {e}")
+            finally:
+                data.release()
+        return self.cached_metadata
+
+def bundle_joints(path):
+    """Return the joints of a bundle, in the format of robot_description.robot_joints."""
+    with RobotBundle(path) as bundle:
+        return bundle.metadata()["joints"]
+
+def validate_bundle(path):
+    """Check a bundle's layout, checksums and kinematic tree. Returns a list of errors."""
+    try:
+        bundle = RobotBundle(path)
+    except (OSError, BundleError) as e:
+        return [str(e)]
+    errors = []
+    with bundle:
+        ranges = []
+        for name, entry in bundle.entries.items():
+            if entry["kind"] not in KIND_NAMES:
+                errors.append(f"{path}: entry '{name}' has unknown kind {entry['kind']}")
+            try:
+                data = bundle.data(name)
+            except BundleError as e:
+                errors.append(str(e))
+                continue
+            if zlib.crc32(data) != entry["crc32"]:
+                errors.append(f"{path}: entry '{name}' fails its checksum")
+            data.release()
+            ranges.append((entry["offset"], entry["offset"] + entry["size"], name))
+        ranges.sort()
+        for (_, end, name), (start, _, other) in zip(ranges, ranges[1:]):
+            if start < end:
+                errors.append(f"{path}: entries '{name}' and '{other}' overlap")
+        try:
+            metadata = bundle.metadata()
+        except BundleError as e:
+            return errors + [str(e)]
+
+        links = {link["name"] for link in metadata.get("links", [])}
+        children = set()
+        for joint in metadata.get("joints", []):
+            for end in ("parent", "child"):
+                if joint.get(end) not in links and not (end == "parent" and joint.get(end) == "world"):
+                    errors.append(f"{path}: joint '{joint.get('name')}' has unknown {end} link '{joint.get(end)}'")
+            if joint.get("child") in children:
+                errors.append(f"{path}: link '{joint.get('child')}' is the child of more than one joint")
+            children.add(joint.get("child"))
+        if links and not links - children:
+            errors.append(f"{path}: the kinematic tree has no root link")
+        for link in metadata.get("links", []):
+            for role in ("visual", "collision"):
+                for geometry in link.get(role, []):
+                    if geometry.get("mesh") not in bundle.entries:
+                        errors.append(f"{path}: mesh '{geometry.get('mesh')}' of link '{link['name']}' is missing")
+    return errors
+
+def diff_bundles(old_path, new_path):
+    """Return the differences between two bundles as printable lines."""
+    lines = []
+    with RobotBundle(old_path) as old, RobotBundle(new_path) as new:
+        old_metadata, new_metadata = old.metadata(), new.metadata()
+        if old.version != new.version:
+            lines.append(f"~ format: {old.version} -> {new.version}")
+        for key in ("robot", "source", "root"):
+            if old_metadata.get(key) != new_metadata.get(key):
+                lines.append(f"~ {key}: {old_metadata.get(key)} -> {new_metadata.get(key)}")
+        for section in ("links", "joints"):
+            old_items = {item["name"]: item for item in old_metadata.get(section, [])}
+            new_items = {item["name"]: item for item in new_metadata.get(section, [])}
+            for name in old_items:
+                if name not in new_items:
+                    lines.append(f"- {section}/{name}")
+            for name, item in new_items.items():
+                if name not in old_items:
+                    lines.append(f"+ {section}/{name}")
+                    continue
+                for key in sorted(set(item) | set(old_items[name])):
+                    if item.get(key) != old_items[name].get(key):
+                        lines.append(f"~ {section}/{name}.{key}: {json.dumps(old_items[name].get(key))} "
+                                     f"-> {json.dumps(item.get(key))}")
+        for name, entry in old.entries.items():
+            if name == METADATA_ENTRY:
+                continue
+            if name not in new.entries:
+                lines.append(f"- {name}")
+            elif new.entries[name]["crc32"] != entry["crc32"]:
+                lines.append(f"~ {name}: {entry['size']} -> {new.entries[name]['size']} bytes")
+        for name, entry in new.entries.items():
+            if name != METADATA_ENTRY and name not in old.entries:
+                lines.append(f"+ {name} ({entry['size']} bytes)")
+    return lines
+
+def print_bundle(path):
+    with RobotBundle(path) as bundle:
+        metadata = bundle.metadata()
+        print(f"{path}: robot '{metadata.get('robot')}' from {metadata.get('source')}, format {bundle.version}, "
+              f"{os.path.getsize(path) / 1024 ** 2:.1f} MiB")
+        joints = metadata.get("joints", [])
+        print(f"    {len(metadata.get('links', []))} link(s), root '{metadata.get('root')}', {len(joints)} joint(s):")
+        for joint in joints:
+            limits = joint.get("limits", {})
+            limit_text = (f" [{limits['lower']:g}, {limits['upper']:g}]"
+                          if limits.get("lower") is not None and limits.get("upper") is not None else "")
+            print(f"        {joint['name']} ({joint['type']}{limit_text}): {joint['parent']} -> {joint['child']}")
+        print(f"    {len(bundle.entries)} entries:")
+        for name, entry in bundle.entries.items():
+            print(f"        {KIND_NAMES.get(entry['kind'], entry['kind']):<8} {entry['size']:>10}  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, inspect, diff and validate packed robot bundles")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Pack a URDF/SDF file and its converted meshes into a bundle")
+    build.add_argument("description", type=str, help="URDF or SDF file whose meshes have been converted")
+    build.add_argument("--output", "-o", type=str, help=f"Bundle file (default: <name>{BUNDLE_EXTENSION} next to it)")
+    inspect = commands.add_parser("inspect", help="Print the kinematic tree and entries of bundles")
+    inspect.add_argument("bundles", type=str, nargs="+")
+    diff = commands.add_parser("diff", help="Print the differences between two bundles")
+    diff.add_argument("old", type=str)
+    diff.add_argument("new", type=str)
+    validate = commands.add_parser("validate", help="Check the layout, checksums and kinematic tree of bundles")
+    validate.add_argument("bundles", type=str, nargs="+")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            output_file = args.output or bundle_path_for(args.description, os.path.dirname(args.description))
+            if build_bundle(args.description, output_file, load_manifest()):
+                print(f"Wrote {output_file}.")
+            else:
+                print(f"{output_file} is up to date.")
+        elif args.command == "inspect":
+            for path in args.bundles:
+                print_bundle(path)
+        elif args.command == "diff":
+            lines = diff_bundles(args.old, args.new)
+            for line in lines:
+                print(line)
+            if not lines:
+                print("The bundles are identical.")
+        else:
+            errors = [error for path in args.bundles for error in validate_bundle(path)]
+            for error in errors:
+                print(f"Error: {error}")
+            print(f"{len(errors)} error(s) found in {len(args.bundles)} bundle(s).")
+            if errors:
+                sys.exit(1)
+    except (OSError, BundleError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+import math
+import os
+import xml.etree.ElementTree as ET
+
+from conversion_manifest import MESH_EXTENSIONS
+
+# Environment variables listing directories that contain ROS packages / Gazebo models
+PACKAGE_PATH_VARIABLES = ("ROS_PACKAGE_PATH", "AMENT_PREFIX_PATH")
+MODEL_PATH_VARIABLES = ("GAZEBO_MODEL_PATH", "SDF_PATH", "IGN_GAZEBO_RESOURCE_PATH", "GZ_SIM_RESOURCE_PATH")
+
+# Elements whose geometry is used for rendering / for collision
+MESH_ROLES = ("visual", "collision")
+
+def mesh_references(description_file):
+    """
+    Return the mesh URIs referenced by a URDF (<mesh filename=...>) or SDF (<mesh><uri>) file, in order.
+
+    Each reference is a (uri, role) tuple, where role is "visual", "collision" or None.
+    """
+    references = []
+    roles = []
+    for event, element in ET.iterparse(description_file, events=("start", "end")):
+        if element.tag in MESH_ROLES:
+            if event == "start":
+                roles.append(element.tag)
+            else:
+                roles.pop()
+        elif element.tag == "mesh" and event == "end":
+            role = roles[-1] if roles else None
+            if element.get("filename"):
+                references.append((element.get("filename").strip(), role))
+            uri = element.find("uri")
+            if uri is not None and uri.text:
+                references.append((uri.text.strip(), role))
+    return references
+
+def search_directories(variables):
+    """Return the directories listed in the given path-like environment variables."""
+    directories = []
+    for variable in variables:
+        for directory in os.environ.get(variable, "").split(os.pathsep):
+            if directory:
+                directories.append(directory)
+                # Ament prefixes keep their packages in share/
+                directories.append(os.path.join(directory, "share"))
+    return directories
+
+def ancestors(path):
+    """Yield the directory of path and all of its parent directories."""
+    directory = os.path.dirname(os.path.abspath(path))
+    while True:
+        yield directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
+
+def resolve_package_uri(package, relative_path, description_file, variables):
+    """Resolve package://package/relative_path against the environment and the description's parent directories."""
+    for directory in search_directories(variables) + list(ancestors(description_file)):
+        if os.path.basename(directory) == package:
+            candidate = os.path.join(directory, relative_path)
+        else:
+            candidate = os.path.join(directory, package, relative_path)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def resolve_mesh_uri(uri, description_file):
+    """
+    Resolve a mesh URI from a description file to an existing file path, or None.
+
+    Supports package://, model://, file://, absolute paths and paths relative to the
+    description file or any of its parent directories (e.g. panda_description/meshes/...).
+    """
+    if uri.startswith("package://"):
+        package, _, relative_path = uri[len("package://"):].partition("/")
+        return resolve_package_uri(package, relative_path, description_file, PACKAGE_PATH_VARIABLES)
+    if uri.startswith("model://"):
+        model, _, relative_path = uri[len("model://"):].partition("/")
+        return resolve_package_uri(model, relative_path, description_file, MODEL_PATH_VARIABLES)
+    if uri.startswith("file://"):
+        uri = uri[len("file://"):]
+
+    if os.path.isabs(uri):
+        return uri if os.path.isfile(uri) else None
+    for directory in ancestors(description_file):
+        candidate = os.path.join(directory, uri)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def referenced_mesh_files(description_file):
+    """
+    Return the convertible mesh files a description file references and the URIs that could not be resolved.
+
+    The mesh files are a dict mapping each absolute path to the set of roles it is used in,
+    in order of first reference.
+    """
+    mesh_files = {}
+    unresolved = []
+    for uri, role in mesh_references(description_file):
+        filepath = resolve_mesh_uri(uri, description_file)
+        if filepath is None:
+            unresolved.append(uri)
+            continue
+        filepath = os.path.realpath(filepath)
+        if filepath.lower().endswith(MESH_EXTENSIONS):
+            mesh_files.setdefault(filepath, set())
+            if role:
+                mesh_files[filepath].add(role)
+    return mesh_files, unresolved
+
+def float_list(text, default):
+    try:
+        return [float(value) for value in text.split()] if text else list(default)
+    except ValueError:
+        return list(default)
+
+def element_float(element, path, attribute=None):
+    """Return the float in a child element's text (SDF) or attribute (URDF), or None."""
+    child = element.find(path) if path else element
+    if child is None:
+        return None
+    text = child.get(attribute) if attribute else child.text
+    try:
+        return float(text) if text is not None else None
+    except ValueError:
+        return None
+
+def pose_matrix(xyz, rpy):
+    """Return the 3x4 transform of a translation and fixed-axis roll/pitch/yaw rotation (as in URDF and SDF)."""
+    (sr, cr), (sp, cp), (sy, cy) = [(math.sin(angle), math.cos(angle)) for angle in rpy]
+    return [
+        [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr, xyz[0]],
+        [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr, xyz[1]],
+        [-sp, cp * sr, cp * cr, xyz[2]],
+    ]
+
+def compose(a, b):
+    """Return the transform a * b of two 3x4 transforms."""
+    return [[sum(a[row][k] * b[k][column] for k in range(3)) + (a[row][3] if column == 3 else 0.0)
+             for column in range(4)] for row in range(3)]
+
+def invert(transform):
+    rotation = [[transform[column][row] for column in range(3)] for row in range(3)]
+    translation = [-sum(rotation[row][k] * transform[k][3] for k in range(3)) for row in range(3)]
+    return [rotation[row] + [translation[row]] for row in range(3)]
+
+def matrix_pose(transform):
+    """Return the {"xyz", "rpy"} origin of a 3x4 transform."""
+    pitch = math.asin(max(-1.0, min(1.0, -transform[2][0])))
+    roll = math.atan2(transform[2][1], transform[2][2])
+    yaw = math.atan2(transform[1][0], transform[0][0])
+    # Adding 0.0 turns -0.0 into 0.0
+    return {"xyz": [round(value, 9) + 0.0 for value in (transform[0][3], transform[1][3], transform[2][3])],
+            "rpy": [round(value, 9) + 0.0 for value in (roll, pitch, yaw)]}
+
+def urdf_origin(element):
+    """Return the {"xyz", "rpy"} of an element's <origin> (identity without one)."""
+    origin = element.find("origin")
+    if origin is None:
+        return {"xyz": [0.0, 0.0, 0.0], "rpy": [0.0, 0.0, 0.0]}
+    return {"xyz": float_list(origin.get("xyz"), [0.0] * 3), "rpy": float_list(origin.get("rpy"), [0.0] * 3)}
+
+def sdf_pose(element):
+    """Return the {"xyz", "rpy"} of an element's <pose> (identity without one)."""
+    values = float_list(element.findtext("pose"), [0.0] * 6)
+    if len(values) != 6:
+        values = [0.0] * 6
+    return {"xyz": values[:3], "rpy": values[3:]}
+
+def is_urdf(root):
+    return root.tag == "robot"
+
+def robot_name(description_file):
+    """Return the name of the robot (URDF) or first model (SDF) of a description file."""
+    root = ET.parse(description_file).getroot()
+    model = root if is_urdf(root) else root.find(".//model")
+    name = model.get("name") if model is not None else None
+    return name or os.path.splitext(os.path.basename(description_file))[0]
+
+def link_geometries(link, role, urdf):
+    """Return the mesh geometries of a link's visual or collision elements."""
+    geometries = []
+    for element in link.findall(role):
+        mesh = element.find("geometry/mesh")
+        if mesh is None:
+            continue
+        if urdf:
+            uri = mesh.get("filename")
+            scale = float_list(mesh.get("scale"), [1.0] * 3)
+            origin = urdf_origin(element)
+        else:
+            uri = mesh.findtext("uri")
+            scale = float_list(mesh.findtext("scale"), [1.0] * 3)
+            origin = sdf_pose(element)
+        if uri:
+            geometries.append({"uri": uri.strip(), "origin": origin, "scale": scale})
+    return geometries
+
+def robot_links(description_file):
+    """
+    Return the links of a URDF or SDF file, in order, with their visual and collision meshes.
+
+    Each link is a dict with its name and "visual" and "collision" lists of mesh geometries
+    ({"uri", "origin", "scale"}, the origin relative to the link). SDF links also carry their
+    "pose" in the model frame.
+    """
+    root = ET.parse(description_file).getroot()
+    urdf = is_urdf(root)
+    links = []
+    for link in root.iter("link"):
+        if link.get("name") is None:
+            continue
+        entry = {"name": link.get("name")}
+        for role in MESH_ROLES:
+            entry[role] = link_geometries(link, role, urdf)
+        if not urdf:
+            entry["pose"] = sdf_pose(link)
+        links.append(entry)
+    return links
+
+def robot_joints(description_file):
+    """
+    Return the joints of a URDF or SDF file, in order.
+
+    Each joint is a dict with its name, type, parent and child link, origin (the joint frame
+    relative to the parent link, as {"xyz", "rpy"}), axis as given in the file and limits
+    (lower, upper, effort, velocity; None where the file does not set them).
+    """
+    joints = []
+    root = ET.parse(description_file).getroot()
+    link_poses = {}
+    if not is_urdf(root):
+        link_poses = {link["name"]: link["pose"] for link in robot_links(description_file)}
+    for joint in root.iter("joint"):
+        if joint.get("name") is None:
+            continue
+        parent = joint.find("parent")
+        child = joint.find("child")
+        if parent is not None and parent.get("link") is not None:
+            # URDF: <parent link=.../>, <axis xyz=.../>, <limit lower=... upper=.../>
+            axis = joint.find("axis")
+            limit = joint.find("limit")
+            joints.append({
+                "name": joint.get("name"),
+                "type": joint.get("type", "fixed"),
+                "parent": parent.get("link"),
+                "child": child.get("link") if child is not None else None,
+                "origin": urdf_origin(joint),
+                "axis": float_list(axis.get("xyz") if axis is not None else None, [1.0, 0.0, 0.0]),
+                "limits": {key: element_float(limit, None, key) if limit is not None else None
+                           for key in ("lower", "upper", "effort", "velocity")},
+            })
+        else:
+            # SDF: <parent>link</parent>, <axis><xyz/><limit><lower/>...</limit></axis>. Links are
+            # posed in the model frame and the joint in its child link's frame.
+            parent_name = parent.text.strip() if parent is not None and parent.text else None
+            child_name = child.text.strip() if child is not None and child.text else None
+            identity = {"xyz": [0.0] * 3, "rpy": [0.0] * 3}
+            parent_pose, child_pose, joint_pose = (link_poses.get(parent_name, identity),
+                                                   link_poses.get(child_name, identity), sdf_pose(joint))
+            origin = compose(compose(invert(pose_matrix(parent_pose["xyz"], parent_pose["rpy"])),
+                                     pose_matrix(child_pose["xyz"], child_pose["rpy"])),
+                             pose_matrix(joint_pose["xyz"], joint_pose["rpy"]))
+            joints.append({
+                "name": joint.get("name"),
+                "type": joint.get("type", "fixed"),
+                "parent": parent_name,
+                "child": child_name,
+                "origin": matrix_pose(origin),
+                "axis": float_list(joint.findtext("axis/xyz"), [0.0, 0.0, 1.0]),
+                "limits": {key: element_float(joint, f"axis/limit/{key}")
+                           for key in ("lower", "upper", "effort", "velocity")},
+            })
+    return joints
+
+def moving_joints(description_file):
+    """Return the joints of a description file that appear in its joint states (all but fixed joints)."""
+    return [joint for joint in robot_joints(description_file) if joint["type"] != "fixed"]
@@ -0,0 +1,83 @@
+import json
+import math
+import os
+
+# Default topic namespace of a fleet instance; {name} is the robot's name, {index} the instance number
+DEFAULT_NAMESPACE = "/{name}_{index}"
+DEFAULT_GRID_SPACING = [2, 2]
+
+def robot_base_name(robot_name):
+    """Return the name used in namespaces: the robot string, or the file name of a description file."""
+    return os.path.splitext(os.path.basename(robot_name))[0] or "robot"
+
+def has_fleets(config):
+    """Check whether any robot entry of a config is a fleet."""
+    return any(isinstance(robot, dict) and "fleet" in robot for robot in config.get("robots", []))
+
+def fleet_size(fleet):
+    """Return the number of instances of a fleet entry."""
+    if "count" in fleet:
+        return fleet["count"]
+    return len(fleet.get("positions", []))
+
+def fleet_position(robot, fleet, index):
+    """
+    Return the position of instance index: from the position list, or on the fleet's grid.
+
+    Grid instances are laid out row by row, spacing[0] apart along x and spacing[1] along y.
+    """
+    if "positions" in fleet:
+        return list(fleet["positions"][index])
+    grid = fleet.get("grid", {})
+    origin = grid.get("origin", robot.get("position", [0, 0, 0]))
+    spacing = grid.get("spacing", DEFAULT_GRID_SPACING)
+    columns = grid.get("columns") or math.ceil(math.sqrt(fleet_size(fleet)))
+    column, row = index % columns, index // columns
+    return [origin[0] + column * spacing[0], origin[1] + row * spacing[1], origin[2]]
+
+def namespaced_topic(namespace, topic):
+    return namespace.rstrip("/") + "/" + topic.lstrip("/")
+
+def expand_fleet(robot):
+    """Lazily yield the full robot entries of one fleet entry, with namespaced topics."""
+    fleet = robot["fleet"]
+    template = {key: value for key, value in robot.items() if key != "fleet"}
+    name = robot_base_name(robot["robot"])
+    namespace_pattern = fleet.get("namespace", DEFAULT_NAMESPACE)
+    for index in range(fleet_size(fleet)):
+        namespace = namespace_pattern.format(name=name, index=index)
+        instance = dict(template, position=fleet_position(robot, fleet, index), namespace=namespace)
+        instance["subscribers"] = [dict(subscriber, topic=namespaced_topic(namespace, subscriber["topic"]))
+                                   if "topic" in subscriber else subscriber
+                                   for subscriber in robot.get("subscribers", [])]
+        yield instance
+
+def iter_robots(robots):
+    """Lazily yield every robot of a config, with fleet entries expanded into their instances."""
+    for robot in robots:
+        if isinstance(robot, dict) and "fleet" in robot:
+            yield from expand_fleet(robot)
+        else:
+            yield robot
+
+def write_expanded_config(config, output_file):
+    """
+    Write config with every fleet expanded into its instances.
+
+    The robots are streamed into the file one at a time, so large fleets are never held
+    in memory as a whole.
+    """
+    settings = {key: value for key, value in config.items() if key != "robots"}
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, 'w') as f:
+        # Write the other settings without their closing brace, then append the robots one by one
+        header = json.dumps(settings, indent=4)[:-2] + ",\n" if settings else "{\n"
+        f.write(header + '    "robots": [')
+        for index, robot in enumerate(iter_robots(config.get("robots", []))):
+            f.write(("," if index else "") + "\n        " + json.dumps(robot))
+        f.write("\n    ]\n}\n")
+    os.replace(tmp_file, output_file)
+
+def expanded_config_path(config_file):
+    """Return the path the expanded copy of a config file is written to."""
+    return os.path.splitext(config_file)[0] + ".expanded.json"
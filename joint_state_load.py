@@ -0,0 +1,362 @@
+import argparse
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(REPO_DIR, "conversion-tool"))
+
+from config_schema import load_config, print_errors
+from fleet import iter_robots
+from robot_bundle import BUNDLE_EXTENSION, BundleError, bundle_joints
+from robot_description import moving_joints
+from rosbridge_client import RosbridgeClient, RosbridgeDecodeError, RosbridgeError
+from telemetry import ResultsWriter, percentile
+
+CONFIG_FILE = "config.json"
+JOINT_STATE_TYPE = "sensor_msgs/msg/JointState"
+JOINT_STATE_SUBSCRIBER = "JointStateSubscriber"
+STANDIN_SCRIPT = os.path.join(REPO_DIR, "benchmarks", "stand-ins", "rosbridge_standin.py")
+DESCRIPTIONS_DIR = os.path.join(REPO_DIR, "robot-descriptions")
+
+DEFAULT_RATES = "10,50,100"
+DEFAULT_STEP_DURATION = 5.0
+# Seconds to wait for the last echoes of a step before counting the rest as lost
+DRAIN_TIME = 1.0
+# Position range of joints without limits (continuous joints)
+UNLIMITED_RANGE = (-math.pi, math.pi)
+# Frequency of the sine every joint follows
+MOTION_FREQUENCY = 0.25
+
+LOAD_COLUMNS = (
+    "robots", "rate", "batch", "compression", "duration", "offered_rate", "sent_rate", "received_rate",
+    "sent", "received", "loss", "latency_p50", "latency_p95", "latency_p99", "latency_max",
+)
+
+def resolve_description(robot_file, config_file):
+    """
+    Find a robot description file: as given, relative to the config, or by its last two path
+    components under robot-descriptions/ (configs written on another machine).
+    """
+    candidates = [robot_file, os.path.join(os.path.dirname(os.path.abspath(config_file)), robot_file)]
+    parts = os.path.normpath(robot_file).split(os.sep)
+    candidates.append(os.path.join(DESCRIPTIONS_DIR, *parts[-2:]))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def load_robots(config, config_file):
+    """
+    Return the robots of a config that have a joint state subscriber, as dicts with their
+    name, joint state topics and moving joints. Fleets are expanded into their instances.
+    """
+    robots = []
+    descriptions = {}
+    for index, robot in enumerate(iter_robots(config.get("robots", []))):
+        topics = [subscriber["topic"] for subscriber in robot.get("subscribers", [])
+                  if subscriber.get("type") == JOINT_STATE_SUBSCRIBER and subscriber.get("topic")]
+        if not topics:
+            continue
+        robot_file = robot["robot"]
+        if robot_file not in descriptions:
+            path = resolve_description(robot_file, config_file)
+            if path is None:
+                print(f"Warning: skipping robot {index}, its description {robot_file} was not found.")
+                descriptions[robot_file] = None
+            elif path.lower().endswith(BUNDLE_EXTENSION):
+                try:
+                    descriptions[robot_file] = [joint for joint in bundle_joints(path) if joint["type"] != "fixed"]
+                except (OSError, BundleError) as e:
+                    print(f"Warning: skipping robot {index}: {e}")
+                    descriptions[robot_file] = None
+            else:
+                descriptions[robot_file] = moving_joints(path)
+        joints = descriptions[robot_file]
+        if not joints:
+            continue
+        robots.append({"name": robot.get("namespace") or f"robot_{index}", "topics": topics, "joints": joints})
+    return robots
+
+def joint_range(joint):
+    limits = joint["limits"]
+    if joint["type"] == "continuous" or limits["lower"] is None or limits["upper"] is None:
+        return UNLIMITED_RANGE
+    return limits["lower"], limits["upper"]
+
+def joint_state(robot, frame_id, now):
+    """Build a JointState message whose joints follow sines within their limits."""
+    positions = []
+    velocities = []
+    for index, joint in enumerate(robot["joints"]):
+        lower, upper = joint_range(joint)
+        middle, amplitude = (lower + upper) / 2, (upper - lower) / 2
+        phase = 2 * math.pi * MOTION_FREQUENCY * now + index
+        positions.append(middle + amplitude * math.sin(phase))
+        velocities.append(2 * math.pi * MOTION_FREQUENCY * amplitude * math.cos(phase))
+    return {
+        "header": {"stamp": {"sec": int(now), "nanosec": int((now % 1) * 1e9)}, "frame_id": frame_id},
+        "name": [joint["name"] for joint in robot["joints"]],
+        "position": positions,
+        "velocity": velocities,
+        "effort": [],
+    }
+
+class EchoReceiver:
+    """Receives the echoed joint states on a separate connection and attributes them to load steps."""
+
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.Lock()
+        # Step number -> latencies of the echoes received so far
+        self.latencies = {}
+        self.decode_errors = 0
+        # Why the connection failed, unless it was closed by stop()
+        self.error = None
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        while True:
+            try:
+                message = self.client.receive()
+            except RosbridgeDecodeError:
+                # A single undecodable message does not end the measurement
+                self.decode_errors += 1
+                continue
+            except RosbridgeError as e:
+                if not self.stopping:
+                    self.error = str(e)
+                return
+            if message.get("op") != "publish":
+                continue
+            now = time.time()
+            header = message.get("msg", {}).get("header", {})
+            step, _, _ = str(header.get("frame_id", "")).partition(":")
+            stamp = header.get("stamp", {})
+            if not step.isdigit() or "sec" not in stamp:
+                continue
+            latency = now - (stamp["sec"] + stamp.get("nanosec", 0) / 1e9)
+            with self.lock:
+                self.latencies.setdefault(int(step), []).append(latency)
+
+    def step_latencies(self, step):
+        with self.lock:
+            return list(self.latencies.get(step, []))
+
+    def stop(self):
+        # Unblocks the receiving thread, which then sees the connection closed
+        self.stopping = True
+        try:
+            self.client.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.thread.join(timeout=5)
+        self.client.close()
+
+def run_step(publisher, receiver, step, robots, rate, duration, batch):
+    """
+    Publish joint states for robots at rate Hz each for duration seconds, batch messages per write.
+
+    The messages are paced on a fixed schedule; a publisher that falls behind sends the missed
+    messages as fast as it can, so the sent rate shows what the connection sustained.
+    """
+    messages_per_second = rate * len(robots)
+    interval = batch / messages_per_second
+    total = int(messages_per_second * duration)
+    start = time.monotonic()
+    sent = 0
+    expected = 0
+    while sent < total:
+        delay = start + (sent // batch) * interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        messages = []
+        for _ in range(min(batch, total - sent)):
+            robot = robots[sent % len(robots)]
+            msg = joint_state(robot, f"{step}:{sent}", time.time())
+            messages.extend({"op": "publish", "topic": topic, "msg": msg} for topic in robot["topics"])
+            expected += len(robot["topics"])
+            sent += 1
+        publisher.send_many(messages)
+    # The last write starts the final interval of the schedule, which still belongs to the step
+    elapsed = max(time.monotonic() - start, total / messages_per_second)
+
+    # Wait for the echoes still on their way
+    deadline = time.monotonic() + DRAIN_TIME
+    while time.monotonic() < deadline and len(receiver.step_latencies(step)) < expected:
+        time.sleep(0.05)
+    if receiver.error is not None:
+        # Otherwise every following step would report a loss of 100%
+        raise RosbridgeError(f"The echo connection failed: {receiver.error}")
+    latencies = receiver.step_latencies(step)
+    return {
+        "robots": len(robots),
+        "rate": rate,
+        "duration": round(elapsed, 3),
+        "offered_rate": messages_per_second,
+        "sent_rate": sent / elapsed if elapsed > 0 else None,
+        "received_rate": len(latencies) / elapsed if elapsed > 0 else None,
+        "sent": sent,
+        "received": len(latencies),
+        "loss": max(0.0, 1 - len(latencies) / expected) if expected else None,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_p99": percentile(latencies, 0.99),
+        "latency_max": max(latencies) if latencies else None,
+    }
+
+def format_latency(value):
+    return f"{value * 1000:.1f}ms" if value is not None else "n/a"
+
+def print_step(result):
+    loss = f"{result['loss']:.1%}" if result["loss"] is not None else "n/a"
+    print(f"{result['robots']:>4} robot(s) @ {result['rate']:>6g} Hz: offered {result['offered_rate']:.0f} msg/s, "
+          f"sent {result['sent_rate']:.0f} msg/s, received {result['received_rate']:.0f} msg/s, loss {loss}, "
+          f"latency p50 {format_latency(result['latency_p50'])} p95 {format_latency(result['latency_p95'])} "
+          f"p99 {format_latency(result['latency_p99'])} max {format_latency(result['latency_max'])}")
+
+def parse_counts(text, total):
+    counts = []
+    for item in text.split(","):
+        item = item.strip()
+        count = total if item == "all" else int(item)
+        if count > total:
+            print(f"Warning: only {total} robot(s) with joint state subscribers are configured, using {total} instead of {count}.")
+            count = total
+        if count > 0 and count not in counts:
+            counts.append(count)
+    return counts
+
+def start_standin(host, port):
+    """Start the rosbridge stand-in on port and wait until it accepts connections."""
+    process = subprocess.Popen([sys.executable, STANDIN_SCRIPT, "--host", host, "--port", str(port)],
+                               stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RosbridgeError(f"The rosbridge stand-in did not start on {host}:{port}")
+
+def run_load(args, robots, host, port):
+    """Ramp the load through the robot counts and rates. Returns the exit code."""
+    standin = start_standin(host, port) if args.stand_in else None
+    writer = ResultsWriter(args.output, LOAD_COLUMNS) if args.output else None
+    try:
+        publisher = RosbridgeClient(host, port)
+        publisher.connect()
+        receiver = RosbridgeClient(host, port, timeout=None)
+        receiver.connect()
+    except RosbridgeError as e:
+        if standin is not None:
+            standin.kill()
+        print(f"Error: {e}")
+        return 1
+
+    # Robots sharing a topic (like /joint/states in the default config) are all echoed on it
+    topics = sorted({topic for robot in robots for topic in robot["topics"]})
+    for topic in topics:
+        publisher.advertise(topic, JOINT_STATE_TYPE)
+        receiver.subscribe(topic, JOINT_STATE_TYPE, args.compression, args.queue_length)
+    echoes = EchoReceiver(receiver)
+    echoes.start()
+    # Give the bridge time to set up the publishers and subscriptions
+    time.sleep(0.5)
+
+    print(f"Loading rosbridge at {host}:{port} with {len(robots)} robot(s) on {len(topics)} topic(s), "
+          f"batch {args.batch}, compression {args.compression}.")
+    sustained = None
+    step = 0
+    try:
+        for count in parse_counts(args.robots, len(robots)):
+            for rate in [float(rate) for rate in args.rates.split(",")]:
+                step += 1
+                result = run_step(publisher, echoes, step, robots[:count], rate, args.step_duration, args.batch)
+                result.update(batch=args.batch, compression=args.compression)
+                print_step(result)
+                if writer is not None:
+                    writer.write(result)
+                overloaded = (result["loss"] is None or result["loss"] > args.max_loss
+                              or result["latency_p95"] is None or result["latency_p95"] > args.max_latency)
+                if overloaded:
+                    print(f"    Overloaded (max loss {args.max_loss:.1%}, max p95 latency {format_latency(args.max_latency)}), "
+                          "skipping higher rates.")
+                    break
+                if sustained is None or result["received_rate"] > sustained["received_rate"]:
+                    sustained = result
+    except (RosbridgeError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        echoes.stop()
+        if echoes.decode_errors:
+            print(f"Warning: {echoes.decode_errors} echoed message(s) could not be decoded and count as lost.")
+        publisher.close()
+        if standin is not None:
+            standin.terminate()
+            standin.wait()
+
+    if sustained is None:
+        print("No load step was sustained.")
+    else:
+        print(f"Highest sustained load: {sustained['robots']} robot(s) at {sustained['rate']:g} Hz "
+              f"({sustained['received_rate']:.0f} msg/s, p95 latency {format_latency(sustained['latency_p95'])}).")
+    if writer is not None:
+        print(f"Results written to {args.output}.")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish synthetic joint states for the configured robots through "
+                                                 "rosbridge and measure throughput and latency")
+    parser.add_argument("--config", type=str, default=CONFIG_FILE, help="Config file (default: config.json)")
+    parser.add_argument("--host", type=str, help="Rosbridge host (default: ros.bridge.ip of the config)")
+    parser.add_argument("--port", type=int, help="Rosbridge port (default: ros.bridge.port of the config)")
+    parser.add_argument("--rates", type=str, default=DEFAULT_RATES,
+                        help=f"Comma-separated publish rates per robot in Hz, ramped in order (default: {DEFAULT_RATES})")
+    parser.add_argument("--robots", type=str, default="all",
+                        help="Comma-separated robot counts to ramp through, 'all' for every configured robot (default: all)")
+    parser.add_argument("--step-duration", type=float, default=DEFAULT_STEP_DURATION,
+                        help=f"Seconds to publish at each load step (default: {DEFAULT_STEP_DURATION})")
+    parser.add_argument("--batch", type=int, default=1, help="Messages sent per websocket write (default: 1)")
+    parser.add_argument("--compression", choices=["none", "png", "cbor"], default="none",
+                        help="Compression of the subscription the echoes arrive on (default: none)")
+    parser.add_argument("--queue-length", type=int, help="Queue length of the subscription")
+    parser.add_argument("--max-latency", type=float, default=0.1,
+                        help="p95 latency in seconds above which a step counts as overloaded (default: 0.1)")
+    parser.add_argument("--max-loss", type=float, default=0.01,
+                        help="Fraction of lost messages above which a step counts as overloaded (default: 0.01)")
+    parser.add_argument("--output", type=str, help="CSV or JSONL file the step results are appended to")
+    parser.add_argument("--stand-in", action="store_true",
+                        help="Run against a local rosbridge stand-in that echoes the messages (no ROS needed)")
+    args = parser.parse_args()
+
+    if args.batch < 1:
+        parser.error("--batch must be at least 1")
+    config, errors = load_config(args.config)
+    if config is None:
+        print_errors(errors)
+        sys.exit(1)
+    robots = load_robots(config, args.config)
+    if not robots:
+        print(f"Error: no robot in {args.config} has a joint state subscriber and a readable description.")
+        sys.exit(1)
+    bridge = config.get("ros", {}).get("bridge", {})
+    host = args.host or bridge.get("ip", "127.0.0.1")
+    port = int(args.port or bridge.get("port", 9090))
+    sys.exit(run_load(args, robots, host, port))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import argparse
+import datetime
+import gzip
+import http.server
+import json
+import os
+import queue
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Events are sent in batches of up to BATCH_SIZE, at least every FLUSH_INTERVAL seconds
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0
+# Events waiting to be sent; further events are dropped (and counted) while the queue is full
+MAX_QUEUE_SIZE = 20000
+
+# A failed batch is retried with exponential backoff before it is dropped
+MAX_SEND_ATTEMPTS = 5
+RETRY_BACKOFF = 0.5
+SEND_TIMEOUT = 10.0
+
+SEQ_INGEST_PATH = "/api/events/raw?clef"
+DEFAULT_STAND_IN_PORT = 5341
+DEFAULT_STAND_IN_FILE = "seq_events.clef"
+
+# Unreal Engine: "LogROS2UE5: Warning: message"
+UNREAL_LINE = re.compile(r"^(?:\[[^\]]*\])*(?P<category>Log\w+): (?:(?P<verbosity>\w+): )?(?P<message>.*)$")
+# ROS2: "[INFO] [1700000000.123] [node]: message", optionally prefixed by the launch process name
+ROS_LINE = re.compile(r"^(?:\[(?P<process>[^\]]+)\] )?\[(?P<level>DEBUG|INFO|WARN|WARNING|ERROR|FATAL)\] "
+                      r"(?:\[[\d.]+\] )?(?:\[(?P<node>[^\]]+)\]: )?(?P<message>.*)$")
+# Blender and the conversion tools: "Error: message", "Warning: message"
+PREFIXED_LINE = re.compile(r"^(?P<level>Error|Warning|Info)\s*: (?P<message>.*)$", re.IGNORECASE)
+
+LEVELS = {
+    "verbose": "Verbose", "veryverbose": "Verbose", "log": "Information", "display": "Information",
+    "debug": "Debug", "info": "Information", "warn": "Warning", "warning": "Warning",
+    "error": "Error", "fatal": "Fatal",
+}
+
+def parse_line(text):
+    """
+    Parse a line of Unreal Engine, ROS2 or Blender output.
+
+    Returns the message, its Seq level and the properties found in the line
+    (log category, ROS node).
+    """
+    match = UNREAL_LINE.match(text)
+    if match:
+        level = LEVELS.get((match.group("verbosity") or "log").lower())
+        if level is None:
+            # "LogFoo: Something: ..." without a verbosity
+            return match.group(0), "Information", {"Category": match.group("category")}
+        return match.group("message"), level, {"Category": match.group("category")}
+    match = ROS_LINE.match(text)
+    if match:
+        properties = {key.capitalize(): match.group(key) for key in ("process", "node") if match.group(key)}
+        return match.group("message"), LEVELS[match.group("level").lower()], properties
+    match = PREFIXED_LINE.match(text)
+    if match:
+        return match.group("message"), LEVELS[match.group("level").lower()], {}
+    return text, "Information", {}
+
+def clef_event(message, level="Information", properties=None, event_time=None):
+    """Return a CLEF (compact log event format) event as accepted by Seq."""
+    event_time = datetime.datetime.fromtimestamp(event_time or time.time(), datetime.timezone.utc)
+    event = {"@t": event_time.isoformat(timespec="microseconds").replace("+00:00", "Z"), "@m": message}
+    if level != "Information":
+        event["@l"] = level
+    for key, value in (properties or {}).items():
+        if value is not None and not key.startswith("@"):
+            event[key] = value
+    return event
+
+def encode_batch(events):
+    """Serialize events as newline-delimited CLEF."""
+    return "".join(json.dumps(event) + "\n" for event in events).encode("utf-8")
+
+class SeqSink:
+    """Sends batches of events to a Seq server (or the local stand-in) over HTTP."""
+
+    def __init__(self, endpoint, api_key=None, compress=True):
+        self.url = endpoint.rstrip("/") + SEQ_INGEST_PATH
+        self.api_key = api_key
+        self.compress = compress
+
+    def send(self, events):
+        """POST one batch. Returns the number of seconds to wait before retrying, or None on success."""
+        body = encode_batch(events)
+        headers = {"Content-Type": "application/vnd.serilog.clef"}
+        if self.compress:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        if self.api_key:
+            headers["X-Seq-ApiKey"] = self.api_key
+        request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=SEND_TIMEOUT):
+                return None
+        except urllib.error.HTTPError as e:
+            # The server is overloaded: honor its Retry-After
+            if e.code in (429, 503):
+                return float(e.headers.get("Retry-After") or RETRY_BACKOFF)
+            raise
+
+    def close(self):
+        pass
+
+class FileSink:
+    """Appends batches of events to a CLEF file, gzip-compressed if its name ends in .gz."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = gzip.open(path, "ab") if path.endswith(".gz") else open(path, "ab")
+
+    def send(self, events):
+        self.file.write(encode_batch(events))
+        self.file.flush()
+        return None
+
+    def close(self):
+        self.file.close()
+
+def open_sink(destination):
+    """
+    Return the sink of a logging destination like config.json's "destination":
+    {"type": "Seq", "endpoint": "http://localhost:5341"}. An endpoint starting with
+    file:// writes the events to that file instead.
+    """
+    endpoint = destination.get("endpoint", f"http://localhost:{DEFAULT_STAND_IN_PORT}")
+    if endpoint.startswith("file://"):
+        return FileSink(endpoint[len("file://"):])
+    return SeqSink(endpoint, destination.get("apiKey"), destination.get("compress", True))
+
+class LogCollector:
+    """
+    Collects structured log events and ships them in batches from a background thread.
+
+    emit() never blocks: events go into a bounded queue, and while the sink cannot keep
+    up and the queue is full, new events are dropped and counted instead of slowing the
+    caller down.
+    """
+
+    def __init__(self, sink, properties=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_queue_size=MAX_QUEUE_SIZE):
+        self.sink = sink
+        # Added to every event, e.g. the batch id
+        self.properties = properties or {}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.events = queue.Queue(maxsize=max_queue_size)
+        self.sent = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="log-collector", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def emit(self, message, level="Information", **properties):
+        """Queue one event, tagged with the collector's properties and the given ones."""
+        event = clef_event(message, level, dict(self.properties, **properties))
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit_line(self, text, **properties):
+        """Parse a line of process output and queue it as an event."""
+        if not text.strip():
+            return
+        message, level, parsed = parse_line(text)
+        self.emit(message, level, **dict(properties, **parsed))
+
+    def process_handler(self, context=None):
+        """
+        Return a line handler for SupervisedProcess that turns its output into events.
+
+        context is called for every line and returns extra properties, so output of a
+        process that outlives an iteration is tagged with the iteration current at the time.
+        """
+        def handle_line(process, stream_name, text):
+            self.emit_line(text, Source=process.label, Stream=stream_name, **(context() if context else {}))
+        return handle_line
+
+    def send_batch(self, batch):
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            try:
+                retry_after = self.sink.send(batch)
+            except (OSError, urllib.error.URLError) as e:
+                retry_after = RETRY_BACKOFF * 2 ** (attempt - 1)
+                if attempt == MAX_SEND_ATTEMPTS:
+                    print(f"Dropping {len(batch)} log event(s): {e}")
+            if retry_after is None:
+                self.sent += len(batch)
+                return
+            # While closing, a failing sink gets one quick retry instead of the full backoff
+            if self.stopping.is_set() and attempt > 1:
+                break
+            self.stopping.wait(retry_after)
+        self.failed_batches += 1
+        self.dropped += len(batch)
+
+    def run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while not (self.stopping.is_set() and self.events.empty()):
+            try:
+                batch.append(self.events.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                pass
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline) \
+                    or (batch and self.stopping.is_set() and self.events.empty()):
+                self.send_batch(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+        if batch:
+            self.send_batch(batch)
+
+    def close(self, timeout=SEND_TIMEOUT):
+        """Send the queued events and stop the background thread."""
+        if self.dropped:
+            # Bypass the queue: it may be the reason events were dropped
+            try:
+                self.sink.send([clef_event(f"{self.dropped} log event(s) were dropped", "Warning", self.properties)])
+            except (OSError, urllib.error.URLError):
+                pass
+        self.stopping.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+        self.sink.close()
+
+    def stats(self):
+        return {"sent": self.sent, "dropped": self.dropped, "failed_batches": self.failed_batches}
+
+def collector_from_config(logging_config, properties=None):
+    """
+    Start a collector for a "logging" section like the one of config.json.
+
+    Returns None if logging is disabled or no destination is configured.
+    """
+    if not logging_config or not logging_config.get("enable", True) or "destination" not in logging_config:
+        return None
+    return LogCollector(open_sink(logging_config["destination"]), properties).start()
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Accepts Seq's raw ingestion API and appends the events to the server's file."""
+
+    def do_POST(self):
+        if not self.path.startswith("/api/events/raw"):
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        with self.server.lock:
+            self.server.output.write(body)
+            self.server.output.flush()
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(port=DEFAULT_STAND_IN_PORT, output_file=DEFAULT_STAND_IN_FILE):
+    """Run a local stand-in for Seq that stores the ingested events in a CLEF file."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), StandInHandler)
+    server.lock = threading.Lock()
+    with open(output_file, "ab") as server.output:
+        print(f"Seq stand-in listening on http://127.0.0.1:{port}, writing events to {output_file}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Seq log server")
+    parser.add_argument("--port", type=int, default=DEFAULT_STAND_IN_PORT,
+                        help=f"Port to listen on (default: {DEFAULT_STAND_IN_PORT})")
+    parser.add_argument("--output", type=str, default=DEFAULT_STAND_IN_FILE,
+                        help=f"CLEF file the events are appended to (default: {DEFAULT_STAND_IN_FILE})")
+    args = parser.parse_args()
+    serve(args.port, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,49 @@
+import argparse
 import os
 import subprocess
 import sys
 import json
+import time
+
+# The config creator and the conversion tool are imported and run in-process
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(REPO_DIR, "config-creator"))
+sys.path.insert(0, os.path.join(REPO_DIR, "conversion-tool"))
+
+import read_config_and_convert
+import setup_config
+from config_schema import load_config, print_errors, unreal_executable_error, validate_scenario_config
+from config_watch import DEFAULT_APPLY_SERVICE, ConfigWatcher, apply_delta, format_change, plan_update
+from fleet import expanded_config_path, has_fleets, write_expanded_config
+from rosbridge_client import RosbridgeClient, RosbridgeError
 
-# Path to necessary scripts
-SETUP_CONFIG_SCRIPT = "config-creator/setup_config.py"
-CONVERT_MESH_SCRIPT = "conversion-tool/read_config_and_convert.py"
 CONFIG_FILE = "config.json"
+UNREAL_EDITOR = "UnrealEditor"
+
+# Unreal Engine arguments for unattended runs: without a window, or without any rendering at all
+HEADLESS_ARGS = ["-unattended", "-nosplash", "-RenderOffScreen"]
+NULL_RHI_ARGS = ["-unattended", "-nosplash", "-nullrhi"]
+
+# Seconds between checks of a watched config file
+WATCH_INTERVAL = 1.0
+# Seconds Unreal Editor gets to exit before it is killed on a relaunch
+UNREAL_STOP_TIMEOUT = 10.0
+
+# Settings of one non-interactive setup, from the command line or a pipeline spec
+SETUP_DEFAULTS = {
+    "config": CONFIG_FILE,
+    "convert": True,
+    "launch": True,
+    "project": None,
+    "unreal_path": UNREAL_EDITOR,
+    "headless": False,
+    "null_rhi": False,
+    "ue_args": [],
+    "launch_timeout": None,
+    "expand_fleets": False,
+    "jobs": None,
+    "backend": "auto",
+}
 
 def check_config_exists():
     """Check if the config.json file exists."""
@@ -35,11 +72,11 @@ def prompt_create_config():
             print("Please enter 'y' or 'n'.")
 
 def create_config():
-    """Run the setup_config.py script to create a new config file."""
+    """Run the config creator of setup_config.py to create a new config file."""
     try:
-        subprocess.run([sys.executable, SETUP_CONFIG_SCRIPT], check=True)
+        setup_config.create_config()
         print("Config file created successfully.")
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         print(f"Error occurred while creating config: {e}")
         sys.exit(1)
 
@@ -54,26 +91,28 @@ def prompt_convert_meshes():
         else:
             print("Please enter 'y' or 'n'.")
 
-def convert_meshes():
-    """Run the read_config_and_convert.py script to convert robot meshes to FBX."""
-    try:
-        subprocess.run([sys.executable, CONVERT_MESH_SCRIPT], check=True)
+def convert_meshes(config_file=CONFIG_FILE, jobs=None, backend="auto", robots=None):
+    """
+    Convert the robot meshes of a config file to FBX with read_config_and_convert.py, only those
+    of robots if given. Returns True on success.
+    """
+    if read_config_and_convert.process_config(config_file=config_file, jobs=jobs, backend=backend, robots=robots):
         print("Robot meshes converted to FBX successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error occurred while converting meshes: {e}")
-        sys.exit(1)
+        return True
+    print("Error occurred while converting meshes.")
+    return False
 
-def get_unreal_project_from_config():
+def get_unreal_project_from_config(config_file=CONFIG_FILE):
     """Load Unreal project path from the config file."""
     try:
-        with open(CONFIG_FILE, 'r') as config_file:
-            config = json.load(config_file)
+        with open(config_file, 'r') as f:
+            config = json.load(f)
         return config.get("unreal_project", None)
     except FileNotFoundError:
-        print(f"Error: {CONFIG_FILE} not found.")
+        print(f"Error: {config_file} not found.")
         return None
     except json.JSONDecodeError:
-        print(f"Error: Failed to decode {CONFIG_FILE}.")
+        print(f"Error: Failed to decode {config_file}.")
         return None
 
 def prompt_unreal_project():
@@ -84,19 +123,239 @@ def prompt_unreal_project():
         sys.exit(1)
     return project_path
 
-def launch_unreal(project_path, use_config):
-    """Launch Unreal Editor with or without the config file as a parameter."""
-    unreal_command = ['UnrealEditor', project_path]
-    if use_config and os.path.exists(CONFIG_FILE):
-        unreal_command += [f"--config={CONFIG_FILE}"]
-    
+def build_unreal_command(project_path, use_config, config_file=CONFIG_FILE, unreal_path=UNREAL_EDITOR, extra_args=()):
+    unreal_command = [unreal_path, project_path]
+    if use_config and os.path.exists(config_file):
+        unreal_command += [f"--config={config_file}"]
+    return unreal_command + list(extra_args)
+
+def launch_unreal(project_path, use_config, config_file=CONFIG_FILE, unreal_path=UNREAL_EDITOR, extra_args=(),
+                  timeout=None):
+    """
+    Launch Unreal Editor with or without the config file as a parameter.
+
+    extra_args are appended to the command line (e.g. HEADLESS_ARGS). With a timeout,
+    Unreal Editor is stopped after that many seconds. Returns True if it ran successfully.
+    """
+    unreal_command = build_unreal_command(project_path, use_config, config_file, unreal_path, extra_args)
     print(f"Launching Unreal Editor with command: {' '.join(unreal_command)}")
     
     try:
-        subprocess.run(unreal_command, check=True)
-    except subprocess.CalledProcessError as e:
+        subprocess.run(unreal_command, check=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print(f"Unreal Editor stopped after the launch timeout of {timeout}s.")
+    except (subprocess.CalledProcessError, OSError) as e:
         print(f"Error occurred while launching Unreal Editor: {e}")
-        sys.exit(1)
+        return False
+    return True
+
+def launch_config_file(config_file, expand_fleets=False):
+    """
+    Return the config file to pass to Unreal Engine.
+
+    Robot fleets are passed to Unreal Engine as compact entries, which the plugin expands
+    itself. With expand_fleets (for plugin versions without fleet support), they are
+    expanded into a separate file next to the config instead.
+    """
+    config, _ = load_config(config_file)
+    if not expand_fleets or config is None or not has_fleets(config):
+        return config_file
+    expanded_file = expanded_config_path(config_file)
+    write_expanded_config(config, expanded_file)
+    print(f"Expanded robot fleets of {config_file} into {expanded_file}.")
+    return expanded_file
+
+def validate_config(config_file, need_project=True):
+    """Check that a config file can be used without asking the user. Returns a list of error messages."""
+    config, errors = load_config(config_file)
+    if config is None:
+        return errors
+    return validate_scenario_config(config, config_file, need_project=need_project)
+
+def unreal_args(setup):
+    """Return the extra Unreal Engine arguments of a setup."""
+    if setup["null_rhi"]:
+        args = list(NULL_RHI_ARGS)
+    elif setup["headless"]:
+        args = list(HEADLESS_ARGS)
+    else:
+        args = []
+    return args + list(setup["ue_args"])
+
+def run_setup(setup):
+    """
+    Run one setup without any prompts: validate the config, convert its meshes
+    incrementally and launch Unreal Engine. Returns True if every step succeeded.
+    """
+    config_file = setup["config"]
+    errors = validate_config(config_file, need_project=setup["launch"] and not setup["project"])
+    if setup["launch"] and unreal_executable_error(setup["unreal_path"]):
+        errors.append(unreal_executable_error(setup["unreal_path"]))
+    if not print_errors(errors):
+        return False
+
+    if setup["convert"] and not convert_meshes(config_file, setup["jobs"], setup["backend"]):
+        return False
+
+    if setup["launch"]:
+        project_path = setup["project"] or get_unreal_project_from_config(config_file)
+        if not os.path.exists(project_path):
+            print(f"Error: The project file '{project_path}' does not exist.")
+            return False
+        return launch_unreal(project_path, True, launch_config_file(config_file, setup["expand_fleets"]),
+                             setup["unreal_path"], unreal_args(setup), setup["launch_timeout"])
+    return True
+
+def start_unreal(setup, config):
+    """Start Unreal Editor for a watched setup without waiting for it. Returns the process, or None."""
+    project_path = setup["project"] or config.get("unreal_project")
+    if not project_path or not os.path.exists(project_path):
+        print(f"Error: The project file '{project_path}' does not exist.")
+        return None
+    config_file = launch_config_file(setup["config"], setup["expand_fleets"])
+    unreal_command = build_unreal_command(project_path, True, config_file, setup["unreal_path"], unreal_args(setup))
+    print(f"Launching Unreal Editor with command: {' '.join(unreal_command)}")
+    try:
+        return subprocess.Popen(unreal_command)
+    except OSError as e:
+        print(f"Error occurred while launching Unreal Editor: {e}")
+        return None
+
+def stop_unreal(process):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=UNREAL_STOP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def push_changes(config, changes, service=DEFAULT_APPLY_SERVICE):
+    """Apply changes to the running Unreal Engine through the config's ROS Bridge. Returns True on success."""
+    bridge = config.get("ros", {}).get("bridge", {})
+    try:
+        with RosbridgeClient(bridge.get("ip", "127.0.0.1"), bridge.get("port", 9090)) as client:
+            ok, message = apply_delta(client, changes, service)
+    except RosbridgeError as e:
+        print(f"Could not apply the changes live: {e}")
+        return False
+    if not ok:
+        print(f"Unreal Engine could not apply the changes live: {message}")
+    return ok
+
+def apply_config_change(setup, applied, config, service=DEFAULT_APPLY_SERVICE):
+    """
+    Bring a running setup from the applied config to a changed one: convert the meshes of new
+    and changed robots, then push the changes live or ask for a relaunch.
+
+    Returns "live", "relaunch" or "unchanged", or None if the change was rejected.
+    """
+    if not print_errors(validate_scenario_config(config, setup["config"])):
+        print("Keeping the last applied config.")
+        return None
+    live, relaunch, convert = plan_update(applied, config)
+    if not live and not relaunch:
+        return "unchanged"
+    print(f"{setup['config']} changed:")
+    for change in live + relaunch:
+        print(f"    {format_change(change)}")
+
+    if convert and setup["convert"]:
+        print(f"Converting the meshes of {len(convert)} new or changed robot(s).")
+        if not convert_meshes(setup["config"], setup["jobs"], setup["backend"], robots=convert):
+            print("Keeping the last applied config.")
+            return None
+    if relaunch:
+        print(f"{len(relaunch)} change(s) cannot be applied live, relaunching Unreal Editor.")
+        return "relaunch"
+    if push_changes(config, live, service):
+        print(f"Applied {len(live)} change(s) live.")
+        return "live"
+    print("Relaunching Unreal Editor instead.")
+    return "relaunch"
+
+def watch_setup(setup, interval=WATCH_INTERVAL, service=DEFAULT_APPLY_SERVICE):
+    """
+    Run a setup and keep Unreal Engine running while its config is watched for changes.
+
+    Every change is diffed against the last applied config. Changes the plugin can apply
+    (weather, time of day, robots added, removed, moved or rewired) are pushed to the running
+    Unreal Engine through the ROS Bridge; anything else relaunches it. Returns True if the
+    watch was ended with Ctrl+C or Unreal Editor exited successfully.
+    """
+    config_file = setup["config"]
+    errors = validate_config(config_file, need_project=not setup["project"])
+    if unreal_executable_error(setup["unreal_path"]):
+        errors.append(unreal_executable_error(setup["unreal_path"]))
+    if not print_errors(errors):
+        return False
+    if setup["convert"] and not convert_meshes(config_file, setup["jobs"], setup["backend"]):
+        return False
+
+    applied, _ = load_config(config_file)
+    watcher = ConfigWatcher(config_file, interval)
+    process = start_unreal(setup, applied)
+    if process is None:
+        return False
+    print(f"Watching {config_file} for changes (Ctrl+C to stop).")
+    try:
+        while process.poll() is None:
+            time.sleep(interval)
+            config = watcher.poll()
+            if config is None:
+                continue
+            outcome = apply_config_change(setup, applied, config, service)
+            if outcome is None:
+                continue
+            if outcome == "relaunch":
+                stop_unreal(process)
+                process = start_unreal(setup, config)
+                if process is None:
+                    return False
+            applied = config
+    except KeyboardInterrupt:
+        print("Stopping Unreal Editor.")
+        return True
+    finally:
+        # Never leave Unreal Editor running, whatever ended the watch
+        stop_unreal(process)
+    print(f"Unreal Editor exited with code {process.returncode}, stopped watching {config_file}.")
+    return process.returncode == 0
+
+def load_pipeline(pipeline_file, overrides):
+    """
+    Read a pipeline spec: {"defaults": {...}, "setups": [{"config": ...}, ...]}.
+
+    Each setup is merged over the spec's defaults, which are merged over the command-line settings.
+    """
+    with open(pipeline_file, 'r') as f:
+        spec = json.load(f)
+    base = dict(overrides, **spec.get("defaults", {}))
+    setups = []
+    for entry in [spec.get("defaults", {})] + spec.get("setups", []):
+        unknown = set(entry) - set(SETUP_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown setup setting(s) in {pipeline_file}: {', '.join(sorted(unknown))}")
+    for entry in spec.get("setups", []):
+        setups.append(dict(base, **entry))
+    return setups
+
+def run_pipeline(setups):
+    """Run setups one after another and print a summary. Returns True if all of them succeeded."""
+    results = []
+    for index, setup in enumerate(setups, start=1):
+        print(f"\n=== Setup {index}/{len(setups)}: {setup['config']} ===")
+        start_time = time.time()
+        ok = run_setup(setup)
+        results.append((setup["config"], ok, time.time() - start_time))
+
+    print("\n=== Summary ===")
+    for config_file, ok, duration in results:
+        print(f"{'OK' if ok else 'FAILED'} {config_file} ({duration:.1f}s)")
+    succeeded = sum(1 for _, ok, _ in results if ok)
+    print(f"{succeeded} of {len(results)} setup(s) succeeded.")
+    return succeeded == len(results)
 
 def main():
     """Main function to orchestrate the setup and launch process."""
@@ -132,8 +391,63 @@ def main():
     else:
         project_path = prompt_unreal_project()
 
-    # Step 4: Launch Unreal Editor with or without the config file
-    launch_unreal(project_path, use_config=config_exists or new_config_created)
+    # Step 4: Check the config before Unreal Editor is started
+    if (config_exists or new_config_created) and not print_errors(validate_config(CONFIG_FILE, need_project=False)):
+        sys.exit(1)
+
+    # Step 5: Launch Unreal Editor with or without the config file
+    use_config = config_exists or new_config_created
+    config_file = launch_config_file(CONFIG_FILE) if use_config else CONFIG_FILE
+    if not launch_unreal(project_path, use_config=use_config, config_file=config_file):
+        sys.exit(1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Set up, convert and launch the Unreal Engine project. "
+                    "Without --batch or --pipeline, every step is prompted interactively."
+    )
+    parser.add_argument("--batch", action="store_true", help="Run non-interactively with the settings below")
+    parser.add_argument("--pipeline", type=str, help="JSON pipeline spec listing setups to run non-interactively")
+    parser.add_argument("--config", type=str, default=CONFIG_FILE, help="Config file (default: config.json)")
+    parser.add_argument("--no-convert", dest="convert", action="store_false", help="Skip the mesh conversion")
+    parser.add_argument("--no-launch", dest="launch", action="store_false", help="Skip launching Unreal Engine")
+    parser.add_argument("--project", type=str, help="Unreal project (default: unreal_project from the config)")
+    parser.add_argument("--unreal-path", type=str, default=UNREAL_EDITOR,
+                        help="Unreal Editor executable (default: UnrealEditor)")
+    parser.add_argument("--headless", action="store_true",
+                        help=f"Run Unreal Engine without a window ({' '.join(HEADLESS_ARGS)})")
+    parser.add_argument("--null-rhi", action="store_true",
+                        help=f"Run Unreal Engine without rendering at all ({' '.join(NULL_RHI_ARGS)})")
+    parser.add_argument("--ue-arg", dest="ue_args", action="append", default=[],
+                        help="Extra Unreal Engine argument, can be repeated")
+    parser.add_argument("--launch-timeout", type=float, help="Stop Unreal Engine after this many seconds")
+    parser.add_argument("--expand-fleets", action="store_true",
+                        help="Expand robot fleets into one entry per instance, for plugins without fleet support")
+    parser.add_argument("--jobs", "-j", type=int, help="Number of parallel mesh conversion workers")
+    parser.add_argument("--backend", choices=["auto", "blender"], default="auto", help="Mesh conversion backend")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep Unreal Engine running and apply changes of the config live (non-interactive)")
+    parser.add_argument("--watch-interval", type=float, default=WATCH_INTERVAL,
+                        help=f"Seconds between checks of the watched config (default: {WATCH_INTERVAL})")
+    parser.add_argument("--apply-service", type=str, default=DEFAULT_APPLY_SERVICE,
+                        help=f"Service that applies config changes in Unreal Engine (default: {DEFAULT_APPLY_SERVICE})")
+    args = parser.parse_args()
+    if args.watch and (args.pipeline or not args.launch):
+        parser.error("--watch cannot be combined with --pipeline or --no-launch")
+    return args
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if not args.batch and not args.pipeline and not args.watch:
+        main()
+        sys.exit(0)
+
+    settings = {name: getattr(args, name) for name in SETUP_DEFAULTS}
+    if args.watch:
+        sys.exit(0 if watch_setup(settings, args.watch_interval, args.apply_service) else 1)
+    try:
+        setups = load_pipeline(args.pipeline, settings) if args.pipeline else [settings]
+    except (OSError, ValueError) as e:
+        print(f"Error: Failed to read pipeline {args.pipeline}: {e}")
+        sys.exit(1)
+    sys.exit(0 if run_pipeline(setups) else 1)
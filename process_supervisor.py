@@ -0,0 +1,128 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+# Time a process group gets to exit after each shutdown stage
+SHUTDOWN_GRACE_PERIOD = 5.0
+GROUP_POLL_INTERVAL = 0.05
+
+def timestamp():
+    """Return the current wall-clock time with millisecond resolution, for log lines."""
+    now = time.time()
+    return time.strftime("%H:%M:%S", time.localtime(now)) + f".{int(now % 1 * 1000):03d}"
+
+class SupervisedProcess:
+    """
+    A child process started in its own process group.
+
+    Its stdout/stderr are streamed line by line without blocking: every line is printed
+    with a timestamp and the process label and passed to the registered line handlers.
+    """
+
+    def __init__(self, label, cmd, env=None, cwd=None):
+        self.label = label
+        self.cmd = cmd
+        self.env = env
+        self.cwd = cwd
+        self.process = None
+        self.start_time = None
+        self.exit_task = None
+        self.output_tasks = []
+        # Callables taking (process, stream name, line)
+        self.line_handlers = []
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    @property
+    def returncode(self):
+        return self.process.returncode if self.process else None
+
+    @property
+    def running(self):
+        return self.exit_task is not None and not self.exit_task.done()
+
+    async def start(self):
+        """Start the process in a new process group / session."""
+        if sys.platform == "win32":
+            group_options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group_options = {"start_new_session": True}
+
+        self.process = await asyncio.create_subprocess_exec(
+            *self.cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            env=self.env, cwd=self.cwd, **group_options)
+        self.start_time = time.monotonic()
+        self.output_tasks = [
+            asyncio.create_task(self.stream_output(self.process.stdout, "stdout")),
+            asyncio.create_task(self.stream_output(self.process.stderr, "stderr")),
+        ]
+        self.exit_task = asyncio.create_task(self.process.wait())
+        return self
+
+    async def stream_output(self, stream, stream_name):
+        while True:
+            line = await stream.readline()
+            if not line:
+                return
+            text = line.decode('utf-8', errors='replace').rstrip()
+            print(f"[{timestamp()}] [{self.label}] {text}", flush=True)
+            for handler in self.line_handlers:
+                handler(self, stream_name, text)
+
+    async def wait(self, timeout=None):
+        """Wait for the process to exit. Returns its exit code, or None on timeout."""
+        try:
+            return await asyncio.wait_for(asyncio.shield(self.exit_task), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def group_alive(self):
+        """Check whether any process of the group (including orphaned children) is still running."""
+        if sys.platform == "win32":
+            return self.running
+        try:
+            os.killpg(self.process.pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+    def signal_group(self, sig):
+        try:
+            if sys.platform == "win32":
+                if sig == signal.SIGINT:
+                    self.process.send_signal(signal.CTRL_BREAK_EVENT)
+                elif sig == signal.SIGTERM:
+                    self.process.terminate()
+                else:
+                    self.process.kill()
+            else:
+                os.killpg(self.process.pid, sig)
+        except (ProcessLookupError, OSError):
+            pass
+
+    async def stop(self, grace_period=SHUTDOWN_GRACE_PERIOD):
+        """
+        Shut the whole process group down in stages: SIGINT, then SIGTERM, then SIGKILL,
+        giving the group grace_period seconds to exit after each stage.
+        """
+        if self.process is None:
+            return
+        stages = [signal.SIGINT, signal.SIGTERM, signal.SIGKILL if sys.platform != "win32" else None]
+        for sig in stages:
+            if not self.group_alive():
+                break
+            print(f"[{timestamp()}] [{self.label}] Sending {signal.Signals(sig).name if sig else 'kill'}...")
+            self.signal_group(sig)
+            deadline = time.monotonic() + grace_period
+            while self.group_alive() and time.monotonic() < deadline:
+                await asyncio.sleep(GROUP_POLL_INTERVAL)
+
+        await self.exit_task
+        await asyncio.gather(*self.output_tasks, return_exceptions=True)
@@ -0,0 +1,245 @@
+import base64
+import itertools
+import json
+import os
+import socket
+import struct
+import time
+import zlib
+
+from rosbridge_codec import cbor_loads, decode_png
+
+# Websocket opcodes
+OPCODE_CONTINUATION = 0x0
+OPCODE_TEXT = 0x1
+OPCODE_BINARY = 0x2
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+def apply_mask(payload, mask):
+    """XOR payload with the repeated 4-byte websocket mask."""
+    length = len(payload)
+    if not length:
+        return payload
+    repeated = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(length, 'big')
+
+class RosbridgeError(Exception):
+    """Raised when the rosbridge connection fails or a request is answered with an error."""
+
+class RosbridgeDecodeError(RosbridgeError):
+    """Raised when a received message cannot be decoded; the connection itself is still usable."""
+
+class RosbridgeClient:
+    """Minimal blocking client for the rosbridge v2 protocol over a websocket, using only the standard library."""
+
+    def __init__(self, host="127.0.0.1", port=9090, timeout=5.0):
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self.sock = None
+        self.buffer = b""
+        self.ids = itertools.count(1)
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def connect(self):
+        """Open the TCP connection and perform the websocket handshake."""
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError as e:
+            raise RosbridgeError(f"Could not connect to rosbridge at {self.host}:{self.port}: {e}")
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        request = (
+            f"GET / HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Upgrade: websocket\r\n"
+            f"Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            f"Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        self.send_bytes(request.encode('ascii'))
+
+        while b"\r\n\r\n" not in self.buffer:
+            self.buffer += self.receive_bytes()
+        response, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+        status_line = response.split(b"\r\n", 1)[0].decode('latin-1')
+        if status_line.split()[1:2] != ["101"]:
+            self.close()
+            raise RosbridgeError(f"Websocket handshake with {self.host}:{self.port} failed: {status_line}")
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.send_frame(OPCODE_CLOSE, b"")
+            except RosbridgeError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def send_bytes(self, data):
+        try:
+            self.sock.sendall(data)
+        except socket.timeout:
+            raise RosbridgeError(f"Timed out sending to rosbridge at {self.host}:{self.port}")
+        except OSError as e:
+            raise RosbridgeError(f"Connection to rosbridge at {self.host}:{self.port} failed: {e}")
+
+    def receive_bytes(self):
+        try:
+            data = self.sock.recv(65536)
+        except socket.timeout:
+            raise RosbridgeError(f"Timed out waiting for rosbridge at {self.host}:{self.port}")
+        except OSError as e:
+            raise RosbridgeError(f"Connection to rosbridge at {self.host}:{self.port} failed: {e}")
+        if not data:
+            raise RosbridgeError(f"Rosbridge at {self.host}:{self.port} closed the connection")
+        return data
+
+    def read_exactly(self, size):
+        while len(self.buffer) < size:
+            self.buffer += self.receive_bytes()
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    @staticmethod
+    def frame_header(opcode, length):
+        """Return the header of a single masked frame of length bytes."""
+        header = bytes([0x80 | opcode])
+        if length < 126:
+            return header + bytes([0x80 | length])
+        if length < 1 << 16:
+            return header + bytes([0x80 | 126]) + struct.pack("!H", length)
+        return header + bytes([0x80 | 127]) + struct.pack("!Q", length)
+
+    def send_frame(self, opcode, payload):
+        """Send a single masked websocket frame (clients must mask their frames)."""
+        mask = os.urandom(4)
+        self.send_bytes(self.frame_header(opcode, len(payload)) + mask + apply_mask(payload, mask))
+
+    def receive_frame(self):
+        """Return (fin, opcode, payload) of the next frame."""
+        first, second = self.read_exactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self.read_exactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self.read_exactly(8))[0]
+        mask = self.read_exactly(4) if second & 0x80 else None
+        payload = self.read_exactly(length)
+        if mask:
+            payload = apply_mask(payload, mask)
+        return bool(first & 0x80), first & 0x0F, payload
+
+    def receive_data(self):
+        """Return the opcode (text or binary) and payload of the next complete data message, answering pings on the way."""
+        message = b""
+        message_opcode = None
+        while True:
+            fin, opcode, payload = self.receive_frame()
+            if opcode == OPCODE_PING:
+                self.send_frame(OPCODE_PONG, payload)
+                continue
+            if opcode == OPCODE_PONG:
+                continue
+            if opcode == OPCODE_CLOSE:
+                raise RosbridgeError(f"Rosbridge at {self.host}:{self.port} closed the connection")
+            if opcode != OPCODE_CONTINUATION:
+                message_opcode = opcode
+            message += payload
+            if fin:
+                return message_opcode, message
+
+    def receive_message(self):
+        """Return the payload of the next complete data message, answering pings on the way."""
+        return self.receive_data()[1]
+
+    def ping(self):
+        """Send a websocket ping and return the round-trip time in seconds once its pong arrives."""
+        payload = os.urandom(8)
+        start_time = time.perf_counter()
+        self.send_frame(OPCODE_PING, payload)
+        while True:
+            fin, opcode, data = self.receive_frame()
+            if opcode == OPCODE_PONG and data == payload:
+                return time.perf_counter() - start_time
+            if opcode == OPCODE_PING:
+                self.send_frame(OPCODE_PONG, data)
+            elif opcode == OPCODE_CLOSE:
+                raise RosbridgeError(f"Rosbridge at {self.host}:{self.port} closed the connection")
+
+    def send(self, message):
+        """Send one rosbridge protocol message (a dict)."""
+        self.send_frame(OPCODE_TEXT, json.dumps(message).encode('utf-8'))
+
+    def send_many(self, messages):
+        """Send several rosbridge protocol messages with a single write."""
+        frames = []
+        for message in messages:
+            payload = json.dumps(message).encode('utf-8')
+            mask = os.urandom(4)
+            frames.append(self.frame_header(OPCODE_TEXT, len(payload)) + mask + apply_mask(payload, mask))
+        self.send_bytes(b"".join(frames))
+
+    def receive(self):
+        """
+        Receive the next rosbridge protocol message as a dict.
+
+        Messages of subscriptions with "png" or "cbor" compression are decompressed. A message
+        that cannot be decoded raises RosbridgeDecodeError, a RosbridgeError.
+        """
+        opcode, payload = self.receive_data()
+        try:
+            if opcode == OPCODE_BINARY:
+                message = cbor_loads(payload)
+            else:
+                message = json.loads(payload.decode('utf-8'))
+                if isinstance(message, dict) and message.get("op") == "png":
+                    message = json.loads(decode_png(message["data"]))
+        except (ValueError, KeyError, IndexError, TypeError, struct.error, zlib.error) as e:
+            raise RosbridgeDecodeError(f"Could not decode a message from rosbridge at {self.host}:{self.port}: "
+                                 f"{type(e).__name__}: {e}")
+        if not isinstance(message, dict):
+            raise RosbridgeDecodeError(f"Rosbridge at {self.host}:{self.port} sent a {type(message).__name__} "
+                                 "instead of a message")
+        return message
+
+    def advertise(self, topic, message_type):
+        self.send({"op": "advertise", "topic": topic, "type": message_type})
+
+    def publish(self, topic, msg):
+        self.send({"op": "publish", "topic": topic, "msg": msg})
+
+    def subscribe(self, topic, message_type=None, compression=None, queue_length=None):
+        """Subscribe to a topic; its messages arrive as {"op": "publish", "topic": ..., "msg": ...}."""
+        message = {"op": "subscribe", "topic": topic}
+        if message_type:
+            message["type"] = message_type
+        if compression and compression != "none":
+            message["compression"] = compression
+        if queue_length is not None:
+            message["queue_length"] = queue_length
+        self.send(message)
+
+    def call_service(self, service, args=None):
+        """Call a ROS service through rosbridge and return its response values."""
+        request_id = f"call_service:{service}:{next(self.ids)}"
+        self.send({"op": "call_service", "id": request_id, "service": service, "args": args or {}})
+        while True:
+            message = self.receive()
+            if message.get("op") == "service_response" and message.get("id") == request_id:
+                if not message.get("result", True):
+                    raise RosbridgeError(f"Service call {service} failed: {message.get('values')}")
+                return message.get("values", {})
+
+    def get_topics(self):
+        """Return the topics currently known to the ROS graph, via rosapi."""
+        return self.call_service("/rosapi/topics").get("topics", [])
@@ -0,0 +1,196 @@
+import base64
+import math
+import struct
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# PNG color type of the images rosbridge packs messages into
+PNG_RGB = 2
+
+# Tags of RFC 8746 typed arrays, which rosbridge uses for numeric arrays in CBOR messages
+CBOR_TYPED_ARRAY_TAGS = range(64, 88)
+
+def png_chunk(chunk_type, data):
+    return struct.pack("!I", len(data)) + chunk_type + data + struct.pack("!I", zlib.crc32(chunk_type + data))
+
+def encode_png(text):
+    """
+    Pack text into a base64 PNG image the way rosbridge's "png" compression does: the UTF-8
+    bytes are the pixels of a roughly square RGB image, padded with newlines.
+    """
+    data = text.encode('utf-8')
+    width = max(1, math.floor(math.sqrt(len(data) / 3.0)))
+    height = max(1, math.ceil(len(data) / 3.0 / width))
+    data += b"\n" * (width * height * 3 - len(data))
+    stride = width * 3
+    # Filter type 0 (none) on every row
+    raw = b"".join(b"\x00" + data[row * stride:(row + 1) * stride] for row in range(height))
+    header = struct.pack("!IIBBBBB", width, height, 8, PNG_RGB, 0, 0, 0)
+    image = PNG_SIGNATURE + png_chunk(b"IHDR", header) + png_chunk(b"IDAT", zlib.compress(raw)) + png_chunk(b"IEND", b"")
+    return base64.standard_b64encode(image).decode('ascii')
+
+def paeth(left, up, up_left):
+    estimate = left + up - up_left
+    distances = (abs(estimate - left), abs(estimate - up), abs(estimate - up_left))
+    return (left, up, up_left)[distances.index(min(distances))]
+
+def unfilter_rows(raw, width, height, bytes_per_pixel):
+    """Undo the PNG row filters of 8-bit image data."""
+    stride = width * bytes_per_pixel
+    previous = bytearray(stride)
+    rows = []
+    offset = 0
+    for _ in range(height):
+        filter_type = raw[offset]
+        row = bytearray(raw[offset + 1:offset + 1 + stride])
+        offset += stride + 1
+        if filter_type == 1:
+            for x in range(bytes_per_pixel, stride):
+                row[x] = (row[x] + row[x - bytes_per_pixel]) & 0xFF
+        elif filter_type == 2:
+            for x in range(stride):
+                row[x] = (row[x] + previous[x]) & 0xFF
+        elif filter_type == 3:
+            for x in range(stride):
+                left = row[x - bytes_per_pixel] if x >= bytes_per_pixel else 0
+                row[x] = (row[x] + (left + previous[x]) // 2) & 0xFF
+        elif filter_type == 4:
+            for x in range(stride):
+                left = row[x - bytes_per_pixel] if x >= bytes_per_pixel else 0
+                up_left = previous[x - bytes_per_pixel] if x >= bytes_per_pixel else 0
+                row[x] = (row[x] + paeth(left, previous[x], up_left)) & 0xFF
+        elif filter_type != 0:
+            raise ValueError(f"Unknown PNG filter type {filter_type}")
+        rows.append(bytes(row))
+        previous = row
+    return b"".join(rows)
+
+def decode_png(data):
+    """Unpack the text of a rosbridge "png" message (base64 PNG image), removing the newline padding."""
+    image = base64.standard_b64decode(data)
+    if not image.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG image")
+    offset = len(PNG_SIGNATURE)
+    idat = []
+    width = height = None
+    bytes_per_pixel = 3
+    while offset < len(image):
+        length, = struct.unpack_from("!I", image, offset)
+        chunk_type = image[offset + 4:offset + 8]
+        chunk = image[offset + 8:offset + 8 + length]
+        offset += length + 12
+        if chunk_type == b"IHDR":
+            width, height, bit_depth, color_type = struct.unpack_from("!IIBB", chunk)
+            if bit_depth != 8 or color_type not in (0, 2, 6):
+                raise ValueError(f"Unsupported PNG format (bit depth {bit_depth}, color type {color_type})")
+            bytes_per_pixel = {0: 1, 2: 3, 6: 4}[color_type]
+        elif chunk_type == b"IDAT":
+            idat.append(chunk)
+        elif chunk_type == b"IEND":
+            break
+    if width is None:
+        raise ValueError("PNG image without header")
+    pixels = unfilter_rows(zlib.decompress(b"".join(idat)), width, height, bytes_per_pixel)
+    return pixels.decode('utf-8').replace("\n", "")
+
+def cbor_head(major, value):
+    if value < 24:
+        return bytes([major << 5 | value])
+    for additional, size, format_ in ((24, 1, "!B"), (25, 2, "!H"), (26, 4, "!I"), (27, 8, "!Q")):
+        if value < 1 << (8 * size):
+            return bytes([major << 5 | additional]) + struct.pack(format_, value)
+    raise ValueError(f"Integer {value} too large for CBOR")
+
+def cbor_dumps(value):
+    """Encode JSON-like values (None, bool, int, float, str, bytes, list, dict) as CBOR."""
+    if value is None:
+        return b"\xf6"
+    if value is True:
+        return b"\xf5"
+    if value is False:
+        return b"\xf4"
+    if isinstance(value, int):
+        return cbor_head(0, value) if value >= 0 else cbor_head(1, -1 - value)
+    if isinstance(value, float):
+        return b"\xfb" + struct.pack("!d", value)
+    if isinstance(value, str):
+        encoded = value.encode('utf-8')
+        return cbor_head(3, len(encoded)) + encoded
+    if isinstance(value, (bytes, bytearray)):
+        return cbor_head(2, len(value)) + bytes(value)
+    if isinstance(value, (list, tuple)):
+        return cbor_head(4, len(value)) + b"".join(cbor_dumps(item) for item in value)
+    if isinstance(value, dict):
+        return cbor_head(5, len(value)) + b"".join(cbor_dumps(key) + cbor_dumps(item) for key, item in value.items())
+    raise TypeError(f"Cannot encode {type(value).__name__} as CBOR")
+
+def typed_array(tag, data):
+    """Decode an RFC 8746 typed array (tags 64 to 87) into a list of numbers."""
+    bits = tag - 64
+    little_endian = "<" if bits & 0b100 else ">"
+    size_index = bits & 0b11
+    if bits & 0b10000:
+        size = 2 << size_index
+        format_ = {2: "e", 4: "f", 8: "d"}.get(size)
+    else:
+        size = 1 << size_index
+        format_ = {1: "b", 2: "h", 4: "i", 8: "q"}[size] if bits & 0b1000 else {1: "B", 2: "H", 4: "I", 8: "Q"}[size]
+    if format_ is None:
+        raise ValueError(f"Unsupported CBOR typed array tag {tag}")
+    return list(struct.unpack(f"{little_endian}{len(data) // size}{format_}", data))
+
+def cbor_item(data, offset):
+    """Decode the CBOR item at offset. Returns the value and the offset after it."""
+    initial = data[offset]
+    major, additional = initial >> 5, initial & 0x1F
+    offset += 1
+    if major == 7:
+        if additional == 20:
+            return False, offset
+        if additional == 21:
+            return True, offset
+        if additional in (22, 23):
+            return None, offset
+        for code, size, format_ in ((25, 2, "!e"), (26, 4, "!f"), (27, 8, "!d")):
+            if additional == code:
+                return struct.unpack_from(format_, data, offset)[0], offset + size
+        raise ValueError(f"Unsupported CBOR simple value {additional}")
+    if additional < 24:
+        value = additional
+    elif additional <= 27:
+        size = 1 << (additional - 24)
+        value = int.from_bytes(data[offset:offset + size], 'big')
+        offset += size
+    else:
+        raise ValueError("Indefinite-length CBOR items are not supported")
+
+    if major == 0:
+        return value, offset
+    if major == 1:
+        return -1 - value, offset
+    if major == 2:
+        return bytes(data[offset:offset + value]), offset + value
+    if major == 3:
+        return bytes(data[offset:offset + value]).decode('utf-8'), offset + value
+    if major == 4:
+        items = []
+        for _ in range(value):
+            item, offset = cbor_item(data, offset)
+            items.append(item)
+        return items, offset
+    if major == 5:
+        items = {}
+        for _ in range(value):
+            key, offset = cbor_item(data, offset)
+            items[key], offset = cbor_item(data, offset)
+        return items, offset
+    # Tags: typed arrays are unpacked, other tags are ignored
+    item, offset = cbor_item(data, offset)
+    if value in CBOR_TYPED_ARRAY_TAGS and isinstance(item, bytes):
+        return typed_array(value, item), offset
+    return item, offset
+
+def cbor_loads(data):
+    """Decode a CBOR-encoded rosbridge message."""
+    value, _ = cbor_item(data, 0)
+    return value
@@ -0,0 +1,229 @@
+import asyncio
+import time
+
+from process_supervisor import SupervisedProcess, timestamp
+from rosbridge_client import RosbridgeClient, RosbridgeError
+from telemetry import percentile
+
+# Time a freshly started bridge gets to accept websocket connections
+BRIDGE_STARTUP_TIMEOUT = 15.0
+BRIDGE_STARTUP_POLL_INTERVAL = 0.2
+
+# Health checks of a running bridge: interval, timeout of one ping and
+# number of consecutive failed checks after which the bridge is restarted
+BRIDGE_HEALTH_INTERVAL = 2.0
+BRIDGE_PING_TIMEOUT = 1.0
+BRIDGE_MAX_FAILED_CHECKS = 3
+
+# After a start that did not bring the bridge up, the next restart waits BRIDGE_RESTART_BACKOFF
+# seconds, doubling with every further failed start up to BRIDGE_MAX_RESTART_BACKOFF. After
+# BRIDGE_MAX_FAILED_STARTS failed starts in a row the bridge is marked as failed for good
+BRIDGE_RESTART_BACKOFF = 2.0
+BRIDGE_MAX_RESTART_BACKOFF = 60.0
+BRIDGE_MAX_FAILED_STARTS = 5
+
+def bridge_command(port, launch_args=None):
+    """Return the ros2 launch command of a rosbridge websocket server on port, with extra launch arguments."""
+    cmd = ["ros2", "launch", "rosbridge_server", "rosbridge_websocket_launch.xml", f"port:={port}"]
+    for name, value in (launch_args or {}).items():
+        if isinstance(value, bool):
+            value = str(value).lower()
+        cmd.append(f"{name}:={value}")
+    return cmd
+
+def measure_rtt(port, timeout=BRIDGE_PING_TIMEOUT):
+    """Ping the rosbridge websocket on port and return the round-trip time in seconds, or None if it is unreachable."""
+    try:
+        with RosbridgeClient("127.0.0.1", port, timeout=timeout) as client:
+            return client.ping()
+    except RosbridgeError:
+        return None
+
+class BridgeFailedError(Exception):
+    pass
+
+class ManagedBridge:
+    """
+    A rosbridge websocket server that is health-checked while it runs.
+
+    A background task pings the websocket every BRIDGE_HEALTH_INTERVAL seconds and
+    restarts the bridge if its process exited or it stopped answering. A bridge that
+    does not come up after BRIDGE_MAX_FAILED_STARTS starts in a row is marked as failed.
+    """
+
+    def __init__(self, label, port, env=None, launch_args=None):
+        self.label = label
+        self.port = port
+        self.env = env
+        self.launch_args = launch_args or {}
+        self.process = None
+        self.monitor_task = None
+        self.lock = asyncio.Lock()
+        self.restarts = 0
+        # Starts in a row that did not bring the bridge up, and why the bridge failed for good
+        self.failed_restarts = 0
+        self.failure = None
+        self.rtts = []
+        self.last_rtt = None
+        # Bridges that never answered a ping are only restarted when their process exits
+        self.pingable = False
+        # Whether no iteration used the bridge since it was (re)started
+        self.fresh = False
+
+    def log(self, message):
+        print(f"[{timestamp()}] [{self.label}] {message}", flush=True)
+
+    async def check(self):
+        """Ping the bridge once and record the round-trip time. Returns it, or None if the bridge did not answer."""
+        rtt = await asyncio.to_thread(measure_rtt, self.port)
+        self.last_rtt = rtt
+        if rtt is not None:
+            self.rtts.append(rtt)
+            self.pingable = True
+        return rtt
+
+    async def launch(self):
+        """Start the bridge process and wait until its websocket accepts connections."""
+        self.process = await SupervisedProcess(self.label, bridge_command(self.port, self.launch_args),
+                                               env=self.env).start()
+        self.fresh = True
+        start_time = time.monotonic()
+        while time.monotonic() - start_time < BRIDGE_STARTUP_TIMEOUT:
+            if not self.process.running:
+                self.log(f"Bridge exited during startup (code {self.process.returncode}).")
+                return False
+            if await self.check() is not None:
+                self.log(f"Bridge on port {self.port} is up after {time.monotonic() - start_time:.2f}s "
+                         f"(RTT {self.last_rtt * 1000:.1f} ms).")
+                return True
+            await asyncio.sleep(BRIDGE_STARTUP_POLL_INTERVAL)
+        self.log(f"Bridge on port {self.port} did not answer within {BRIDGE_STARTUP_TIMEOUT:.0f}s.")
+        return False
+
+    def restart_delay(self):
+        """Return the backoff before the next restart: none after a successful start, then doubling."""
+        if self.failed_restarts == 0:
+            return 0.0
+        return min(BRIDGE_RESTART_BACKOFF * 2 ** (self.failed_restarts - 1), BRIDGE_MAX_RESTART_BACKOFF)
+
+    async def restart(self, reason):
+        """
+        Stop and start the bridge process again, after the backoff of the restarts before that failed.
+        Returns whether the bridge came up; a failed bridge is not restarted.
+        """
+        async with self.lock:
+            if self.failure is not None:
+                return False
+            delay = self.restart_delay()
+            if delay:
+                self.log(f"Waiting {delay:.1f}s before restarting bridge on port {self.port} "
+                         f"({self.failed_restarts} failed start(s) in a row).")
+                await asyncio.sleep(delay)
+            self.log(f"Restarting bridge on port {self.port}: {reason}")
+            if self.process is not None:
+                await self.process.stop()
+            self.restarts += 1
+            if await self.launch():
+                self.failed_restarts = 0
+                return True
+            self.failed_restarts += 1
+            if self.failed_restarts >= BRIDGE_MAX_FAILED_STARTS:
+                self.failure = f"it did not come up after {self.failed_restarts} starts in a row ({reason})"
+                self.log(f"Giving up on bridge on port {self.port}: {self.failure}")
+                await self.process.stop()
+            return False
+
+    async def monitor(self):
+        failed_checks = 0
+        while self.failure is None:
+            await asyncio.sleep(BRIDGE_HEALTH_INTERVAL)
+            if self.lock.locked() or self.failure is not None:
+                continue
+            if not self.process.running:
+                failed_checks = 0
+                await self.restart(f"process exited with code {self.process.returncode}")
+                continue
+            if await self.check() is not None or not self.pingable:
+                failed_checks = 0
+                continue
+            failed_checks += 1
+            if failed_checks >= BRIDGE_MAX_FAILED_CHECKS:
+                failed_checks = 0
+                await self.restart(f"no answer to {BRIDGE_MAX_FAILED_CHECKS} health checks")
+
+    async def start(self):
+        """Start the bridge and its health monitor."""
+        if not await self.launch():
+            self.failed_restarts = 1
+        self.monitor_task = asyncio.create_task(self.monitor())
+        return self
+
+    def raise_if_failed(self):
+        if self.failure is not None:
+            raise BridgeFailedError(f"ROS Bridge on port {self.port} failed: {self.failure}")
+
+    async def ensure_healthy(self):
+        """
+        Make sure the bridge is running and answering before an iteration uses it, restarting it if needed.
+        Raises BridgeFailedError if the bridge failed for good.
+        """
+        # Let a restart by the health monitor finish first
+        async with self.lock:
+            pass
+        self.raise_if_failed()
+        if not self.process.running:
+            await self.restart(f"process exited with code {self.process.returncode}")
+        elif await self.check() is None and self.pingable:
+            await self.restart("no answer to health check")
+        self.raise_if_failed()
+
+    async def stop(self):
+        if self.monitor_task is not None:
+            self.monitor_task.cancel()
+            await asyncio.gather(self.monitor_task, return_exceptions=True)
+        async with self.lock:
+            if self.process is not None:
+                await self.process.stop()
+
+    def stats(self):
+        """Return the number of restarts and round-trip time percentiles (in seconds) of the bridge."""
+        return {
+            "restarts": self.restarts,
+            "rtt_p50": percentile(self.rtts, 0.5),
+            "rtt_p95": percentile(self.rtts, 0.95),
+            "rtt_max": max(self.rtts) if self.rtts else None,
+        }
+
+class BridgePool:
+    """One managed bridge per concurrent slot, each on its own port and ROS domain."""
+
+    def __init__(self, launch_args=None):
+        self.launch_args = launch_args or {}
+        self.bridges = {}
+
+    async def start(self, slots, environment):
+        """Start the bridges of all slots concurrently. environment(slot) returns the environment of a slot."""
+        for slot in slots:
+            self.bridges[slot["index"]] = ManagedBridge(f"slot{slot['index']} rosbridge", slot["port"],
+                                                        env=environment(slot), launch_args=self.launch_args)
+        print(f"Starting {len(self.bridges)} ROS Bridge(s)...")
+        await asyncio.gather(*(bridge.start() for bridge in self.bridges.values()))
+
+    def bridge(self, slot):
+        return self.bridges[slot["index"]]
+
+    async def stop(self):
+        print("Stopping ROS Bridges...")
+        await asyncio.gather(*(bridge.stop() for bridge in self.bridges.values()))
+
+    def print_stats(self):
+        """Print restarts and round-trip latencies of every bridge."""
+        for index, bridge in sorted(self.bridges.items()):
+            stats = bridge.stats()
+            if stats["rtt_p50"] is None:
+                latency = "no successful health checks"
+            else:
+                latency = (f"RTT p50 {stats['rtt_p50'] * 1000:.1f} ms, p95 {stats['rtt_p95'] * 1000:.1f} ms, "
+                           f"max {stats['rtt_max'] * 1000:.1f} ms")
+            failure = f", failed: {bridge.failure}" if bridge.failure is not None else ""
+            print(f"ROS Bridge slot {index} (port {bridge.port}): {stats['restarts']} restarts, {latency}{failure}")
@@ -0,0 +1,410 @@
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import os
+import socket
+import sys
+import time
+
+from config_schema import print_errors, validate_simulation_config
+from log_collector import collector_from_config
+from process_supervisor import timestamp
+from sim_runner import (
+    DEFAULT_RESULTS_FILE,
+    DEFAULT_ROS_DOMAIN_ID,
+    DEFAULT_ROSBRIDGE_PORT,
+    Scheduler,
+    iter_jobs,
+    print_summary,
+    read_config,
+    run_batch,
+)
+from telemetry import ResultsWriter
+
+DEFAULT_COORDINATOR_PORT = 7400
+
+# A job is handed to another worker if its lease is not renewed for this long
+DEFAULT_LEASE_TIME = 30.0
+LEASE_CHECK_INTERVAL = 1.0
+# Workers renew the leases of their running jobs this often
+HEARTBEAT_INTERVAL = 5.0
+# How long a worker waits before asking again while all remaining jobs are leased to others
+WAIT_INTERVAL = 2.0
+WORKER_RECONNECT_INTERVAL = 2.0
+
+# Artifacts (recorded bags) are sent to the coordinator in chunks of this size
+ARTIFACT_CHUNK_SIZE = 256 * 1024
+DEFAULT_ARTIFACTS_DIR = "artifacts"
+
+# Settings of the simulation config that the coordinator passes on to its workers
+WORKER_SETTINGS = ("reuseUnreal", "restartBridge", "rosbridgeArgs", "record", "logging")
+
+def log(message):
+    print(f"[{timestamp()}] [cluster] {message}", flush=True)
+
+async def send_message(writer, message):
+    writer.write(json.dumps(message).encode("utf-8") + b"\n")
+    await writer.drain()
+
+async def read_message(reader):
+    """Read one JSON message. Returns None when the connection was closed."""
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+def safe_artifact_path(artifacts_dir, name):
+    """Return the path an artifact is stored at, refusing names that point outside artifacts_dir."""
+    path = os.path.normpath(os.path.join(artifacts_dir, name))
+    if os.path.isabs(name) or not path.startswith(os.path.normpath(artifacts_dir) + os.sep):
+        raise ValueError(f"Invalid artifact name '{name}'")
+    return path
+
+class Coordinator:
+    """
+    Hands the iterations of a batch out to workers over TCP and collects their results.
+
+    Every job handed out is leased to its worker. Workers renew the leases of their running
+    jobs with heartbeats; a job whose lease expires or whose worker disconnects is handed to
+    the next worker that asks for work, and a late result of the old lease is ignored.
+    Results are written to the results file and artifacts (recorded bags) are stored below
+    artifacts_dir, so everything ends up on the coordinator's host.
+    """
+
+    def __init__(self, scheduler, settings, lease_time=DEFAULT_LEASE_TIME, artifacts_dir=DEFAULT_ARTIFACTS_DIR):
+        self.scheduler = scheduler
+        # Sent to every worker: the project, the batch and the WORKER_SETTINGS of the config
+        self.settings = settings
+        self.lease_time = lease_time
+        self.artifacts_dir = artifacts_dir
+        self.job_ids = itertools.count(1)
+        self.leases = {}
+        self.workers = set()
+        self.connections = {}
+        self.exhausted = False
+        self.reassigned = 0
+        self.finished = asyncio.Event()
+
+    def check_finished(self):
+        if self.exhausted and not self.leases and not self.scheduler.retry_queue:
+            self.finished.set()
+
+    def requeue(self, job_id, reason):
+        """Hand a leased job to the next worker that asks for work."""
+        lease = self.leases.pop(job_id)
+        self.reassigned += 1
+        job = lease["job"]
+        log(f"Reassigning {job['simulation'].get('name', 'simulation')} iteration {job['iteration']} "
+            f"(was leased to {lease['worker']}): {reason}")
+        self.scheduler.retry_queue.appendleft(job)
+
+    async def assign(self, worker, writer, request):
+        job = await self.scheduler.next_job()
+        if job is None:
+            self.exhausted = True
+            await send_message(writer, {"type": "wait" if self.leases else "done", "request": request})
+            self.check_finished()
+            return
+        job_id = next(self.job_ids)
+        self.leases[job_id] = {"job": job, "worker": worker, "expires": time.monotonic() + self.lease_time}
+        log(f"{job['simulation'].get('name', 'simulation')} iteration {job['iteration']} "
+            f"(attempt {job['attempt']}) -> {worker}")
+        await send_message(writer, {"type": "job", "request": request, "job": dict(job, id=job_id)})
+
+    def store_artifact(self, message):
+        path = safe_artifact_path(self.artifacts_dir, message["name"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "r+b" if message["offset"] and os.path.exists(path) else "wb") as f:
+            f.seek(message["offset"])
+            f.write(base64.b64decode(message["data"]))
+
+    def complete(self, worker, message):
+        lease = self.leases.get(message["job_id"])
+        if lease is None or lease["worker"] != worker:
+            log(f"Ignoring result of job {message['job_id']} from {worker}: it was reassigned.")
+            return
+        del self.leases[message["job_id"]]
+        result = dict(message["result"], worker=worker)
+        if result.get("bag"):
+            # The bag was sent along; point the results at the coordinator's copy
+            result["bag"] = os.path.join(self.artifacts_dir, result["bag"])
+        self.scheduler.report(lease["job"], result, message["duration"])
+        self.check_finished()
+
+    async def handle_worker(self, reader, writer):
+        self.connections[writer] = asyncio.current_task()
+        hello = await read_message(reader)
+        if not hello or hello.get("type") != "hello":
+            self.connections.pop(writer, None)
+            writer.close()
+            return
+        worker = hello["worker"]
+        while worker in self.workers:
+            worker += "'"
+        self.workers.add(worker)
+        log(f"Worker {worker} connected with {hello.get('slots', 1)} slot(s).")
+        try:
+            await send_message(writer, dict(self.settings, type="welcome", worker=worker))
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                if message["type"] == "ready":
+                    await self.assign(worker, writer, message["request"])
+                elif message["type"] == "heartbeat":
+                    for job_id in message["jobs"]:
+                        if self.leases.get(job_id, {}).get("worker") == worker:
+                            self.leases[job_id]["expires"] = time.monotonic() + self.lease_time
+                elif message["type"] == "artifact":
+                    self.store_artifact(message)
+                elif message["type"] == "result":
+                    self.complete(worker, message)
+        except (ConnectionError, ValueError) as e:
+            log(f"Lost worker {worker}: {e}")
+        finally:
+            self.workers.discard(worker)
+            self.connections.pop(writer, None)
+            for job_id, lease in list(self.leases.items()):
+                if lease["worker"] == worker:
+                    self.requeue(job_id, "worker disconnected")
+            log(f"Worker {worker} disconnected.")
+            writer.close()
+
+    async def watch_leases(self):
+        while True:
+            await asyncio.sleep(LEASE_CHECK_INTERVAL)
+            now = time.monotonic()
+            for job_id, lease in list(self.leases.items()):
+                if lease["expires"] < now:
+                    self.requeue(job_id, f"no heartbeat for {self.lease_time:.0f}s")
+
+    async def run(self, host, port):
+        server = await asyncio.start_server(self.handle_worker, host, port, limit=4 * ARTIFACT_CHUNK_SIZE)
+        log(f"Coordinator listening on {host}:{port}.")
+        watcher = asyncio.create_task(self.watch_leases())
+        try:
+            await self.finished.wait()
+        finally:
+            watcher.cancel()
+            server.close()
+            # Workers that are still connected see the connection close as "done"
+            for writer in list(self.connections):
+                writer.close()
+            await asyncio.gather(*self.connections.values(), return_exceptions=True)
+
+class RemoteScheduler(Scheduler):
+    """
+    A worker's view of the coordinator's job queue, with the interface of the local Scheduler.
+
+    Retries are left to the coordinator. Results and their artifacts are sent back as soon
+    as an iteration is done.
+    """
+
+    def __init__(self, reader, writer, batch_info):
+        super().__init__(iter(()), 0, batch_info=batch_info)
+        self.reader = reader
+        self.writer = writer
+        self.requests = itertools.count(1)
+        self.pending = {}
+        self.running = {}
+        self.sends = set()
+        self.reader_task = asyncio.create_task(self.read_messages())
+        self.heartbeat_task = asyncio.create_task(self.send_heartbeats())
+        self.done = False
+
+    async def read_messages(self):
+        try:
+            while True:
+                message = await read_message(self.reader)
+                if message is None:
+                    break
+                future = self.pending.pop(message.get("request"), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except (ConnectionError, ValueError):
+            pass
+        # The coordinator is gone: no more jobs for any slot
+        for future in self.pending.values():
+            if not future.done():
+                future.set_result({"type": "done"})
+        self.pending.clear()
+        self.done = True
+
+    async def send_heartbeats(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await send_message(self.writer, {"type": "heartbeat", "jobs": list(self.running)})
+            except ConnectionError:
+                return
+
+    async def next_job(self):
+        while not self.done:
+            request = next(self.requests)
+            future = asyncio.get_running_loop().create_future()
+            self.pending[request] = future
+            try:
+                await send_message(self.writer, {"type": "ready", "request": request})
+            except ConnectionError:
+                return None
+            message = await future
+            if message["type"] == "job":
+                job = message["job"]
+                self.running[job["id"]] = job
+                return job
+            if message["type"] == "done":
+                return None
+            await asyncio.sleep(WAIT_INTERVAL)
+        return None
+
+    def report(self, job, result, duration):
+        super().report(job, result, duration)
+        task = asyncio.create_task(self.send_result(job, result, duration))
+        self.sends.add(task)
+        task.add_done_callback(self.sends.discard)
+
+    async def send_artifacts(self, job, bag):
+        """Send the files of a recorded bag. Returns the bag's name relative to the artifacts directory."""
+        name = os.path.join(self.batch_info["batch"], os.path.basename(os.path.normpath(bag)))
+        files = [bag] if os.path.isfile(bag) else [os.path.join(bag, f) for f in sorted(os.listdir(bag))]
+        for path in files:
+            artifact = name if path == bag else os.path.join(name, os.path.basename(path))
+            with open(path, "rb") as f:
+                offset = 0
+                while True:
+                    data = f.read(ARTIFACT_CHUNK_SIZE)
+                    if not data and offset:
+                        break
+                    await send_message(self.writer, {"type": "artifact", "job_id": job["id"], "name": artifact,
+                                                     "offset": offset, "data": base64.b64encode(data).decode()})
+                    offset += len(data)
+                    if not data:
+                        break
+        return name
+
+    async def send_result(self, job, result, duration):
+        result = dict(result, unreal_exec=self.batch_info["unreal_exec"])
+        try:
+            if result.get("bag") and os.path.exists(result["bag"]):
+                result["bag"] = await self.send_artifacts(job, result["bag"])
+            await send_message(self.writer, {"type": "result", "job_id": job["id"], "result": result,
+                                             "duration": duration})
+        except (ConnectionError, OSError) as e:
+            log(f"Could not send the result of job {job['id']}: {e}")
+        finally:
+            # Heartbeats keep renewing the job's lease until its bag and result are sent
+            self.running.pop(job["id"], None)
+
+    async def close(self):
+        await asyncio.gather(*self.sends, return_exceptions=True)
+        self.heartbeat_task.cancel()
+        self.writer.close()
+        await asyncio.gather(self.reader_task, self.heartbeat_task, return_exceptions=True)
+
+async def run_coordinator(config, host, port, retries, results_file, lease_time, artifacts_dir):
+    batch_info = {"batch": time.strftime("%Y%m%dT%H%M%S"), "ue_project": config["ueProject"], "unreal_exec": None}
+    logs = collector_from_config(config.get("logging"), {"Application": "sim_cluster", "Batch": batch_info["batch"]})
+    scheduler = Scheduler(iter_jobs(config["simulations"]), retries, ResultsWriter(results_file), batch_info, logs)
+    settings = {key: config[key] for key in WORKER_SETTINGS if key in config}
+    settings.update(ueProject=config["ueProject"], batch=batch_info["batch"])
+    coordinator = Coordinator(scheduler, settings, lease_time, artifacts_dir)
+    start_time = time.monotonic()
+    try:
+        await coordinator.run(host, port)
+    finally:
+        if logs is not None:
+            logs.close()
+    print_summary(scheduler.results, time.monotonic() - start_time)
+    print(f"{coordinator.reassigned} job(s) reassigned. Results written to {results_file} "
+          f"(batch {batch_info['batch']}), artifacts to {artifacts_dir}.")
+    return scheduler.results
+
+async def run_worker(coordinator, name, unreal_exec_path, max_parallel, base_port, base_domain_id):
+    """Run jobs of a coordinator until it has none left. Reconnects while the coordinator is not reachable yet."""
+    host, _, port = coordinator.rpartition(":")
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host or "127.0.0.1", int(port or DEFAULT_COORDINATOR_PORT),
+                                                           limit=4 * ARTIFACT_CHUNK_SIZE)
+            break
+        except OSError as e:
+            log(f"Coordinator {coordinator} not reachable ({e}), retrying...")
+            await asyncio.sleep(WORKER_RECONNECT_INTERVAL)
+
+    await send_message(writer, {"type": "hello", "worker": name, "slots": max_parallel})
+    welcome = await read_message(reader)
+    if not welcome or welcome.get("type") != "welcome":
+        log("The coordinator did not accept this worker.")
+        return []
+    log(f"Connected to {coordinator} as {welcome['worker']}.")
+    batch_info = {"batch": welcome["batch"], "ue_project": welcome["ueProject"], "unreal_exec": unreal_exec_path}
+    scheduler = RemoteScheduler(reader, writer, batch_info)
+    try:
+        return await run_batch(
+            [], welcome["ueProject"], unreal_exec_path,
+            max_parallel=max_parallel,
+            base_port=base_port,
+            base_domain_id=base_domain_id,
+            reuse_unreal=welcome.get("reuseUnreal", False),
+            restart_bridge=welcome.get("restartBridge", False),
+            bridge_args=welcome.get("rosbridgeArgs"),
+            logging_config=welcome.get("logging"),
+            record=welcome.get("record"),
+            scheduler=scheduler,
+        )
+    finally:
+        await scheduler.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a simulation batch on several hosts")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    coordinator_parser = subparsers.add_parser("coordinator", help="Hand out the iterations of a batch to workers")
+    coordinator_parser.add_argument("--config", type=str, default="simulation_config.json",
+                                    help="Path to the simulation configuration file (default: simulation_config.json)")
+    coordinator_parser.add_argument("--host", type=str, default="0.0.0.0", help="Address to listen on (default: all)")
+    coordinator_parser.add_argument("--port", type=int, default=DEFAULT_COORDINATOR_PORT,
+                                    help=f"Port to listen on (default: {DEFAULT_COORDINATOR_PORT})")
+    coordinator_parser.add_argument("--retries", type=int, default=None,
+                                    help="How often a crashed iteration is retried (default: retries from the config, or 0)")
+    coordinator_parser.add_argument("--results", type=str, default=None,
+                                    help="CSV or JSONL file the results of all workers are appended to "
+                                         "(default: resultsFile from the config, or simulation_results.jsonl)")
+    coordinator_parser.add_argument("--lease-time", type=float, default=DEFAULT_LEASE_TIME,
+                                    help="Seconds without heartbeat after which a job is reassigned "
+                                         f"(default: {DEFAULT_LEASE_TIME:.0f})")
+    coordinator_parser.add_argument("--artifacts", type=str, default=DEFAULT_ARTIFACTS_DIR,
+                                    help=f"Directory the workers' recorded bags are collected in "
+                                         f"(default: {DEFAULT_ARTIFACTS_DIR})")
+
+    worker_parser = subparsers.add_parser("worker", help="Run iterations handed out by a coordinator")
+    worker_parser.add_argument("--coordinator", type=str, default=f"127.0.0.1:{DEFAULT_COORDINATOR_PORT}",
+                               help=f"host:port of the coordinator (default: 127.0.0.1:{DEFAULT_COORDINATOR_PORT})")
+    worker_parser.add_argument("--name", type=str, default=socket.gethostname(),
+                               help="Name of this worker in the results (default: the host name)")
+    worker_parser.add_argument("--unreal-path", type=str, required=True, help="Path to the Unreal Engine executable")
+    worker_parser.add_argument("--max-parallel", type=int, default=1,
+                               help="Maximum number of iterations running at the same time on this worker (default: 1)")
+    worker_parser.add_argument("--rosbridge-port", type=int, default=DEFAULT_ROSBRIDGE_PORT,
+                               help=f"First rosbridge port of this worker's slots (default: {DEFAULT_ROSBRIDGE_PORT})")
+    worker_parser.add_argument("--ros-domain-id", type=int, default=DEFAULT_ROS_DOMAIN_ID,
+                               help=f"First ROS_DOMAIN_ID of this worker's slots (default: {DEFAULT_ROS_DOMAIN_ID})")
+    args = parser.parse_args()
+
+    if args.mode == "coordinator":
+        config = read_config(args.config)
+        # The Unreal Engine executables are checked by the workers
+        if not print_errors(validate_simulation_config(config, args.config)):
+            sys.exit(1)
+        retries = args.retries if args.retries is not None else config.get("retries", 0)
+        asyncio.run(run_coordinator(config, args.host, args.port, retries,
+                                    args.results or config.get("resultsFile", DEFAULT_RESULTS_FILE),
+                                    args.lease_time, args.artifacts))
+    else:
+        asyncio.run(run_worker(args.coordinator, args.name, args.unreal_path, args.max_parallel,
+                               args.rosbridge_port, args.ros_domain_id))
+
+if __name__ == "__main__":
+    main()
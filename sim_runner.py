@@ -1,143 +1,704 @@
-import json
-import subprocess
-import time
-import os
-import sys
-import argparse
-
-def read_config(config_file):
-    """Read the JSON config file and return the data."""
-    with open(config_file, 'r') as f:
-        return json.load(f)
-
-def start_rosbridge():
-    """Start ROS Bridge using the appropriate ROS2 launch command."""
-    print("Starting ROS Bridge...")
-    rosbridge_cmd = ["ros2", "launch", "rosbridge_server", "rosbridge_websocket_launch.xml"]
-    return subprocess.Popen(rosbridge_cmd)
-
-def start_unreal_engine(unreal_exec_path, ue_project, ue_scenario, iteration):
-    """Start Unreal Engine with the specified project and scenario."""
-    print(f"Starting Unreal Engine (iteration {iteration})...")
-    ue_cmd = [
-        unreal_exec_path,  # Unreal Engine executable path
-        ue_project,
-        f'-config="{ue_scenario}"',
-        "-autostart=true",
-        f"-iteration={iteration}"
-    ]
-    return subprocess.Popen(ue_cmd)
-
-def wait_for_unreal_to_start(timeout):
-    """Wait for Unreal Engine to be ready with a timeout."""
-    print("Waiting for Unreal Engine to start...")
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        time.sleep(1)
-        # TODO: Implement Unreal Engine readiness check here
-        # For now, we just wait for the timeout
-    print("Unreal Engine is ready.")
-
-def start_ros2_launch(ros2_pkg, ros2_launch):
-    """Start the ROS2 launch file for the simulation."""
-    print(f"Starting ROS2 launch: {ros2_pkg} {ros2_launch}...")
-    ros2_cmd = ["ros2", "launch", ros2_pkg, ros2_launch]
-    return subprocess.Popen(ros2_cmd)
-
-def run_simulation(simulation, ue_project, unreal_exec_path):
-    """Run the simulation and manage Unreal/ROS processes."""
-    iterations = simulation["iterations"]
-    ue_scenario = simulation["ueScenario"]
-    ros2_pkg = simulation["ros2Pkg"]
-    ros2_launch = simulation["ros2Launch"]
-    timeout = simulation["timeout"]
-    max_sim_time = simulation["maxSimTime"]
-
-    for i in range(1, iterations + 1):
-        print(f"\n--- Starting Iteration {i} ---")
-        
-        # Start Unreal Engine
-        unreal_process = start_unreal_engine(unreal_exec_path, ue_project, ue_scenario, i)
-        wait_for_unreal_to_start(timeout)
-
-        # Start ROS2 launch process
-        ros2_process = start_ros2_launch(ros2_pkg, ros2_launch)
-        ros2_start_time = time.time()
-
-        # Monitor processes with max simulation time
-        while True:
-            unreal_running = unreal_process.poll() is None
-            ros2_running = ros2_process.poll() is None
-            elapsed_time = time.time() - ros2_start_time
-
-            if not unreal_running or not ros2_running:
-                print("One of the processes has stopped.")
-                break
-
-            if elapsed_time > max_sim_time:
-                print("Max simulation time reached. Stopping processes.")
-                break
-
-            time.sleep(1)
-
-        # Stop both Unreal Engine and ROS2 processes if still running
-        if unreal_running:
-            print("Stopping Unreal Engine...")
-            unreal_process.terminate()
-            unreal_process.wait()
-
-        if ros2_running:
-            print("Stopping ROS2 process...")
-            ros2_process.terminate()
-            ros2_process.wait()
-
-def main():
-    # Set up argument parser
-    parser = argparse.ArgumentParser(description="Automated Simulation Runner")
-    parser.add_argument(
-        "--config", 
-        type=str, 
-        default="simulation_config.json", 
-        help="Path to the simulation configuration file (default: simulation_config.json)"
-    )
-    parser.add_argument(
-        "--unreal-path", 
-        type=str, 
-        required=False, 
-        help="Path to the Unreal Engine executable"
-    )
-    
-    # Parse the arguments
-    args = parser.parse_args()
-
-    # Default Unreal Engine paths for different platforms
-    if sys.platform == "win32":
-        default_unreal_exec_path = r"C:\Program Files\Epic Games\UE_5.3\Engine\Binaries\Win64\UnrealEditor.exe"
-    elif sys.platform == "linux":
-        default_unreal_exec_path = "/path/to/UnrealEditor"  # Replace this with the actual path on your Linux system
-    else:
-        print("Unsupported platform. This script only supports Windows and Linux.")
-        sys.exit(1)
-
-    # Use the command-line argument if provided, otherwise use the default path
-    unreal_exec_path = args.unreal_path if args.unreal_path else default_unreal_exec_path
-
-    # Read the configuration
-    config = read_config(args.config)
-
-    # Start ROS Bridge
-    rosbridge_process = start_rosbridge()
-
-    try:
-        # Iterate over all simulations
-        for simulation in config["simulations"]:
-            run_simulation(simulation, config["ueProject"], unreal_exec_path)
-    finally:
-        # Ensure that ROS Bridge is stopped at the end
-        if rosbridge_process.poll() is None:
-            print("Stopping ROS Bridge...")
-            rosbridge_process.terminate()
-            rosbridge_process.wait()
-
-if __name__ == "__main__":
-    main()
+import asyncio
+import json
+import time
+import os
+import re
+import sys
+import argparse
+import collections
+import shutil
+import sqlite3
+import tempfile
+
+# The sweep engine lives with the config creator
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "config-creator"))
+
+import sweep_config
+from bag_analyzer import BagError, DEFAULT_MOTION_TOLERANCE, analyze_bag
+from config_schema import print_errors, validate_simulation_config
+from fleet import iter_robots, write_expanded_config
+from log_collector import collector_from_config
+from process_supervisor import SupervisedProcess
+from rosbridge_client import RosbridgeClient, RosbridgeError
+from rosbridge_manager import BridgeFailedError, BridgePool
+from telemetry import ResourceSampler, ResultsWriter, print_report
+
+# Every concurrent slot gets its own rosbridge port and ROS_DOMAIN_ID, offset from these
+DEFAULT_ROSBRIDGE_PORT = 9090
+DEFAULT_ROS_DOMAIN_ID = 0
+
+# How often the readiness signals of a starting Unreal Engine are checked
+READINESS_POLL_INTERVAL = 0.05
+TOPIC_PROBE_INTERVAL = 0.5
+
+# File the per-iteration telemetry is appended to
+DEFAULT_RESULTS_FILE = "simulation_results.jsonl"
+
+# Service of the ROS2UE5 plugin that restarts the loaded scenario without restarting Unreal Engine
+DEFAULT_RESET_SERVICE = "/ros2ue5/reset_scenario"
+
+# Recorded bags are written below this directory, one subdirectory per batch
+DEFAULT_BAG_DIR = "bags"
+DEFAULT_BAG_STORAGE = "mcap"
+
+def read_config(config_file):
+    """Read the JSON config file and return the data."""
+    with open(config_file, 'r') as f:
+        return json.load(f)
+
+def slot_environment(slot):
+    """Return the environment for processes of a slot, isolated by its ROS_DOMAIN_ID."""
+    env = os.environ.copy()
+    env["ROS_DOMAIN_ID"] = str(slot["domain_id"])
+    return env
+
+def slot_scenario(ue_scenario, slot, expand_fleets=False):
+    """
+    Return the scenario file Unreal Engine should load in a slot.
+
+    If the scenario is a readable config file, a copy pointing at the slot's rosbridge
+    port is written to the slot's working directory. Robot fleets stay compact, unless
+    expand_fleets asks for one entry per instance (for plugins without fleet support).
+    """
+    try:
+        with open(ue_scenario, 'r') as f:
+            scenario = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return ue_scenario
+
+    scenario.setdefault("ros", {}).setdefault("bridge", {})["port"] = str(slot["port"])
+    scenario_path = os.path.join(slot["work_dir"], os.path.basename(ue_scenario))
+    if expand_fleets:
+        write_expanded_config(scenario, scenario_path)
+    else:
+        with open(scenario_path, 'w') as f:
+            json.dump(scenario, f, indent=4)
+    return scenario_path
+
+def slot_process(label, cmd, slot):
+    """
+    Return a supervised process of a slot, not yet started.
+
+    If the batch collects logs, the process output is shipped as events tagged with the
+    simulation and iteration the slot is running at the time.
+    """
+    process = SupervisedProcess(f"slot{slot['index']} {label}", cmd, env=slot_environment(slot))
+    if slot.get("logs") is not None:
+        process.line_handlers.append(slot["logs"].process_handler(lambda: slot.get("log_context", {})))
+    return process
+
+async def start_unreal_engine(unreal_exec_path, ue_project, ue_scenario, iteration, slot, ready_file,
+                              expand_fleets=False):
+    """
+    Start Unreal Engine with the specified project and scenario.
+
+    Unreal Engine is asked to create ready_file once the scenario is running.
+    """
+    print(f"Starting Unreal Engine (iteration {iteration}, slot {slot['index']})...")
+    ue_cmd = [
+        unreal_exec_path,  # Unreal Engine executable path
+        ue_project,
+        f'-config="{slot_scenario(ue_scenario, slot, expand_fleets)}"',
+        "-autostart=true",
+        f"-iteration={iteration}",
+        f"-rosbridgePort={slot['port']}",
+        f'-readyFile="{ready_file}"'
+    ]
+    return await slot_process("unreal", ue_cmd, slot).start()
+
+def topics_advertised(slot, topics):
+    """Check through the slot's rosbridge whether all topics are known to the ROS graph."""
+    try:
+        with RosbridgeClient("127.0.0.1", slot["port"], timeout=TOPIC_PROBE_INTERVAL) as client:
+            return set(topics) <= set(client.get_topics())
+    except RosbridgeError:
+        return False
+
+async def wait_for_unreal_to_start(unreal_process, simulation, slot, ready_file):
+    """
+    Wait until Unreal Engine is ready, at most `timeout` seconds.
+
+    Unreal Engine counts as ready as soon as one of these signals is seen:
+    - it created ready_file,
+    - it logged a line matching the simulation's "readyPattern",
+    - all of the simulation's "readyTopics" are advertised through rosbridge.
+    Without a signal, the full timeout is waited as before. Returns the measured startup
+    latency in seconds, or None if Unreal Engine exited during startup.
+    """
+    print("Waiting for Unreal Engine to start...")
+    timeout = simulation["timeout"]
+    ready_pattern = re.compile(simulation["readyPattern"]) if simulation.get("readyPattern") else None
+    ready_topics = simulation.get("readyTopics", [])
+
+    ready_event = asyncio.Event()
+    if ready_pattern:
+        def check_line(process, stream_name, line):
+            if ready_pattern.search(line):
+                ready_event.set()
+        unreal_process.line_handlers.append(check_line)
+
+    async def watch_ready_file():
+        while not os.path.exists(ready_file):
+            await asyncio.sleep(READINESS_POLL_INTERVAL)
+
+    async def watch_topics():
+        while not await asyncio.to_thread(topics_advertised, slot, ready_topics):
+            await asyncio.sleep(TOPIC_PROBE_INTERVAL)
+
+    signals = [asyncio.create_task(ready_event.wait()), asyncio.create_task(watch_ready_file())]
+    if ready_topics:
+        signals.append(asyncio.create_task(watch_topics()))
+
+    start_time = time.monotonic()
+    try:
+        done, _ = await asyncio.wait(signals + [unreal_process.exit_task], timeout=timeout,
+                                     return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in signals:
+            task.cancel()
+        if ready_pattern:
+            unreal_process.line_handlers.remove(check_line)
+
+    if unreal_process.exit_task in done:
+        print(f"Unreal Engine exited during startup (code {unreal_process.returncode}).")
+        return None
+
+    latency = time.monotonic() - start_time
+    print(f"Unreal Engine is ready after {latency:.3f}s.")
+    return latency
+
+async def start_ros2_launch(ros2_pkg, ros2_launch, slot):
+    """Start the ROS2 launch file for the simulation."""
+    print(f"Starting ROS2 launch: {ros2_pkg} {ros2_launch} (slot {slot['index']})...")
+    ros2_cmd = ["ros2", "launch", ros2_pkg, ros2_launch]
+    return await slot_process("ros2", ros2_cmd, slot).start()
+
+def recording_topics(record, ue_scenario):
+    """
+    Return the topics to record: the configured "topics", or else the JointStateSubscriber
+    topics of the scenario's robots and the command topics. An empty list records all topics.
+    """
+    if record.get("topics"):
+        return list(record["topics"])
+    try:
+        with open(ue_scenario, 'r') as f:
+            scenario = json.load(f)
+    except (OSError, ValueError):
+        return []
+    topics = []
+    for robot in iter_robots(scenario.get("robots", []) if isinstance(scenario, dict) else []):
+        for subscriber in robot.get("subscribers", []) if isinstance(robot, dict) else []:
+            if subscriber.get("type") == "JointStateSubscriber" and subscriber.get("topic") not in topics:
+                topics.append(subscriber["topic"])
+    if not topics:
+        return []
+    return topics + [topic for topic in record.get("commandTopics", []) if topic not in topics]
+
+async def start_bag_recording(record, ue_scenario, slot):
+    """Start recording the iteration's topics with ros2 bag to record["bag"]."""
+    topics = recording_topics(record, ue_scenario)
+    print(f"Recording {', '.join(topics) if topics else 'all topics'} to {record['bag']}...")
+    os.makedirs(os.path.dirname(record["bag"]), exist_ok=True)
+    bag_cmd = ["ros2", "bag", "record", "-o", record["bag"], "-s", record.get("storage", DEFAULT_BAG_STORAGE)]
+    return await slot_process("rosbag", bag_cmd + (topics or ["-a"]), slot).start()
+
+async def analyze_recording(record):
+    """Compute the metrics of a recorded bag without blocking the event loop. Returns the result columns."""
+    if not os.path.exists(record["bag"]):
+        print(f"No bag was recorded to {record['bag']}.")
+        return {}
+    try:
+        metrics = await asyncio.to_thread(analyze_bag, record["bag"], record.get("jointStateTopics"),
+                                          record.get("commandTopics"),
+                                          record.get("tolerance", DEFAULT_MOTION_TOLERANCE))
+    except (OSError, BagError, sqlite3.Error) as e:
+        print(f"Could not analyze {record['bag']}: {e}")
+        return {"bag": record["bag"]}
+    return metrics
+
+async def reset_unreal_scenario(unreal_process, simulation, iteration, slot, ready_file):
+    """
+    Reset the scenario of a running Unreal Engine for the next iteration.
+
+    The reset is requested through the slot's rosbridge with the simulation's "resetService".
+    Returns the time until Unreal Engine is ready again, or None if the reset failed.
+    """
+    reset_service = simulation.get("resetService", DEFAULT_RESET_SERVICE)
+    print(f"Resetting scenario in running Unreal Engine (iteration {iteration}, slot {slot['index']})...")
+    start_time = time.monotonic()
+
+    def call_reset():
+        with RosbridgeClient("127.0.0.1", slot["port"], timeout=simulation["timeout"]) as client:
+            client.call_service(reset_service, {"iteration": iteration, "ready_file": ready_file})
+
+    try:
+        await asyncio.to_thread(call_reset)
+    except RosbridgeError as e:
+        print(f"Scenario reset failed: {e}")
+        return None
+
+    latency = await wait_for_unreal_to_start(unreal_process, simulation, slot, ready_file)
+    if latency is None:
+        return None
+    return time.monotonic() - start_time
+
+async def stop_unreal(slot):
+    """Stop the Unreal Engine kept running in a slot, if any."""
+    unreal = slot.pop("unreal", None)
+    if unreal is not None:
+        await unreal["process"].stop()
+
+async def run_iteration(simulation, iteration, ue_project, unreal_exec_path, slot, reuse_unreal=False, record=None):
+    """
+    Run one iteration of a simulation in a slot and supervise its Unreal/ROS processes.
+
+    With reuse_unreal, Unreal Engine is kept running after a completed iteration and the
+    next iteration of the same scenario resets it instead of starting it again. A failed
+    reset falls back to a cold start.
+
+    With record settings, the iteration's topics are recorded to the bag record["bag"]
+    while the ROS2 launch runs, and the metrics of the bag are added to the result.
+
+    Returns a result with the status of the iteration ("completed" if it ran until the
+    max simulation time or the ROS2 launch finished successfully, "crashed" otherwise),
+    the measured Unreal Engine startup latency, whether the start was "cold" or "warm",
+    the wall-clock time of each phase, the exit codes and the resource usage of the
+    Unreal Engine and ROS2 process trees.
+    """
+    ue_scenario = simulation["ueScenario"]
+    ros2_pkg = simulation["ros2Pkg"]
+    ros2_launch = simulation["ros2Launch"]
+    max_sim_time = simulation["maxSimTime"]
+
+    ready_file = os.path.join(slot["work_dir"], f"unreal_ready_{iteration}")
+    if os.path.exists(ready_file):
+        os.remove(ready_file)
+
+    # A running Unreal Engine can only be reused for the scenario it has loaded
+    unreal = slot.get("unreal")
+    if unreal is not None and (unreal["scenario"] != ue_scenario or not unreal["process"].running):
+        await stop_unreal(slot)
+        unreal = None
+
+    result = {"status": "crashed", "startup_latency": None, "start": "cold", "t_start": time.time()}
+    unreal_process = None
+    ros2_process = None
+    recorder = None
+    samplers = {}
+    try:
+        if unreal is not None:
+            samplers["unreal"] = ResourceSampler(unreal["process"].pid).start()
+            result["startup_latency"] = await reset_unreal_scenario(unreal["process"], simulation, iteration, slot,
+                                                                    ready_file)
+            if result["startup_latency"] is None:
+                print("Falling back to a cold start of Unreal Engine.")
+                await samplers.pop("unreal").stop()
+                await stop_unreal(slot)
+            else:
+                result["start"] = "warm"
+                unreal_process = unreal["process"]
+
+        if unreal_process is None:
+            # Start Unreal Engine and wait until it reports readiness
+            unreal_process = await start_unreal_engine(unreal_exec_path, ue_project, ue_scenario, iteration, slot,
+                                                       ready_file, simulation.get("expandFleets", False))
+            slot["unreal"] = {"process": unreal_process, "scenario": ue_scenario}
+            samplers["unreal"] = ResourceSampler(unreal_process.pid).start()
+            result["startup_latency"] = await wait_for_unreal_to_start(unreal_process, simulation, slot, ready_file)
+            if result["startup_latency"] is None:
+                return result
+        result["t_unreal_ready"] = time.time()
+
+        if record:
+            recorder = await start_bag_recording(record, ue_scenario, slot)
+
+        # Start ROS2 launch process
+        ros2_process = await start_ros2_launch(ros2_pkg, ros2_launch, slot)
+        samplers["ros2"] = ResourceSampler(ros2_process.pid).start()
+        result["t_ros2_start"] = time.time()
+
+        # React as soon as either process exits, or when the max simulation time is reached
+        done, _ = await asyncio.wait([unreal_process.exit_task, ros2_process.exit_task], timeout=max_sim_time,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        result["t_sim_end"] = time.time()
+        if not done:
+            print("Max simulation time reached. Stopping processes.")
+            result["status"] = "completed"
+        else:
+            print("One of the processes has stopped.")
+            if unreal_process.exit_task not in done and ros2_process.returncode == 0:
+                result["status"] = "completed"
+        return result
+    finally:
+        # Stop the ROS2 processes and Unreal Engine, including any orphaned children.
+        # A healthy Unreal Engine is kept running if it is going to be reused.
+        if ros2_process is not None:
+            await ros2_process.stop()
+            result["ros2_exit"] = ros2_process.returncode
+        # ros2 bag finalizes the bag when it is interrupted
+        if recorder is not None:
+            await recorder.stop()
+        if not reuse_unreal or result["status"] != "completed":
+            await stop_unreal(slot)
+            if unreal_process is not None:
+                result["unreal_exit"] = unreal_process.returncode
+        result["t_stopped"] = time.time()
+        for role, sampler in samplers.items():
+            for column, value in (await sampler.stop()).items():
+                result[f"{role}_{column}"] = value
+        if recorder is not None:
+            result.update(await analyze_recording(record))
+
+def iter_jobs(simulations):
+    """Lazily yield one job per simulation iteration."""
+    for simulation in simulations:
+        for iteration in range(1, simulation["iterations"] + 1):
+            yield {"simulation": simulation, "iteration": iteration, "attempt": 1}
+
+def bag_path(record, batch, job):
+    """Return the path of the bag recorded for a job, unique per batch, iteration and attempt."""
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", job["simulation"].get("name", "simulation"))
+    return os.path.join(record.get("outputDir", DEFAULT_BAG_DIR), batch,
+                        f"{name}_iteration{job['iteration']}_attempt{job['attempt']}")
+
+async def run_slot(slot, scheduler, bridge, ue_project, unreal_exec_path, reuse_unreal=False, restart_bridge=False,
+                   record=None):
+    """
+    Run jobs from the scheduler in one slot until none are left, using the slot's own ROS Bridge.
+
+    The bridge is health-checked before every iteration and restarted if it is not answering,
+    or always before a new iteration of a simulation with "restartBridge". Once the bridge
+    failed for good, the slot's remaining iterations are reported as "bridge_failed" right away.
+    """
+    try:
+        while True:
+            job = await scheduler.next_job()
+            if job is None:
+                break
+
+            simulation = job["simulation"]
+            print(f"\n--- Starting {simulation.get('name', 'simulation')} Iteration {job['iteration']} "
+                  f"(attempt {job['attempt']}, slot {slot['index']}) ---")
+            bridge_restarts = bridge.restarts
+            try:
+                if simulation.get("restartBridge", restart_bridge) and not bridge.fresh:
+                    await bridge.restart("restartBridge is set")
+                    bridge.raise_if_failed()
+                else:
+                    await bridge.ensure_healthy()
+            except BridgeFailedError as e:
+                # Not retried, the other iterations of the slot would fail the same way
+                print(f"Skipping iteration {job['iteration']}: {e}")
+                result = {"status": "bridge_failed", "startup_latency": None, "start": "cold", "slot": slot["index"],
+                          "bridge_restarts": bridge.restarts - bridge_restarts}
+                scheduler.report(job, result, 0.0)
+                continue
+            bridge.fresh = False
+            bridge_restarts = bridge.restarts
+            slot["log_context"] = {
+                "Simulation": simulation.get("name", ""),
+                "Iteration": job["iteration"],
+                "Attempt": job["attempt"],
+                "Slot": slot["index"],
+            }
+
+            job_record = simulation.get("record", record)
+            if job_record:
+                job_record = dict(job_record if isinstance(job_record, dict) else {})
+                job_record["bag"] = bag_path(job_record, scheduler.batch_info.get("batch", ""), job)
+
+            start_time = time.monotonic()
+            try:
+                result = await run_iteration(simulation, job["iteration"], ue_project, unreal_exec_path, slot,
+                                             reuse_unreal=simulation.get("reuseUnreal", reuse_unreal),
+                                             record=job_record)
+            except OSError as e:
+                print(f"Error starting iteration {job['iteration']}: {e}")
+                result = {"status": "crashed", "startup_latency": None, "start": "cold"}
+            except Exception as e:
+                # Any other error (e.g. an undecodable rosbridge message) only fails this iteration,
+                # which is retried like a crash; the slot and the rest of the batch keep running
+                print(f"Error in iteration {job['iteration']}: {type(e).__name__}: {e}")
+                result = {"status": "crashed", "startup_latency": None, "start": "cold"}
+            result["slot"] = slot["index"]
+            result["bridge_rtt"] = bridge.last_rtt
+            result["bridge_restarts"] = bridge.restarts - bridge_restarts
+            scheduler.report(job, result, time.monotonic() - start_time)
+    finally:
+        await stop_unreal(slot)
+
+class Scheduler:
+    """Job queue that hands out simulation iterations to slots and retries crashed ones."""
+
+    def __init__(self, jobs, retries, results_writer=None, batch_info=None, logs=None):
+        self.jobs = jobs
+        self.retries = retries
+        self.retry_queue = collections.deque()
+        self.results = []
+        # Every result is also streamed to the results file, tagged with batch_info
+        self.results_writer = results_writer
+        self.batch_info = batch_info or {}
+        self.logs = logs
+
+    async def next_job(self):
+        """Return the next job to run, preferring retries, or None when all jobs were handed out."""
+        if self.retry_queue:
+            return self.retry_queue.popleft()
+        return next(self.jobs, None)
+
+    def report(self, job, result, duration):
+        """Record the outcome of a job and queue it again if it crashed and has retries left."""
+        record = dict(self.batch_info, **result)
+        record.update({
+            "simulation": job["simulation"].get("name", ""),
+            "iteration": job["iteration"],
+            "attempt": job["attempt"],
+            "duration": duration,
+        })
+        if result.get("t_ros2_start") and result.get("t_sim_end"):
+            record["sim_time"] = result["t_sim_end"] - result["t_ros2_start"]
+        if result.get("t_sim_end") and result.get("t_stopped"):
+            record["teardown_time"] = result["t_stopped"] - result["t_sim_end"]
+        self.results.append(record)
+        if self.results_writer is not None:
+            self.results_writer.write(record)
+        if self.logs is not None:
+            self.logs.emit(f"{record['simulation']} iteration {job['iteration']} {result['status']} "
+                           f"after {duration:.1f}s", "Information" if result["status"] == "completed" else "Error",
+                           Simulation=record["simulation"], Iteration=job["iteration"], Attempt=job["attempt"],
+                           Status=result["status"], Duration=duration, StartupLatency=result["startup_latency"])
+        if result["status"] == "crashed" and job["attempt"] <= self.retries:
+            print(f"{job['simulation'].get('name', 'simulation')} iteration {job['iteration']} crashed, "
+                  f"retrying (attempt {job['attempt'] + 1}).")
+            self.retry_queue.append(dict(job, attempt=job["attempt"] + 1))
+
+def print_summary(results, wall_time):
+    """Print the outcome of every simulation in the batch."""
+    print("\n=== Summary ===")
+    simulations = {}
+    for result in results:
+        simulations.setdefault(result["simulation"], []).append(result)
+
+    for name, runs in simulations.items():
+        # Only the last attempt of an iteration counts
+        final = {}
+        for result in runs:
+            final[result["iteration"]] = result
+        completed = sum(1 for result in final.values() if result["status"] == "completed")
+        retried = sum(1 for result in runs if result["attempt"] > 1)
+        average = sum(result["duration"] for result in runs) / len(runs)
+        latencies = [result["startup_latency"] for result in runs if result["startup_latency"] is not None]
+        startup = f"{sum(latencies) / len(latencies):.2f}s" if latencies else "n/a"
+        print(f"{name}: {completed}/{len(final)} iterations completed, {retried} retries, "
+              f"{average:.1f}s per attempt, {startup} average Unreal Engine startup")
+
+    # Estimate the time saved by resetting a running Unreal Engine instead of restarting it
+    cold = [result["startup_latency"] for result in results
+            if result["start"] == "cold" and result["startup_latency"] is not None]
+    warm = [result["startup_latency"] for result in results
+            if result["start"] == "warm" and result["startup_latency"] is not None]
+    if cold and warm:
+        cold_average = sum(cold) / len(cold)
+        warm_average = sum(warm) / len(warm)
+        saved = sum(cold_average - latency for latency in warm)
+        print(f"Unreal Engine reused for {len(warm)} iterations: {warm_average:.2f}s average reset vs "
+              f"{cold_average:.2f}s average cold start, about {saved:.1f}s saved")
+    print(f"Total wall-clock time: {wall_time:.1f}s")
+
+async def run_batch(simulations, ue_project, unreal_exec_path, max_parallel=1, retries=0,
+                    base_port=DEFAULT_ROSBRIDGE_PORT, base_domain_id=DEFAULT_ROS_DOMAIN_ID, reuse_unreal=False,
+                    results_file=None, restart_bridge=False, bridge_args=None, logging_config=None, record=None,
+                    scheduler=None):
+    """
+    Run all iterations of all simulations with up to max_parallel concurrent slots.
+
+    Every slot gets a managed ROS Bridge from a pool; bridge_args are passed to its launch file.
+
+    If results_file is given, one row of timing and resource telemetry per iteration is
+    appended to it (CSV or JSONL, by extension).
+
+    With record (true or recording settings, overridable per simulation), every iteration is
+    recorded to a bag whose metrics are added to its results.
+
+    A scheduler other than the local job queue (such as a worker's connection to a
+    coordinator, see sim_cluster.py) can be passed to take the jobs from.
+
+    If logging_config enables logging, the Unreal Engine and ROS2 output and the outcome
+    of every iteration are shipped to its destination (Seq or a file) as structured events.
+    """
+    batch_info = {
+        "batch": time.strftime("%Y%m%dT%H%M%S"),
+        "ue_project": ue_project,
+        "unreal_exec": unreal_exec_path,
+    }
+    results_writer = ResultsWriter(results_file) if results_file else None
+    if scheduler is not None:
+        batch_info = scheduler.batch_info
+    logs = collector_from_config(logging_config, {"Application": "sim_runner", "Batch": batch_info["batch"]})
+    if scheduler is None:
+        scheduler = Scheduler(iter_jobs(simulations), retries, results_writer, batch_info, logs)
+    work_dir = tempfile.mkdtemp(prefix="sim_runner_")
+    start_time = time.monotonic()
+    try:
+        slots = []
+        for index in range(max_parallel):
+            slot = {
+                "index": index,
+                "port": base_port + index,
+                "domain_id": base_domain_id + index,
+                "work_dir": os.path.join(work_dir, f"slot{index}"),
+                "logs": logs,
+            }
+            os.makedirs(slot["work_dir"])
+            slots.append(slot)
+
+        bridges = BridgePool(bridge_args)
+        await bridges.start(slots, slot_environment)
+        try:
+            await asyncio.gather(*(run_slot(slot, scheduler, bridges.bridge(slot), ue_project, unreal_exec_path,
+                                            reuse_unreal, restart_bridge, record)
+                                   for slot in slots))
+        finally:
+            await bridges.stop()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if logs is not None:
+            logs.close()
+
+    print_summary(scheduler.results, time.monotonic() - start_time)
+    bridges.print_stats()
+    if results_file:
+        print(f"Results written to {results_file} (batch {batch_info['batch']}).")
+    if logs is not None:
+        stats = logs.stats()
+        print(f"Log events: {stats['sent']} sent, {stats['dropped']} dropped.")
+    return scheduler.results
+
+def main():
+    # Set up argument parser
+    parser = argparse.ArgumentParser(description="Automated Simulation Runner")
+    parser.add_argument(
+        "--config", 
+        type=str, 
+        default="simulation_config.json", 
+        help="Path to the simulation configuration file (default: simulation_config.json)"
+    )
+    parser.add_argument(
+        "--unreal-path", 
+        type=str, 
+        required=False, 
+        help="Path to the Unreal Engine executable"
+    )
+    parser.add_argument(
+        "--max-parallel",
+        type=int,
+        default=None,
+        help="Maximum number of iterations running at the same time (default: maxParallel from the config, or 1)"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=None,
+        help="How often a crashed iteration is retried (default: retries from the config, or 0)"
+    )
+    parser.add_argument(
+        "--reuse-unreal",
+        action="store_true",
+        help="Keep Unreal Engine running between iterations of the same scenario and reset it over rosbridge"
+    )
+    parser.add_argument(
+        "--results",
+        type=str,
+        default=None,
+        help="CSV or JSONL file the per-iteration telemetry is appended to "
+             "(default: resultsFile from the config, or simulation_results.jsonl)"
+    )
+    parser.add_argument(
+        "--sweep",
+        type=str,
+        default=None,
+        help="Sweep spec (see config-creator/sweep_config.py) whose simulations are generated lazily "
+             "and run instead of those of --config"
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        nargs="+",
+        metavar="RESULTS_FILE",
+        help="Print throughput, phase latency percentiles and resource peaks per batch of the given results files "
+             "and exit"
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Record every iteration with ros2 bag and add the bag's metrics to the results"
+    )
+    parser.add_argument(
+        "--log-endpoint",
+        type=str,
+        default=None,
+        help="Seq server (http://host:port) or file:// path the process output is shipped to "
+             "(default: logging from the config, if any)"
+    )
+    
+    # Parse the arguments
+    args = parser.parse_args()
+
+    if args.report:
+        print_report(args.report)
+        return
+
+    # Default Unreal Engine paths for different platforms
+    if sys.platform == "win32":
+        default_unreal_exec_path = r"C:\Program Files\Epic Games\UE_5.3\Engine\Binaries\Win64\UnrealEditor.exe"
+    elif sys.platform == "linux":
+        # UnrealEditor on the PATH (or the benchmark stand-in), else replace this with the path on your system
+        default_unreal_exec_path = shutil.which("UnrealEditor") or "/path/to/UnrealEditor"
+    else:
+        print("Unsupported platform. This script only supports Windows and Linux.")
+        sys.exit(1)
+
+    # Use the command-line argument if provided, otherwise use the default path
+    unreal_exec_path = args.unreal_path if args.unreal_path else default_unreal_exec_path
+
+    # Read the configuration. A sweep spec holds the runner settings itself and
+    # expands into its simulations while they are being run.
+    if args.sweep:
+        config = dict(sweep_config.load_spec(args.sweep))
+        spec_dir = os.path.dirname(os.path.abspath(args.sweep))
+        errors = validate_simulation_config(sweep_config.template_config(config, spec_dir), args.sweep,
+                                            unreal_exec_path)
+        config["simulations"] = sweep_config.iter_sweep(config, spec_dir)
+    else:
+        config = read_config(args.config)
+        errors = validate_simulation_config(config, args.config, unreal_exec_path)
+
+    # Check the whole config before any process is started
+    if not print_errors(errors):
+        sys.exit(1)
+    max_parallel = args.max_parallel or config.get("maxParallel", 1)
+    logging_config = config.get("logging")
+    if args.log_endpoint:
+        logging_config = {"enable": True, "destination": dict((logging_config or {}).get("destination", {}),
+                                                              endpoint=args.log_endpoint)}
+    retries = args.retries if args.retries is not None else config.get("retries", 0)
+
+    # Run all simulations, each slot with its own ROS Bridge
+    asyncio.run(run_batch(
+        config["simulations"],
+        config["ueProject"],
+        unreal_exec_path,
+        max_parallel=max_parallel,
+        retries=retries,
+        base_port=int(config.get("rosbridgePort", DEFAULT_ROSBRIDGE_PORT)),
+        base_domain_id=int(config.get("rosDomainId", DEFAULT_ROS_DOMAIN_ID)),
+        reuse_unreal=args.reuse_unreal or config.get("reuseUnreal", False),
+        results_file=args.results or config.get("resultsFile", DEFAULT_RESULTS_FILE),
+        restart_bridge=config.get("restartBridge", False),
+        bridge_args=config.get("rosbridgeArgs"),
+        logging_config=logging_config,
+        record=config.get("record") or args.record,
+    ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import asyncio
+import csv
+import json
+import math
+import os
+import sys
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# How often the process trees of an iteration are sampled
+SAMPLE_INTERVAL = 0.5
+
+# Supervised processes whose resource usage is recorded per iteration
+ROLES = ("unreal", "ros2")
+RESOURCE_COLUMNS = ("cpu_time", "cpu_peak", "rss_peak", "read_bytes", "write_bytes")
+
+# Columns of the results file, in order
+COLUMNS = (
+    "batch", "ue_project", "unreal_exec", "simulation", "iteration", "attempt", "worker", "slot", "start", "status",
+    "unreal_exit", "ros2_exit", "bridge_rtt", "bridge_restarts",
+    "t_start", "t_unreal_ready", "t_ros2_start", "t_sim_end", "t_stopped",
+    "startup_latency", "sim_time", "teardown_time", "duration",
+    "bag", "bag_messages", "joint_state_rate", "command_latency_p50", "command_latency_p95", "completion_time",
+) + tuple(f"{role}_{column}" for role in ROLES for column in RESOURCE_COLUMNS)
+
+def read_proc_tree(leader_pid):
+    """
+    Return {pid: (cpu seconds, rss bytes, read bytes, written bytes)} for all processes
+    in the process group of leader_pid, read from /proc.
+
+    Supervised processes lead their own group, so this includes orphaned grandchildren.
+    """
+    clock_ticks = os.sysconf('SC_CLK_TCK')
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    usage = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # The command name may contain spaces, the fields after it do not
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[2]) != leader_pid:
+            continue
+
+        read_bytes = write_bytes = 0
+        try:
+            with open(f'/proc/{entry}/io', 'r') as f:
+                for line in f:
+                    name, _, value = line.partition(':')
+                    if name == "read_bytes":
+                        read_bytes = int(value)
+                    elif name == "write_bytes":
+                        write_bytes = int(value)
+        except OSError:
+            pass
+        cpu_time = (int(fields[11]) + int(fields[12])) / clock_ticks
+        usage[int(entry)] = (cpu_time, int(fields[21]) * page_size, read_bytes, write_bytes)
+    return usage
+
+def read_psutil_tree(leader_pid):
+    """Return the same usage mapping as read_proc_tree for leader_pid and its descendants, using psutil."""
+    usage = {}
+    try:
+        leader = psutil.Process(leader_pid)
+        processes = [leader] + leader.children(recursive=True)
+    except psutil.Error:
+        return usage
+    for process in processes:
+        try:
+            with process.oneshot():
+                cpu = process.cpu_times()
+                rss = process.memory_info().rss
+                try:
+                    io = process.io_counters()
+                    read_bytes, write_bytes = io.read_bytes, io.write_bytes
+                except (AttributeError, psutil.Error):
+                    read_bytes = write_bytes = 0
+        except psutil.Error:
+            continue
+        usage[process.pid] = (cpu.user + cpu.system, rss, read_bytes, write_bytes)
+    return usage
+
+def read_tree(leader_pid):
+    """Return the resource usage of a process tree, or an empty mapping if it cannot be measured here."""
+    if psutil is not None:
+        return read_psutil_tree(leader_pid)
+    if os.path.isdir('/proc'):
+        return read_proc_tree(leader_pid)
+    return {}
+
+class ResourceSampler:
+    """
+    Periodically samples the process tree of a supervised process while an iteration runs.
+
+    CPU time and IO are counted from the start of sampling, so a reused Unreal Engine
+    is only charged for the iteration being measured.
+    """
+
+    def __init__(self, pid, interval=SAMPLE_INTERVAL):
+        self.pid = pid
+        self.interval = interval
+        self.baseline = {}
+        self.last = {}
+        self.cpu_peak = 0.0
+        self.rss_peak = 0
+        self.task = None
+
+    def start(self):
+        self.baseline = read_tree(self.pid)
+        self.last = dict(self.baseline)
+        self.rss_peak = sum(usage[1] for usage in self.baseline.values())
+        self.task = asyncio.create_task(self.run())
+        return self
+
+    async def run(self):
+        previous = self.last
+        previous_time = asyncio.get_running_loop().time()
+        while True:
+            await asyncio.sleep(self.interval)
+            now = asyncio.get_running_loop().time()
+            self.sample(previous, now - previous_time)
+            previous, previous_time = dict(self.last), now
+
+    def sample(self, previous, elapsed):
+        current = read_tree(self.pid)
+        self.last.update(current)
+        self.rss_peak = max(self.rss_peak, sum(usage[1] for usage in current.values()))
+        if elapsed > 0:
+            cpu = sum(usage[0] - previous.get(pid, (0,))[0] for pid, usage in current.items())
+            self.cpu_peak = max(self.cpu_peak, 100.0 * cpu / elapsed)
+
+    async def stop(self):
+        """Stop sampling and return the resource totals and peaks of the tree."""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        self.sample(dict(self.last), 0)
+
+        totals = [0.0, 0, 0, 0]
+        for pid, usage in self.last.items():
+            baseline = self.baseline.get(pid, (0, 0, 0, 0))
+            for index in (0, 2, 3):
+                totals[index] += usage[index] - baseline[index]
+        return {
+            "cpu_time": round(totals[0], 3),
+            "cpu_peak": round(self.cpu_peak, 1),
+            "rss_peak": self.rss_peak,
+            "read_bytes": totals[2],
+            "write_bytes": totals[3],
+        }
+
+def csv_header(path):
+    """Return the header row of a CSV file, or None if the file is missing or empty."""
+    try:
+        with open(path, 'r', newline='') as f:
+            return next(csv.reader(f), None)
+    except FileNotFoundError:
+        return None
+
+def rotated_path(path):
+    """Return the first free path results.1.csv, results.2.csv, ... for path."""
+    stem, extension = os.path.splitext(path)
+    index = 1
+    while os.path.exists(f"{stem}.{index}{extension}"):
+        index += 1
+    return f"{stem}.{index}{extension}"
+
+class ResultsWriter:
+    """
+    Append one row per iteration to a CSV or JSONL results file, depending on its extension.
+
+    A CSV file whose header differs from the columns (written by an older version with fewer
+    columns) is moved aside before the first row is appended, so rows never end up under
+    the wrong header.
+    """
+
+    def __init__(self, path, columns=COLUMNS):
+        self.path = path
+        self.columns = columns
+        self.is_csv = path.lower().endswith(".csv")
+        self.header_checked = False
+
+    def check_header(self):
+        header = csv_header(self.path)
+        if header is not None and header != list(self.columns):
+            rotated = rotated_path(self.path)
+            os.replace(self.path, rotated)
+            print(f"{self.path} has other columns than this version writes, moved it to {rotated}.")
+        self.header_checked = True
+
+    def write(self, record):
+        row = {column: record.get(column) for column in self.columns}
+        if self.is_csv:
+            if not self.header_checked:
+                self.check_header()
+            # Nested values (like per-topic rates) are stored as JSON
+            row = {column: json.dumps(value) if isinstance(value, (dict, list)) else value
+                   for column, value in row.items()}
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.columns)
+                if write_header:
+                    writer.writeheader()
+                writer.writerow(row)
+        else:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(row) + "\n")
+
+def load_results(path):
+    """Read the rows of a CSV or JSONL results file, with numeric columns converted back to numbers."""
+    if path.lower().endswith(".csv"):
+        with open(path, 'r', newline='') as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            for column, value in row.items():
+                if value == "":
+                    row[column] = None
+                else:
+                    try:
+                        row[column] = float(value)
+                    except (TypeError, ValueError):
+                        pass
+        return rows
+
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of values, or None for an empty list."""
+    values = sorted(values)
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+def format_seconds(value):
+    return f"{value:.2f}s" if value is not None else "n/a"
+
+def format_bytes(value):
+    if value is None:
+        return "n/a"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.1f} {unit}"
+        value /= 1024
+
+def print_batch_report(batch, rows):
+    """Print throughput, phase latency percentiles and resource peaks of one batch."""
+    starts = [row["t_start"] for row in rows if row.get("t_start") is not None]
+    ends = [row["t_stopped"] for row in rows if row.get("t_stopped") is not None]
+    wall_time = max(ends) - min(starts) if starts and ends else None
+    completed = sum(1 for row in rows if row["status"] == "completed")
+
+    print(f"\n=== Batch {batch} ===")
+    print(f"Project: {rows[0].get('ue_project')}, Unreal Engine: {rows[0].get('unreal_exec')}")
+    print(f"Iterations: {len(rows)} attempts, {completed} completed", end="")
+    if wall_time:
+        print(f", {completed / wall_time * 3600:.1f} completed iterations/hour over {wall_time:.1f}s")
+    else:
+        print()
+
+    print(f"{'phase':<20}{'p50':>10}{'p95':>10}{'max':>10}")
+    phases = ["startup_latency", "sim_time", "teardown_time", "duration"]
+    # Metrics of recorded bags only exist for batches that recorded them
+    phases += [phase for phase in ("command_latency_p50", "completion_time")
+               if any(row.get(phase) is not None for row in rows)]
+    for phase in phases:
+        values = [row[phase] for row in rows if row.get(phase) is not None]
+        print(f"{phase:<20}{format_seconds(percentile(values, 0.5)):>10}{format_seconds(percentile(values, 0.95)):>10}"
+              f"{format_seconds(max(values) if values else None):>10}")
+
+    for role in ROLES:
+        def peak(column):
+            values = [row[f"{role}_{column}"] for row in rows if row.get(f"{role}_{column}") is not None]
+            return max(values) if values else None
+
+        cpu_peak = peak("cpu_peak")
+        cpu_times = [row[f"{role}_cpu_time"] for row in rows if row.get(f"{role}_cpu_time") is not None]
+        print(f"{role}: peak RSS {format_bytes(peak('rss_peak'))}, "
+              f"peak CPU {f'{cpu_peak:.0f}%' if cpu_peak is not None else 'n/a'}, "
+              f"p50 CPU time {format_seconds(percentile(cpu_times, 0.5))}, "
+              f"peak IO {format_bytes(peak('read_bytes'))} read / {format_bytes(peak('write_bytes'))} written")
+
+def print_report(paths):
+    """Print a report for every batch found in the given results files."""
+    batches = {}
+    for path in paths:
+        for row in load_results(path):
+            batches.setdefault(str(row.get("batch")), []).append(row)
+    if not batches:
+        print("No results found.")
+        return
+
+    for batch, rows in batches.items():
+        print_batch_report(batch, rows)
+
+if __name__ == "__main__":
+    print_report(sys.argv[1:])